@@ -0,0 +1,177 @@
+"""
+Synthetic-load benchmark suite for the DPDP audit tool.
+
+Drives the app headlessly with Streamlit's AppTest over synthetic
+catalogues of increasing size and scripted scenarios:
+
+    first_run   — initial script run of a fresh session
+    rerun       — full rerun with no state change
+    toggle      — tick / untick one section
+    bulk_toggle — "Mark all N sections" on the first chapter
+    reset       — Reset All
+    export      — build each export format (uncached) and one cache hit
+
+Each scenario reports p50/p95 latency; sessions also report pickled state
+size and the traced memory peak of their first run. Output is one JSON
+document so builds can be diffed.
+
+    python benchmarks/bench_load.py [--sizes 44,500,2000,10000] [--repeat 15]
+                                    [--eager-max 2000] [-o results.json]
+                                    [--baseline previous.json]
+
+With ``--baseline`` the p50 of each scenario is compared against an
+earlier run and the ratios are printed to stderr.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "dpdp_audit_tool.py")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("DPDP_STATE_BACKEND", "memory")
+
+from synthetic_catalogue import write as write_catalogue  # noqa: E402
+
+
+SCENARIOS = ("rerun", "toggle", "bulk_toggle", "reset")
+
+
+def percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {"p50_ms": round(statistics.median(ordered) * 1000, 2), "p95_ms": round(p95 * 1000, 2), "n": len(ordered)}
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_session(catalogue_path: str, lazy: bool, repeat: int) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    from dpdp_catalogue import load_catalogue
+    from dpdp_metrics import state_size
+    from dpdp_report import EXPORT_FORMATS, build_export, export_cache
+
+    os.environ["DPDP_CATALOGUE"] = catalogue_path
+    catalogue = load_catalogue(catalogue_path)
+    first_ch = catalogue.chapters[0]
+    first_key = first_ch["sections"][0]["key"]
+
+    at = AppTest.from_file(APP, default_timeout=600)
+    at.session_state["lazy_render"] = lazy
+    if lazy:
+        # Open the first chapter so its widgets exist for the toggle scenarios.
+        at.session_state[f"exp_{first_ch['id']}"] = True
+
+    tracemalloc.start()
+    first = timed(at.run)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    result = {"first_run_ms": round(first * 1000, 2), "first_run_peak_kb": round(peak / 1024, 1)}
+    result["rerun"] = percentiles([timed(at.run) for _ in range(repeat)])
+
+    samples = []
+    for i in range(repeat):
+        box = at.checkbox(key=f"cb_{first_key}")
+        samples.append(timed((box.check() if i % 2 == 0 else box.uncheck()).run))
+    result["toggle"] = percentiles(samples)
+
+    samples = []
+    for i in range(repeat):
+        box = at.checkbox(key=f"toggle_all_{first_ch['id']}")
+        samples.append(timed((box.check() if i % 2 == 0 else box.uncheck()).run))
+    result["bulk_toggle"] = percentiles(samples)
+
+    samples = []
+    for _ in range(repeat):
+        at.checkbox(key=f"toggle_all_{first_ch['id']}").check().run()
+        reset = next(b for b in at.button if "Reset" in b.label)
+        samples.append(timed(reset.click().run))
+    result["reset"] = percentiles(samples)
+
+    checked = at.session_state.progress.checked
+    result["export_ms"] = {fmt: round(timed(lambda: build_export(catalogue, checked, fmt)) * 1000, 2)
+                           for fmt in EXPORT_FORMATS}
+    export_cache.get(catalogue, checked, "csv")
+    result["export_ms"]["csv_cached"] = round(timed(lambda: export_cache.get(catalogue, checked, "csv")) * 1000, 3)
+
+    state = at.session_state._state.filtered_state
+    result["session_state_kb"] = round(state_size(state) / 1024, 1)
+    return result
+
+
+def build_info() -> dict:
+    import streamlit
+
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = None
+    return {"git_rev": rev, "python": platform.python_version(), "streamlit": streamlit.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def compare(report: dict, baseline: dict):
+    previous = {(r["sections"], r["mode"]): r for r in baseline["results"]}
+    for entry in report["results"]:
+        old = previous.get((entry["sections"], entry["mode"]))
+        if old is None:
+            continue
+        ratios = [f"{name} ×{entry[name]['p50_ms'] / old[name]['p50_ms']:.2f}"
+                  for name in SCENARIOS if old[name]["p50_ms"]]
+        print(f"  {entry['sections']:>6} {entry['mode']:<5} " + "  ".join(ratios), file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Synthetic-load benchmarks for the DPDP audit tool.")
+    parser.add_argument("--sizes", default="44,500,2000,10000", help="comma-separated catalogue sizes")
+    parser.add_argument("--repeat", type=int, default=15, help="samples per scenario")
+    parser.add_argument("--eager-max", type=int, default=2000, help="largest size also measured with eager rendering")
+    parser.add_argument("-o", "--out", default=None, help="write JSON here instead of stdout")
+    parser.add_argument("--baseline", default=None, help="earlier JSON report to compare p50s against")
+    args = parser.parse_args(argv)
+
+    report = {"build": build_info(), "repeat": args.repeat, "results": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(",")):
+            path = write_catalogue(size, os.path.join(tmp, f"catalogue_{size}.json"))
+            modes = ["lazy", "eager"] if size <= args.eager_max else ["lazy"]
+            for mode in modes:
+                print(f"  … {size} sections, {mode}", file=sys.stderr)
+                entry = {"sections": size, "mode": mode}
+                entry.update(run_session(path, mode == "lazy", args.repeat))
+                report["results"].append(entry)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            compare(report, json.load(fh))
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Remediation-planner benchmark for the DPDP audit tool.
+
+Builds a plan for N entities with a random half of their sections pending,
+then applies random ticks and unticks, re-timing the plan after each one
+as the Plan view would. Reports the full build and the per-change update,
+and checks the incrementally updated plan against a rebuild.
+
+    python benchmarks/bench_planner.py [--entities 250,2000] [--changes 200]
+                                       [--auditors 40] [-o results.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dpdp_catalogue import load_catalogue  # noqa: E402
+from dpdp_planner import RemediationPlan  # noqa: E402
+
+START = date(2026, 1, 5)
+
+
+def percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {"p50_ms": round(statistics.median(ordered) * 1000, 2), "p95_ms": round(p95 * 1000, 2), "n": len(ordered)}
+
+
+def build(catalogue, pending: dict, auditors: int) -> RemediationPlan:
+    plan = RemediationPlan(catalogue, auditors, start=START)
+    plan.load(pending)
+    plan.schedule()
+    return plan
+
+
+def run(entities: int, changes: int, auditors: int, seed: int = 0) -> dict:
+    catalogue = load_catalogue()
+    rng = random.Random(seed)
+    pending = {f"entity-{n:05d}": {k for k in catalogue.keys if rng.random() < 0.5} for n in range(entities)}
+
+    start = time.perf_counter()
+    plan = build(catalogue, pending, auditors)
+    build_s = time.perf_counter() - start
+    tasks = len(plan.order)
+
+    samples, retimed = [], []
+    for _ in range(changes):
+        entity, key = rng.choice(list(pending)), rng.choice(catalogue.keys)
+        done = key in pending[entity]
+        (pending[entity].discard if done else pending[entity].add)(key)
+        start = time.perf_counter()
+        plan.set(entity, key, done)
+        retimed.append(plan.schedule())
+        samples.append(time.perf_counter() - start)
+
+    rebuilt = build(catalogue, pending, auditors)
+    return {
+        "entities": entities,
+        "tasks": tasks,
+        "auditors": auditors,
+        "build_ms": round(build_s * 1000, 2),
+        "update": percentiles(samples),
+        "mean_retimed": round(statistics.mean(retimed)),
+        "matches_rebuild": rebuilt.order == plan.order and rebuilt.timing == plan.timing,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Remediation planner build and incremental-update benchmark.")
+    parser.add_argument("--entities", default="250,2000", help="comma-separated portfolio sizes")
+    parser.add_argument("--changes", type=int, default=200)
+    parser.add_argument("--auditors", type=int, default=40)
+    parser.add_argument("-o", "--out", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = [run(int(n), args.changes, args.auditors) for n in args.entities.split(",")]
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return 0 if all(r["matches_rebuild"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
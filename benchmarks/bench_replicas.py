@@ -0,0 +1,170 @@
+"""
+Multi-replica benchmark for the DPDP audit tool.
+
+Starts R replica processes on one shared SQLite store, as R identical
+server processes behind a proxy would run. Each replica opens one store
+(watching, as the app does) and runs S sessions closed-loop: every
+simulated rerun polls ``changes_since`` as live sync does, sometimes
+toggles a section, and burns ``--work-ms`` of CPU for the page itself.
+Replica 0 also writes a probe key every 50 ms, and the others time its
+arrival through ``subscribe`` to measure cross-process propagation.
+
+Reports reruns per second across all replicas, the store's CPU time per
+rerun, propagation latency, and whether every replica's cached state
+matches the file. Throughput can only scale with the cores available;
+``cpus`` is reported alongside.
+
+    python benchmarks/bench_replicas.py [--replicas 1,2,4] [--sessions 20]
+                                        [--seconds 5] [--work-ms 2] [--no-watch] [-o results.json]
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dpdp_catalogue import load_catalogue  # noqa: E402
+from dpdp_store import SQLiteStore  # noqa: E402
+
+ENGAGEMENTS = [f"entity-{n:02d}" for n in range(8)]
+PROBE = "probe"
+PROBE_EVERY = 0.05
+
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "n": 0}
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {"p50_ms": round(statistics.median(ordered) * 1000, 3), "p95_ms": round(p95 * 1000, 3), "n": len(ordered)}
+
+
+def burn(seconds: float):
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+def session(n: int, store, keys: list, deadline: float, work: float, write_share: float, out: list):
+    rng = random.Random(n)
+    engagement = ENGAGEMENTS[n % len(ENGAGEMENTS)]
+    state = store.load(engagement)
+    seq = store.head_seq(engagement)
+    reruns, store_time = 0, 0.0
+    while time.monotonic() < deadline:
+        # CPU time, not wall time: with many sessions per core, wall time is mostly waiting for the GIL.
+        start = time.thread_time()
+        if rng.random() < write_share:
+            key = rng.choice(keys)
+            state[key] = not state.get(key, False)
+            store.write(engagement, {key: state[key]}, actor=f"session-{n}")
+        seq, changes = store.changes_since(engagement, seq)
+        state.update(changes)
+        store_time += time.thread_time() - start
+        burn(work)
+        reruns += 1
+    out.append((reruns, store_time))
+
+
+def replica(index: int, path: str, sessions: int, seconds: float, work: float, write_share: float,
+            watch: bool, barrier, probes, results):
+    keys = load_catalogue().keys
+    store = SQLiteStore(path, watch=watch)
+    arrivals = {}
+    if watch:
+        store.subscribe(lambda engagement, values: engagement == PROBE and arrivals.setdefault(
+            values["probe/1"], time.time()))
+    for engagement in ENGAGEMENTS:
+        store.load(engagement)
+    barrier.wait()
+    deadline = time.monotonic() + seconds
+    out = []
+    threads = [threading.Thread(target=session, args=(index * sessions + n, store, keys, deadline, work,
+                                                      write_share, out)) for n in range(sessions)]
+    for t in threads:
+        t.start()
+    if index == 0:
+        i = 0
+        while time.monotonic() < deadline:
+            i += 1
+            store.write(PROBE, {"probe/1": i})
+            store.flush()
+            probes.put((i, time.time()))
+            time.sleep(PROBE_EVERY)
+        probes.put(None)
+    for t in threads:
+        t.join()
+    store.flush()
+    barrier.wait()   # every replica has flushed
+    time.sleep(0.5)
+    truth = SQLiteStore(path)
+    converged = all(store.load(e) == truth.load(e) for e in ENGAGEMENTS)
+    truth.close()
+    store.close()
+    results.put({"replica": index, "reruns": sum(r for r, _ in out), "store_s": sum(s for _, s in out),
+                 "arrivals": arrivals, "converged": converged})
+
+
+def run(replicas: int, sessions: int, seconds: float, work: float, write_share: float, watch: bool) -> dict:
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "replicas.db")
+        SQLiteStore(path).close()
+        barrier, probes, results = ctx.Barrier(replicas), ctx.Queue(), ctx.Queue()
+        procs = [ctx.Process(target=replica, args=(i, path, sessions, seconds, work, write_share, watch,
+                                                   barrier, probes, results)) for i in range(replicas)]
+        for p in procs:
+            p.start()
+        sent = {}
+        for item in iter(probes.get, None):
+            sent[item[0]] = item[1]
+        reports = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    reruns = sum(r["reruns"] for r in reports)
+    lags = [r["arrivals"][i] - ts for r in reports if r["replica"] for i, ts in sent.items() if i in r["arrivals"]]
+    return {
+        "replicas": replicas,
+        "sessions_per_replica": sessions,
+        "watch": watch,
+        "cpus": os.cpu_count(),
+        "reruns_per_s": round(reruns / seconds, 1),
+        "store_cpu_ms_per_rerun": round(1000 * sum(r["store_s"] for r in reports) / max(reruns, 1), 3),
+        "propagation": percentiles(lags),
+        "converged": all(r["converged"] for r in reports),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replica scaling and cross-process propagation benchmark.")
+    parser.add_argument("--replicas", default="1,2,4", help="comma-separated replica counts")
+    parser.add_argument("--sessions", type=int, default=20, help="sessions per replica")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--work-ms", type=float, default=2.0, help="CPU per rerun outside the store")
+    parser.add_argument("--write-share", type=float, default=0.05, help="share of reruns that toggle a section")
+    parser.add_argument("--no-watch", action="store_true", help="poll the file per session, without the change feed")
+    parser.add_argument("-o", "--out", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = [run(int(n), args.sessions, args.seconds, args.work_ms / 1000, args.write_share, not args.no_watch)
+               for n in args.replicas.split(",")]
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return 0 if all(r["converged"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Startup and rerun budget for the DPDP audit tool.
+
+    python benchmarks/bench_startup.py [--cold-runs 5] [--warm-runs 30]
+                                       [--cold-budget 4.0] [--warm-budget 0.5]
+
+Cold start is measured in fresh interpreters: importing Streamlit and the
+app's modules plus the first full script run, which is what the first
+auditor of the day waits for after a scale-from-zero. Warm rerun is the
+median/p95 of repeated full reruns in one process. Prints a JSON record
+and exits non-zero if either median exceeds its budget.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "dpdp_audit_tool.py")
+
+COLD_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+t2 = time.perf_counter()
+assert not at.exception, at.exception
+heavy = sorted(m for m in ("pandas", "numpy", "pyarrow", "fpdf") if m in sys.modules)
+print(t1 - t0, t2 - t1, ",".join(heavy))
+"""
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def measure_cold(runs: int) -> dict:
+    env = dict(os.environ, DPDP_STATE_BACKEND="memory")
+    walls, imports, first_runs, heavy = [], [], [], ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", COLD_PROBE, APP], env=env, cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.split()
+        walls.append(time.perf_counter() - start)
+        imports.append(float(out[0]))
+        first_runs.append(float(out[1]))
+        heavy = out[2] if len(out) > 2 else ""
+    return {
+        "wall_s": round(statistics.median(walls), 4),
+        "streamlit_import_s": round(statistics.median(imports), 4),
+        "first_run_s": round(statistics.median(first_runs), 4),
+        "heavy_modules_loaded": heavy.split(",") if heavy else [],
+    }
+
+
+def measure_warm(runs: int) -> dict:
+    os.environ.setdefault("DPDP_STATE_BACKEND", "memory")
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - start)
+    return {
+        "p50_s": round(statistics.median(samples), 4),
+        "p95_s": round(percentile(samples, 95), 4),
+        "runs": runs,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cold-runs", type=int, default=5)
+    parser.add_argument("--warm-runs", type=int, default=30)
+    parser.add_argument("--cold-budget", type=float, default=4.0, help="max median cold start (s)")
+    parser.add_argument("--warm-budget", type=float, default=0.5, help="max median warm rerun (s)")
+    args = parser.parse_args(argv)
+
+    result = {
+        "cold_start": measure_cold(args.cold_runs),
+        "warm_rerun": measure_warm(args.warm_runs),
+        "budget": {"cold_start_s": args.cold_budget, "warm_rerun_s": args.warm_budget},
+    }
+    over = []
+    if result["cold_start"]["wall_s"] > args.cold_budget:
+        over.append("cold_start")
+    if result["warm_rerun"]["p50_s"] > args.warm_budget:
+        over.append("warm_rerun")
+    result["over_budget"] = over
+    print(json.dumps(result, indent=2))
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
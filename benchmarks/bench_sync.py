@@ -0,0 +1,117 @@
+"""
+Concurrent-editing benchmark for the DPDP audit tool.
+
+Simulates N auditors working one engagement against a shared SQLite store,
+as the sessions of one server process do. Each auditor keeps its own
+ProgressTracker (the session's view), toggles random sections and polls
+``changes_since`` on the live-sync interval. Reports poll and write latency
+and checks that every auditor converged on the store's merged state.
+
+    python benchmarks/bench_sync.py [--auditors 50] [--seconds 10]
+                                    [--poll 2] [--toggle-rate 0.5] [-o results.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dpdp_catalogue import load_catalogue  # noqa: E402
+from dpdp_progress import ProgressTracker  # noqa: E402
+from dpdp_store import SQLiteStore  # noqa: E402
+
+ENGAGEMENT = "bench"
+
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "n": 0}
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {"p50_ms": round(statistics.median(ordered) * 1000, 3), "p95_ms": round(p95 * 1000, 3), "n": len(ordered)}
+
+
+def auditor(n: int, store, catalogue, deadline: float, poll: float, toggle_rate: float, out: dict):
+    rng = random.Random(n)
+    seq = store.head_seq(ENGAGEMENT)
+    progress = ProgressTracker(catalogue, store.load(ENGAGEMENT))
+    polls, writes = [], []
+    next_poll = time.monotonic() + rng.uniform(0, poll)
+    while time.monotonic() < deadline:
+        # Think time between clicks; toggle_rate is clicks per second.
+        time.sleep(rng.expovariate(toggle_rate) if toggle_rate else poll)
+        if toggle_rate:
+            key = rng.choice(catalogue.keys)
+            start = time.perf_counter()
+            if progress.set(key, not progress.get(key)):
+                store.write(ENGAGEMENT, {key: progress.get(key)}, actor=f"auditor-{n}")
+            writes.append(time.perf_counter() - start)
+        if time.monotonic() >= next_poll:
+            start = time.perf_counter()
+            seq, changes = store.changes_since(ENGAGEMENT, seq)
+            progress.set_many(changes)
+            polls.append(time.perf_counter() - start)
+            next_poll += poll
+    out[n] = {"polls": polls, "writes": writes, "seq": seq, "progress": progress}
+
+
+def run(auditors: int, seconds: float, poll: float, toggle_rate: float) -> dict:
+    catalogue = load_catalogue()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(os.path.join(tmp, "sync.db"))
+        results, deadline = {}, time.monotonic() + seconds
+        threads = [threading.Thread(target=auditor, args=(n, store, catalogue, deadline, poll, toggle_rate, results))
+                   for n in range(auditors)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # One final poll each, as the next live-sync tick would do.
+        final = store.load(ENGAGEMENT)
+        converged = 0
+        for r in results.values():
+            r["progress"].set_many(store.changes_since(ENGAGEMENT, r["seq"])[1])
+            converged += all(r["progress"].get(key) == value for key, value in final.items())
+        events = store.head_seq(ENGAGEMENT)
+        store.close()
+
+    return {
+        "auditors": auditors,
+        "seconds": seconds,
+        "poll_interval_s": poll,
+        "events": events,
+        "poll": percentiles([s for r in results.values() for s in r["polls"]]),
+        "write": percentiles([s for r in results.values() for s in r["writes"]]),
+        "converged": converged,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent multi-auditor editing benchmark.")
+    parser.add_argument("--auditors", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--poll", type=float, default=2.0, help="live-sync interval in seconds")
+    parser.add_argument("--toggle-rate", type=float, default=0.5, help="clicks per second per auditor")
+    parser.add_argument("-o", "--out", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args.auditors, args.seconds, args.poll, args.toggle_rate)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return 0 if report["converged"] == report["auditors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
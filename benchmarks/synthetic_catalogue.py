@@ -0,0 +1,58 @@
+"""
+Synthetic catalogue generator for benchmarks.
+
+Scales the bundled DPDP Act catalogue from 44 sections to any size by
+cycling its real sections (so text lengths, step counts and the risk mix
+stay realistic) across proportionally more chapters.
+
+    python benchmarks/synthetic_catalogue.py 10000 -o /tmp/catalogue_10k.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dpdp_catalogue import load_catalogue  # noqa: E402
+
+SECTIONS_PER_CHAPTER = 250
+
+
+def generate(n_sections: int, n_chapters: int = None) -> dict:
+    base = load_catalogue()
+    n_chapters = n_chapters or max(len(base.chapters), -(-n_sections // SECTIONS_PER_CHAPTER))
+    n_chapters = min(n_chapters, n_sections)
+    per_chapter, extra = divmod(n_sections, n_chapters)
+
+    chapters, i = [], 0
+    for c in range(n_chapters):
+        sections = []
+        for _ in range(per_chapter + (1 if c < extra else 0)):
+            src = base.sections[i % len(base.sections)]
+            i += 1
+            sections.append({
+                "num": str(i),
+                "title": f"{src['title']} ({i})",
+                "risk": src["risk"],
+                "desc": src["desc"],
+                "steps": list(src["steps"]),
+            })
+        chapters.append({"id": f"ch{c + 1}", "title": f"Chapter {c + 1} — Synthetic controls", "sections": sections})
+    return {"name": f"Synthetic {n_sections}", "version": f"synthetic-{n_sections}", "chapters": chapters}
+
+
+def write(n_sections: int, path: str, n_chapters: int = None) -> str:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(generate(n_sections, n_chapters), fh, ensure_ascii=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic catalogue of N sections.")
+    parser.add_argument("sections", type=int)
+    parser.add_argument("-o", "--out", required=True)
+    parser.add_argument("--chapters", type=int, default=None)
+    args = parser.parse_args()
+    print(write(args.sections, args.out, args.chapters))
@@ -0,0 +1,494 @@
+"""
+Evidence analysis for the DPDP audit tool.
+
+Reads the text of attached evidence and matches it against keywords drawn
+from each section's ``desc`` and ``steps``, so an auditor opening a section
+sees which audit steps its evidence appears to cover (a suggested pass) and
+which it never mentions (a possible gap). Suggestions are hints next to the
+step controls; they never change a step's status.
+
+Analysis runs per blob, not per attachment: a policy attached to forty
+entities is read once. A blob's result is the set of catalogue terms found
+in it, kept in the evidence index (``evidence_terms``) under ANALYSER_VERSION
+and the catalogue digest, so either changing re-queues every blob.
+
+The pipeline is an asyncio loop on a background thread. A feeder takes the
+linked blobs with no result from the index and puts them on a queue of
+QUEUE_SIZE; ``workers`` coroutines take from it and extract text on a
+thread pool of the same size. When the workers fall behind, the feeder
+waits on the full queue; the backlog behind it is only digests, and no
+more than ``workers`` files are open at once, so hundreds of files cost
+the same memory as a few. Reruns never wait on the pipeline: the UI reads
+whatever results exist and shows progress.
+
+Text extraction is standard library only and streams each file:
+
+    .txt .md .csv .json .html .xml …   decoded incrementally, tags dropped
+    .docx .xlsx .pptx .odt …           the XML parts of the zip, streamed
+    .pdf                               Tj/TJ strings from (deflated) content
+                                       streams; best effort — scanned PDFs
+                                       and custom font encodings yield nothing
+
+Only words in the catalogue vocabulary are kept, so a file's footprint is
+bounded by the catalogue, not by the file.
+
+    python dpdp_analysis.py [--workers N] [--root DIR]   (analyse the backlog)
+"""
+
+import argparse
+import asyncio
+import codecs
+import functools
+import html
+import logging
+import re
+import sys
+import threading
+import time
+import zipfile
+import zlib
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from dpdp_catalogue import Catalogue, load_catalogue, step_key
+from dpdp_evidence import CHUNK_SIZE, EvidenceStore, open_evidence_store
+
+ANALYSER_VERSION = "1"
+DEFAULT_WORKERS = 4
+QUEUE_SIZE = 32
+RESCAN_INTERVAL = 30.0         # seconds between backlog checks when nothing wakes the feeder
+PASS_COVERAGE = 0.6            # share of a step's keywords the evidence must mention
+MAX_TEXT_CHARS = 32 << 20      # stop reading a document after this much text
+MAX_PDF_BYTES = 64 << 20       # PDFs are parsed whole; larger ones only up to here
+STEM_LENGTH = 6
+COMMON_SHARE = 0.25            # terms in more sections than this say nothing about any one
+
+log = logging.getLogger(__name__)
+
+PASS, GAP = "pass", "gap"
+READABLE = ("ok",)             # other statuses: empty, unsupported, error
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9]+")
+TAG_RE = re.compile(r"<(/?)([\w:.-]*)[^>]*>")
+# Tags that end a word; all others (a Word run, <b>) can split one.
+BREAK_TAGS = frozenset({"w:p", "w:tab", "w:br", "w:tc", "a:p", "a:br", "text:p", "text:h", "text:tab",
+                        "table:table-cell", "si", "c", "row", "p", "br", "div", "td", "th", "tr", "li",
+                        "h1", "h2", "h3", "h4", "h5", "h6"})
+TEXT_EXTS = frozenset({".txt", ".md", ".csv", ".tsv", ".json", ".log", ".rtf", ".yaml", ".yml"})
+MARKUP_EXTS = frozenset({".html", ".htm", ".xml", ".xhtml", ".svg"})
+OFFICE_PART_RE = re.compile(r"(word/(document|header\d*|footer\d*|footnotes)|xl/sharedStrings|xl/worksheets/sheet\d+"
+                            r"|ppt/slides/slide\d+|content)\.xml")
+PDF_STREAM_RE = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+PDF_TEXT_RE = re.compile(rb"\[((?:\\.|[^\]\\])*)\]\s*TJ|(\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>)\s*(?:Tj|'|\")")
+PDF_STRING_RE = re.compile(rb"\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>")
+PDF_ESCAPE_RE = re.compile(rb"\\([0-7]{1,3}|.)", re.S)
+PDF_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+STOPWORDS = frozenset("""
+    about across after against all also and any are been being both but can each either every for from has have
+    including include includes into its may must not only other such than that the their them there these they this
+    those through under upon was were what when where whether which while who will with within without
+""".split())
+# Audit verbs say what to do, not what the evidence should be about.
+AUDIT_WORDS = frozenset("""
+    assess audit check confirm determine document ensure evaluate examine exist exists identify inspect obtain
+    perform review test validate verify
+""".split())
+
+Suggestion = namedtuple("Suggestion", "flag coverage matched missing")
+# ``pending``: files not analysed yet; ``unreadable``: no text could be read;
+# ``relevance``: share of the section's desc keywords the evidence mentions.
+Review = namedtuple("Review", "pending analysed unreadable relevance steps")
+Progress = namedtuple("Progress", "done failed total active")
+
+
+def stem(token: str) -> str:
+    """Crude but stable: drop a plural ``s`` and truncate, so breach/breaches/breached meet."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = token[:-1]
+    return token[:STEM_LENGTH]
+
+
+# ─── KEYWORDS ────────────────────────────────────────────────────
+class Keywords:
+    def __init__(self, catalogue: Catalogue):
+        self.desc = {}    # section key -> stems of its description
+        self.steps = {}   # step key -> stems of the step text
+        self.word = {}    # stem -> the first catalogue word it came from, for display
+        spread = Counter()
+        for sec in catalogue.sections:
+            desc = self.desc[sec["key"]] = self._stems(sec["desc"])
+            steps = [self._stems(text) for text in sec["steps"]]
+            for n, stems in enumerate(steps, 1):
+                self.steps[step_key(sec["key"], n)] = stems
+            spread.update(desc.union(*steps))
+        # "data", "personal", "processing" appear throughout the Act.
+        common = {s for s, n in spread.items() if n > COMMON_SHARE * len(catalogue.sections)}
+        self.desc = {key: stems - common for key, stems in self.desc.items()}
+        self.steps = {key: stems - common for key, stems in self.steps.items()}
+        self.vocab = frozenset(self.word.keys() - common)
+
+    def _stems(self, text: str) -> frozenset:
+        stems = set()
+        for token in TOKEN_RE.findall(text.lower()):
+            if len(token) < 3 or token in STOPWORDS or token in AUDIT_WORDS:
+                continue
+            s = stem(token)
+            self.word.setdefault(s, token)
+            stems.add(s)
+        return frozenset(stems)
+
+    def words(self, stems) -> list:
+        return sorted(self.word[s] for s in stems)
+
+
+@functools.lru_cache(maxsize=4)
+def get_keywords(catalogue: Catalogue) -> Keywords:
+    return Keywords(catalogue)
+
+
+def review(keywords: Keywords, sec: dict, links: list, analyses: dict) -> Review:
+    """Suggest a pass or gap for each step of ``sec`` from the evidence linked to it.
+
+    Evidence on the section counts for every step; evidence on a step only
+    for that step.
+    """
+    pending = unreadable = analysed = 0
+    found = {}   # target -> terms found in its evidence
+    for link in links:
+        result = analyses.get(link.digest)
+        if result is None:
+            pending += 1
+            continue
+        status, terms = result
+        if status not in READABLE:
+            unreadable += 1
+            continue
+        analysed += 1
+        found[link.target] = found.get(link.target, frozenset()) | terms
+    if not found:
+        return Review(pending, analysed, unreadable, None, {})
+
+    on_section = found.get(sec["key"], frozenset())
+    everything = frozenset().union(*found.values())
+    desc = keywords.desc[sec["key"]]
+    relevance = len(desc & everything) / len(desc) if desc else None
+    steps = {}
+    for n in range(1, len(sec["steps"]) + 1):
+        skey = step_key(sec["key"], n)
+        if sec["key"] not in found and skey not in found:
+            continue
+        wanted = keywords.steps[skey]
+        if not wanted:
+            continue
+        matched = wanted & (on_section | found.get(skey, frozenset()))
+        coverage = len(matched) / len(wanted)
+        steps[skey] = Suggestion(PASS if coverage >= PASS_COVERAGE else GAP, coverage,
+                                 keywords.words(matched), keywords.words(wanted - matched))
+    return Review(pending, analysed, unreadable, relevance, steps)
+
+
+# ─── EXTRACTION ──────────────────────────────────────────────────
+class TermScanner:
+    """Collect the vocabulary terms in a stream of text chunks."""
+
+    def __init__(self, vocab: frozenset, markup: bool = False):
+        self.vocab = vocab
+        self.markup = markup
+        self.found = set()
+        self.chars = 0
+        self.words = 0
+        self._tail = ""
+
+    @property
+    def full(self) -> bool:
+        return self.chars >= MAX_TEXT_CHARS or len(self.found) == len(self.vocab)
+
+    def feed(self, text: str):
+        text = self._tail + text
+        # Hold back a word (or tag) the next chunk may continue.
+        cut = len(text)
+        while cut and text[cut - 1].isalnum():
+            cut -= 1
+        if self.markup:
+            lt = text.rfind("<", 0, cut)
+            if lt > text.rfind(">", 0, cut):
+                cut = lt
+        if len(text) - cut > CHUNK_SIZE:
+            cut = len(text)   # no break in sight; don't hold back without bound
+        self._tail = text[cut:]
+        self._scan(text[:cut])
+
+    def close(self) -> set:
+        self._scan(self._tail)
+        self._tail = ""
+        return self.found
+
+    def _scan(self, text: str):
+        if self.markup:
+            text = html.unescape(TAG_RE.sub(lambda m: " " if m.group(2).lower() in BREAK_TAGS else "", text))
+        self.chars += len(text)
+        vocab, found = self.vocab, self.found
+        tokens = TOKEN_RE.findall(text.lower())
+        self.words += len(tokens)
+        for token in tokens:
+            s = stem(token)
+            if s in vocab:
+                found.add(s)
+
+
+def _feed_binary(scanner: TermScanner, fh):
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+        scanner.feed(decoder.decode(chunk))
+        if scanner.full:
+            return
+    scanner.feed(decoder.decode(b"", final=True))
+
+
+def _pdf_string(token: bytes) -> str:
+    if token.startswith(b"<"):
+        digits = "".join(chr(c) for c in token[1:-1] if chr(c) in "0123456789abcdefABCDEF")
+        # An odd final digit stands for its high nibble (the spec pads it with 0).
+        raw = bytes.fromhex(digits + "0" * (len(digits) % 2))
+        if raw.startswith(b"\xfe\xff"):
+            return raw[2:].decode("utf-16-be", "replace")
+        return raw.decode("latin-1")
+    raw = PDF_ESCAPE_RE.sub(lambda m: PDF_ESCAPES.get(m.group(1), bytes([int(m.group(1), 8) & 0xFF])
+                                                       if m.group(1)[:1].isdigit() else m.group(1)), token[1:-1])
+    return raw.decode("latin-1")
+
+
+def _pdf_text(content: bytes):
+    for m in PDF_TEXT_RE.finditer(content):
+        if m.group(1) is not None:
+            # TJ: one word can be split into pieces for kerning.
+            yield "".join(_pdf_string(s) for s in PDF_STRING_RE.findall(m.group(1))) + " "
+        else:
+            yield _pdf_string(m.group(2)) + " "
+
+
+def _stream_pieces(raw: bytes):
+    # Inflate CHUNK_SIZE bytes at a time and at most MAX_TEXT_CHARS per
+    # stream, so a small deflate bomb never expands in memory. A stream that
+    # is not deflated is yielded as it is.
+    inflater = zlib.decompressobj()
+    budget = MAX_TEXT_CHARS
+    try:
+        piece = inflater.decompress(raw, CHUNK_SIZE)
+    except zlib.error:
+        yield raw
+        return
+    try:
+        while piece:
+            yield piece
+            budget -= len(piece)
+            if budget <= 0:
+                return
+            piece = inflater.decompress(inflater.unconsumed_tail, min(CHUNK_SIZE, budget))
+    except zlib.error:
+        return   # truncated or corrupt: keep what was read
+
+
+def _scan_pdf(scanner: TermScanner, fh):
+    data = fh.read(MAX_PDF_BYTES)
+    for m in PDF_STREAM_RE.finditer(data):
+        carry = b""
+        for n, piece in enumerate(_stream_pieces(m.group(1))):
+            if n == 0 and b"BT" not in piece:
+                break   # images, fonts, metadata
+            content = carry + piece
+            # A text object can straddle pieces: hold back what follows the last ET.
+            cut = content.rfind(b"ET") + 2 if b"ET" in content else 0
+            carry = content[cut:] if len(content) - cut <= CHUNK_SIZE else b""
+            scanner.feed("".join(_pdf_text(content[:cut])))
+            if scanner.full:
+                return
+        scanner.feed("".join(_pdf_text(carry)))
+
+
+def _scan_zip(scanner: TermScanner, fh) -> bool:
+    with zipfile.ZipFile(fh) as zf:
+        parts = [name for name in zf.namelist() if OFFICE_PART_RE.fullmatch(name)]
+        for name in parts:
+            with zf.open(name) as part:
+                _feed_binary(scanner, part)
+                scanner.feed(" ")
+            if scanner.full:
+                break
+    return bool(parts)
+
+
+def _looks_textual(head: bytes) -> bool:
+    return b"\0" not in head and head.decode("utf-8", "replace").count("�") <= len(head) // 100
+
+
+def extract_terms(path: str, name: str, vocab: frozenset) -> tuple:
+    """Return (status, set of vocabulary stems) for the file at ``path`` named ``name``."""
+    ext = ("." + name.rsplit(".", 1)[-1].lower()) if "." in name else ""
+    with open(path, "rb") as fh:
+        head = fh.read(4096)
+        fh.seek(0)
+        if head.startswith(b"%PDF"):
+            scanner = TermScanner(vocab)
+            _scan_pdf(scanner, fh)
+        elif head.startswith(b"PK\x03\x04"):
+            scanner = TermScanner(vocab, markup=True)
+            if not _scan_zip(scanner, fh):
+                return "unsupported", set()
+        elif ext in MARKUP_EXTS or ext in TEXT_EXTS or _looks_textual(head):
+            scanner = TermScanner(vocab, markup=ext in MARKUP_EXTS or head.lstrip()[:1] == b"<")
+            _feed_binary(scanner, fh)
+        else:
+            return "unsupported", set()
+    terms = scanner.close()
+    return ("ok" if scanner.words else "empty"), terms
+
+
+# ─── PIPELINE ────────────────────────────────────────────────────
+class AnalysisPipeline:
+    def __init__(self, store: EvidenceStore, catalogue: Catalogue, workers: int = DEFAULT_WORKERS,
+                 queue_size: int = QUEUE_SIZE):
+        if workers < 1:
+            raise ValueError("The pipeline needs at least one worker")
+        self.store = store
+        self.keywords = get_keywords(catalogue)
+        self.version = f"{ANALYSER_VERSION}:{catalogue.digest[:16]}"
+        self.workers = workers
+        self.queue_size = queue_size
+        self.on_progress = None   # called with a Progress after each file, on the loop thread
+        self.completed = 0        # files analysed since start; only grows
+        self._inflight = set()    # digests queued or being analysed
+        self._done = self._failed = self._total = self._active = 0   # the current batch
+        self._lock = threading.Lock()
+        self._loop = None
+        self._wake = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    # ── Control (any thread) ──
+    def start(self):
+        """Run the pipeline on a daemon thread until the process exits."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), name="dpdp-analysis", daemon=True)
+            self._thread.start()
+            self._ready.wait()
+        return self
+
+    def wake(self):
+        """Look for new evidence now rather than at the next rescan."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def progress(self) -> Progress:
+        with self._lock:
+            return Progress(self._done, self._failed, self._total, self._active)
+
+    @property
+    def busy(self) -> bool:
+        with self._lock:
+            return bool(self._inflight)
+
+    def results(self, digests) -> dict:
+        return self.store.analyses(digests, self.version)
+
+    def review(self, sec: dict, links: list) -> Review:
+        return review(self.keywords, sec, links, self.results(link.digest for link in links))
+
+    # ── Loop ──
+    async def run(self, until_idle: bool = False):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._ready.set()
+        queue = asyncio.Queue(self.queue_size)
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="dpdp-analysis") as pool:
+            tasks = [asyncio.create_task(self._worker(queue, pool)) for _ in range(self.workers)]
+            try:
+                while True:
+                    self._wake.clear()
+                    fed = await self._feed(queue)
+                    if until_idle:
+                        await queue.join()
+                        if not fed:
+                            return
+                        continue
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), RESCAN_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _feed(self, queue: asyncio.Queue) -> int:
+        backlog = [(digest, name) for digest, name in self.store.unanalysed(self.version)
+                   if digest not in self._inflight]
+        if not backlog:
+            return 0
+        with self._lock:
+            if not self._inflight:
+                self._done = self._failed = self._total = 0   # a new batch
+            self._total += len(backlog)
+            self._inflight.update(digest for digest, _ in backlog)
+        for item in backlog:
+            await queue.put(item)   # waits here while the workers are behind
+        return len(backlog)
+
+    async def _worker(self, queue: asyncio.Queue, pool: ThreadPoolExecutor):
+        loop = asyncio.get_running_loop()
+        while True:
+            digest, name = await queue.get()
+            with self._lock:
+                self._active += 1
+            ok = False
+            try:
+                ok = await loop.run_in_executor(pool, self._analyse, digest, name)
+            except Exception:
+                # Recording the result failed (a locked index, say). Nothing was
+                # stored, so the blob comes back with the next rescan.
+                log.exception("Evidence analysis failed for %s", digest.hex())
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._inflight.discard(digest)
+                    self._done += 1
+                    self._failed += not ok
+                    self.completed += 1
+                    progress = Progress(self._done, self._failed, self._total, self._active)
+                queue.task_done()
+            if self.on_progress is not None:
+                self.on_progress(progress)
+
+    def _analyse(self, digest: bytes, name: str) -> bool:
+        try:
+            status, terms = extract_terms(self.store.blob_path(digest), name, self.keywords.vocab)
+        except Exception:   # a malformed file must not stop the pipeline
+            status, terms = "error", ()
+        self.store.record_analysis(digest, self.version, status, terms)
+        return status != "error"
+
+
+# ─── CLI ─────────────────────────────────────────────────────────
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Analyse attached evidence that has no result yet.")
+    parser.add_argument("--root", default=None, help="evidence store (default: $DPDP_EVIDENCE_DIR or dpdp_evidence)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    store = open_evidence_store(args.root)
+    pipeline = AnalysisPipeline(store, load_catalogue(), workers=args.workers)
+    pipeline.on_progress = lambda p: print(f"\r{p.done}/{p.total} files analysed ({p.failed} failed)",
+                                           end="", file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    try:
+        asyncio.run(pipeline.run(until_idle=True))
+    finally:
+        store.close()
+    p = pipeline.progress()
+    print(f"\n{p.done} files analysed in {time.perf_counter() - start:.1f}s; {p.failed} failed", file=sys.stderr)
+    return 1 if p.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
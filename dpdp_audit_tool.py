@@ -5,11 +5,45 @@
 ║   All 44 Sections | 9 Chapters | Audit Procedures + Checklists  ║
 ╚══════════════════════════════════════════════════════════════════╝
 
-Run:  streamlit run dpdp_audit_tool.py
+Run:    streamlit run dpdp_audit_tool.py
+Batch:  python dpdp_batch.py STATUS_DIR -o REPORT_DIR   (headless, no UI)
+Import: python dpdp_import.py TRACKER.csv|.xlsx [--apply] (pre-fill status)
+Replicas: DPDP_STATE_DB=/srv/dpdp/state.db streamlit run dpdp_audit_tool.py --server.port 850N
+          (any number of identical processes on one shared store, behind a proxy)
+Evidence: python dpdp_evidence.py ingest DIR             (bulk attachments)
+          python dpdp_analysis.py                      (analyse evidence backlog)
+          DPDP_EVIDENCE_PORT=8601 DPDP_EVIDENCE_URL=https://audit.example/files streamlit run dpdp_audit_tool.py
+          (downloads streamed from a local port the proxy routes to; replicas share DPDP_EVIDENCE_SECRET)
+Memory: DPDP_SESSION_IDLE=900 DPDP_SESSION_MEMORY_MB=256 streamlit run dpdp_audit_tool.py
+        (idle tabs spill their state to DPDP_SESSION_DIR and resume on the next click)
+
+The checklist catalogue is loaded from catalogue/dpdp_act_2023.json
+(override with DPDP_CATALOGUE=path/to/catalogue.json).
 """
 
+import functools
+import os
+import secrets
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
 import streamlit as st
-from datetime import datetime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from dpdp_catalogue import RISK_LEVELS, load_catalogue, step_key
+from dpdp_analysis import PASS, AnalysisPipeline
+from dpdp_codec import bit_layout, from_token, to_token
+from dpdp_evidence import format_size, open_evidence_store, serve_downloads, sign_download
+from dpdp_metrics import NULL_PROFILE, RunProfile, instrument_context, metrics, serve_metrics, state_size
+from dpdp_planner import DEADLINE, DEFAULT_AUDITORS, RemediationPlan
+from dpdp_progress import ProgressTracker
+from dpdp_report import EXPORT_FORMATS, export_cache
+from dpdp_search import get_index
+from dpdp_sessions import open_session_manager
+from dpdp_steps import FAIL, STATUS_LABELS, UNTOUCHED, StepTracker
+from dpdp_store import DEFAULT_ENGAGEMENT, open_store
+from dpdp_theme import css_block, logo_html, section_body_html, summary_table_html
 
 # ─── PAGE CONFIG ─────────────────────────────────────────────────
 st.set_page_config(
@@ -19,758 +53,938 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
-# ─── CUSTOM CSS ──────────────────────────────────────────────────
-CUSTOM_CSS = """
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Playfair+Display:wght@600;700&family=DM+Sans:wght@400;500;600&display=swap');
-
-    :root {
-        --navy: #0f1b2d;
-        --navy-mid: #1a2e4a;
-        --saffron: #f59e0b;
-        --green: #10b981;
-        --green-light: #d1fae5;
-        --red: #ef4444;
-        --cream: #f8f7f2;
-    }
-
-    /* Full-page background */
-    .stApp { background-color: var(--cream); font-family: 'DM Sans', sans-serif; }
-
-    /* Header banner */
-    .dpdp-header {
-        background: linear-gradient(135deg, #0f1b2d 0%, #1a2e4a 60%, #243b5e 100%);
-        border-radius: 0 0 16px 16px;
-        padding: 28px 36px;
-        display: flex;
-        align-items: center;
-        gap: 20px;
-        box-shadow: 0 4px 20px rgba(0,0,0,0.25);
-        margin: -16px -16px 24px -16px;
-    }
-
-    .dpdp-header .logo-circle {
-        width: 64px; height: 64px;
-        background: rgba(245,158,11,0.15);
-        border: 2.5px solid #f59e0b;
-        border-radius: 50%;
-        display: flex; align-items: center; justify-content: center;
-        font-size: 1.8rem; flex-shrink: 0;
-    }
-
-    .dpdp-header h1 {
-        font-family: 'Playfair Display', serif;
-        color: #fff; font-size: 1.7rem; margin: 0;
-    }
-
-    .dpdp-header .sub { color: #fcd34d; font-size: 0.72rem; text-transform: uppercase; letter-spacing: 2.5px; margin-top: 4px; }
-
-    /* Chapter card */
-    .ch-card {
-        background: #fff;
-        border-radius: 12px;
-        border: 1.5px solid #e2e8f0;
-        margin-bottom: 12px;
-        box-shadow: 0 2px 10px rgba(15,27,45,0.06);
-        overflow: hidden;
-    }
-
-    .ch-card-header {
-        background: #fafafa;
-        padding: 14px 20px;
-        display: flex; align-items: center; gap: 14px;
-        border-bottom: 1.5px solid #e2e8f0;
-        cursor: pointer;
-    }
-
-    .ch-card-header:hover { background: #f0f4f8; }
-
-    .ch-badge {
-        background: var(--navy);
-        color: #fff;
-        font-size: 0.68rem; font-weight: 600;
-        padding: 3px 10px; border-radius: 12px;
-        white-space: nowrap;
-    }
-
-    .ch-card-header h3 { font-family: 'Playfair Display', serif; margin: 0; font-size: 1rem; color: #1e293b; }
-    .ch-card-header .ch-sub { font-size: 0.72rem; color: #94a3b8; margin-top: 2px; }
-
-    /* Section detail box */
-    .sec-detail-box {
-        background: #f8fafc;
-        border: 1px solid #eef1f5;
-        border-radius: 8px;
-        padding: 14px 18px;
-        margin-top: 8px;
-    }
-
-    .sec-detail-box .det-label {
-        font-size: 0.68rem; font-weight: 600;
-        text-transform: uppercase; letter-spacing: 1.2px;
-        color: var(--saffron); margin-bottom: 6px; margin-top: 12px;
-    }
-    .sec-detail-box .det-label:first-child { margin-top: 0; }
-
-    .sec-detail-box .det-text { font-size: 0.8rem; color: #475569; line-height: 1.65; }
-
-    .audit-step-row { display: flex; gap: 10px; align-items: flex-start; margin-bottom: 8px; }
-    .audit-step-row .step-circle {
-        background: var(--navy); color: #fff;
-        width: 24px; height: 24px; border-radius: 50%;
-        display: flex; align-items: center; justify-content: center;
-        font-size: 0.7rem; font-weight: 700; flex-shrink: 0;
-    }
-    .audit-step-row .step-text { font-size: 0.79rem; color: #475569; line-height: 1.55; padding-top: 4px; }
-
-    .risk-high { color: #ef4444; background: #fee2e2; padding: 2px 8px; border-radius: 10px; font-size: 0.68rem; font-weight: 600; }
-    .risk-medium { color: #b45309; background: #fef3c7; padding: 2px 8px; border-radius: 10px; font-size: 0.68rem; font-weight: 600; }
-    .risk-low { color: #047857; background: #d1fae5; padding: 2px 8px; border-radius: 10px; font-size: 0.68rem; font-weight: 600; }
-
-    /* Progress bar override */
-    .stProgress .st-ca { background-color: var(--green) !important; }
-
-    /* Footer */
-    .dpdp-footer {
-        background: var(--navy);
-        border-radius: 12px;
-        padding: 20px 28px;
-        margin-top: 32px;
-        display: flex; justify-content: space-between; align-items: center;
-        flex-wrap: wrap; gap: 12px;
-    }
-    .dpdp-footer .f-left .f-title { color: #fff; font-weight: 600; font-size: 0.82rem; }
-    .dpdp-footer .f-left .f-copy { color: #94a3b8; font-size: 0.68rem; margin-top: 2px; }
-    .dpdp-footer .f-right { color: #94a3b8; font-size: 0.67rem; text-align: right; line-height: 1.6; }
-    .dpdp-footer .f-right span { color: #fcd34d; }
-
-    /* Streamlit widget tweaks */
-    .stCheckbox label { font-size: 0.82rem !important; font-weight: 500; }
-    div[data-testid="stExpander"] { border-radius: 8px; }
-</style>
-"""
-
 # ─── DATA ────────────────────────────────────────────────────────
-CHAPTERS = [
-    {
-        "id": "ch1",
-        "title": "Chapter I — Preliminary",
-        "sections": [
-            {
-                "num": "1", "title": "Short Title and Commencement", "risk": "low",
-                "desc": "Defines the Act's name and provides that it comes into force on dates notified by the Central Government in phases.",
-                "steps": [
-                    "Verify the organisation is aware of the phased enforcement timeline notified by the Central Government.",
-                    "Confirm internal legal/compliance teams have mapped which sections are currently in force vs. upcoming.",
-                    "Cross-reference with the official MeitY Gazette notification dates."
-                ]
-            },
-            {
-                "num": "2", "title": "Definitions", "risk": "medium",
-                "desc": "Establishes key terms: Personal Data, Data Fiduciary, Data Principal, Data Processor, Consent, Legitimate Use, etc.",
-                "steps": [
-                    "Audit whether the organisation's internal data glossary aligns with the Act's statutory definitions.",
-                    "Verify that 'Data Fiduciary' and 'Data Principal' roles are correctly identified across all business units.",
-                    "Check that 'Personal Data' classification is consistently applied in data inventories."
-                ]
-            }
-        ]
-    },
-    {
-        "id": "ch2",
-        "title": "Chapter II — Obligations of Data Fiduciary",
-        "sections": [
-            {
-                "num": "3", "title": "Application of the Act", "risk": "high",
-                "desc": "Defines territorial and extra-territorial scope: applies to digital personal data collected in India or processed outside India for offering goods/services to Indian Data Principals.",
-                "steps": [
-                    "Map all data flows — identify personal data processed within and outside India.",
-                    "Confirm cross-border processing activities are documented and linked to offering goods/services in India.",
-                    "Validate that personal/domestic-use exclusions are correctly applied."
-                ]
-            },
-            {
-                "num": "4", "title": "Processing of Personal Data", "risk": "high",
-                "desc": "Personal data shall be processed only for a lawful purpose for which the Data Principal has given consent or for a Legitimate Use.",
-                "steps": [
-                    "Audit all processing activities against documented lawful purposes.",
-                    "Verify each processing activity has a corresponding valid consent record or a documented legitimate-use basis.",
-                    "Review data processing registers for completeness and accuracy."
-                ]
-            },
-            {
-                "num": "5", "title": "Notice to Data Principal", "risk": "high",
-                "desc": "Before or at the time of collecting consent, the Data Fiduciary must provide a clear, concise notice of what data is collected and for what purpose.",
-                "steps": [
-                    "Review all consent collection touchpoints (web forms, apps, SMS, etc.) for presence of privacy notices.",
-                    "Validate that notices are available in at least one of the 22 scheduled languages.",
-                    "Test notice clarity — ensure a lay user can understand the purpose and scope of data processing."
-                ]
-            },
-            {
-                "num": "6", "title": "Consent", "risk": "high",
-                "desc": "Consent must be free, specific, informed, and unambiguous. It can be withdrawn at any time. Consent for children requires parental/guardian verification.",
-                "steps": [
-                    "Audit consent mechanisms for clarity and granularity (specific, informed, unambiguous).",
-                    "Verify a functional consent-withdrawal mechanism exists and is easily accessible.",
-                    "Check child-data processes — confirm parental/guardian consent verification is in place for users under 18.",
-                    "Review Consent Manager integration if applicable."
-                ]
-            },
-            {
-                "num": "7", "title": "Legitimate Uses", "risk": "medium",
-                "desc": "Lists specific scenarios where personal data may be processed without consent — e.g., employment, medical emergencies, legal compliance, government services.",
-                "steps": [
-                    "Identify all processing activities relying on legitimate-use grounds.",
-                    "Map each legitimate-use claim to the specific enumerated purpose in the Act.",
-                    "Ensure proper documentation exists for each legitimate-use invocation."
-                ]
-            },
-            {
-                "num": "8", "title": "Obligations of Data Fiduciary", "risk": "high",
-                "desc": "Core obligations: ensure accuracy, implement reasonable security measures, notify breaches, and honour Data Principal rights within reasonable timelines.",
-                "steps": [
-                    "Audit data accuracy practices — validate update/correction workflows.",
-                    "Review security controls: encryption, access controls, penetration testing, incident response.",
-                    "Confirm breach notification procedures exist and include reporting to the Data Protection Board.",
-                    "Verify timelines for responding to Data Principal requests are defined and tracked."
-                ]
-            },
-            {
-                "num": "9", "title": "Duty to Erase Personal Data", "risk": "medium",
-                "desc": "Data Fiduciaries must erase personal data when it is no longer needed for the purpose it was collected, or when consent is withdrawn.",
-                "steps": [
-                    "Audit data retention schedules across all systems and databases.",
-                    "Verify automated or manual erasure workflows are operational.",
-                    "Test the erasure mechanism — confirm data is actually deleted (including backups, logs).",
-                    "Cross-check with Data Processors to ensure downstream erasure compliance."
-                ]
-            },
-            {
-                "num": "10", "title": "Significant Data Fiduciary", "risk": "high",
-                "desc": "Central Government may designate certain Data Fiduciaries as 'Significant' based on volume, sensitivity, and risk. Such entities face additional obligations: DPO appointment, data audits, and DPIA.",
-                "steps": [
-                    "Assess whether the organisation meets criteria for Significant Data Fiduciary designation.",
-                    "If designated (or likely), confirm a Data Protection Officer (DPO) based in India is appointed.",
-                    "Verify an independent data audit is conducted periodically.",
-                    "Review whether a Data Protection Impact Assessment (DPIA) has been performed."
-                ]
-            }
-        ]
-    },
-    {
-        "id": "ch3",
-        "title": "Chapter III — Rights & Duties of Data Principal",
-        "sections": [
-            {
-                "num": "11", "title": "Right to Access Information", "risk": "medium",
-                "desc": "Data Principals have the right to obtain a summary of personal data processed, the identities of Data Fiduciaries and Processors, and details of processing activities.",
-                "steps": [
-                    "Verify a mechanism exists for Data Principals to request access to their data.",
-                    "Test the request-to-response workflow end-to-end.",
-                    "Confirm the response includes all mandatory elements: data summary, fiduciary identities, processing details."
-                ]
-            },
-            {
-                "num": "12", "title": "Right to Correction and Erasure", "risk": "medium",
-                "desc": "Data Principals may request correction of inaccurate or incomplete personal data and erasure of their data, subject to legal retention requirements.",
-                "steps": [
-                    "Audit the correction-request workflow for completeness.",
-                    "Verify erasure requests are actioned within a reasonable timeframe.",
-                    "Ensure legal-hold and retention exceptions are properly documented and communicated."
-                ]
-            },
-            {
-                "num": "13", "title": "Right to Nominate", "risk": "low",
-                "desc": "A Data Principal may nominate another individual to exercise their rights in case of death or incapacity.",
-                "steps": [
-                    "Check whether a nomination mechanism is available within the organisation's data services.",
-                    "Verify the nomination process is documented and legally sound.",
-                    "Confirm the nominated person can actually exercise rights upon the triggering event."
-                ]
-            },
-            {
-                "num": "14", "title": "Grievance Redressal", "risk": "medium",
-                "desc": "Data Fiduciaries must provide an accessible grievance redressal mechanism. Data Principals must exhaust this before approaching the Data Protection Board.",
-                "steps": [
-                    "Audit the grievance redressal portal/process for accessibility and responsiveness.",
-                    "Verify response timelines are defined and met.",
-                    "Check that the mechanism is prominently displayed in all privacy notices and communications."
-                ]
-            },
-            {
-                "num": "15", "title": "Duties of Data Principal", "risk": "low",
-                "desc": "Data Principals must not supply false or fabricated personal data, and must not impersonate another person when giving consent.",
-                "steps": [
-                    "Review terms-of-service and onboarding flows to ensure these duties are clearly communicated.",
-                    "Confirm that fraud-detection measures are in place for identity verification at consent stage."
-                ]
-            }
-        ]
-    },
-    {
-        "id": "ch4",
-        "title": "Chapter IV — Special Provisions",
-        "sections": [
-            {
-                "num": "16", "title": "Processing of Children's Personal Data", "risk": "high",
-                "desc": "Children (under 18) require verifiable parental/guardian consent. Central Government may exempt certain Data Fiduciaries if they demonstrate adequate safeguards for children's data.",
-                "steps": [
-                    "Map all services or products accessible to users under 18.",
-                    "Verify age-verification mechanisms are in place before data collection.",
-                    "Confirm parental/guardian consent workflows are robust and verifiable.",
-                    "Document any exemption application if applicable."
-                ]
-            },
-            {
-                "num": "17", "title": "Exemptions", "risk": "medium",
-                "desc": "Certain processing activities are exempt from Act obligations — including national security, public order, research, and startup exemptions notified by the Central Government.",
-                "steps": [
-                    "Identify any processing activities that may qualify for an exemption.",
-                    "Confirm the exemption has been formally notified by the Central Government.",
-                    "Document the basis for claiming each exemption and maintain audit trail."
-                ]
-            }
-        ]
-    },
-    {
-        "id": "ch5",
-        "title": "Chapter V — Data Protection Board of India",
-        "sections": [
-            {
-                "num": "18", "title": "Establishment of the Board", "risk": "low",
-                "desc": "Establishes the Data Protection Board of India as the statutory adjudicatory body for resolving disputes related to personal data breaches and Act violations.",
-                "steps": [
-                    "Confirm internal awareness of the Board's existence and its role.",
-                    "Ensure the organisation's breach notification procedures include reporting to the Board.",
-                    "Monitor Board notifications and guidance for compliance updates."
-                ]
-            },
-            {
-                "num": "19", "title": "Composition of the Board", "risk": "low",
-                "desc": "The Board comprises a Chairperson and members appointed by the Central Government; tenure is two years with possibility of reappointment.",
-                "steps": ["No direct organisational obligation — monitor for any changes in Board composition that affect regulatory stance."]
-            },
-            {
-                "num": "20", "title": "Qualification and Conditions of Service", "risk": "low",
-                "desc": "Prescribes qualifications, service conditions, and removal grounds for Board members.",
-                "steps": ["No direct organisational obligation — track for governance changes."]
-            },
-            {
-                "num": "21", "title": "Meetings of the Board", "risk": "low",
-                "desc": "Governs how and when the Board meets and conducts its proceedings.",
-                "steps": ["No direct organisational obligation — monitor Board meeting outcomes for compliance implications."]
-            },
-            {
-                "num": "22", "title": "Powers and Duties of the Board", "risk": "medium",
-                "desc": "The Board can investigate complaints, summon information, inspect records, and direct remedial/mitigation measures in case of breaches.",
-                "steps": [
-                    "Ensure the organisation is prepared to respond to Board summons or information requests.",
-                    "Maintain a readiness plan for Board inspections — data access logs, records, and remediation evidence."
-                ]
-            },
-            {
-                "num": "23", "title": "Adjudication of Complaints", "risk": "medium",
-                "desc": "Data Principals may file complaints with the Board only after exhausting the grievance redressal mechanism of the Data Fiduciary.",
-                "steps": [
-                    "Audit the completeness and effectiveness of the internal grievance mechanism to minimise Board escalations.",
-                    "Track any complaints filed with the Board and their outcomes."
-                ]
-            },
-            {
-                "num": "24", "title": "Powers regarding Breach", "risk": "high",
-                "desc": "Upon receipt of a breach intimation, the Board may direct urgent remedial or mitigation measures and investigate the root cause.",
-                "steps": [
-                    "Test the breach notification workflow — simulate a breach scenario end-to-end.",
-                    "Ensure incident response plans include Board communication protocols.",
-                    "Validate that remedial measures can be executed promptly post-breach."
-                ]
-            },
-            {
-                "num": "25", "title": "Voluntary Undertaking", "risk": "low",
-                "desc": "A Data Fiduciary may voluntarily offer an undertaking to the Board to take specific actions; violation of such undertaking triggers penalties.",
-                "steps": [
-                    "Review any voluntary undertakings made to the Board.",
-                    "Monitor compliance with each undertaking term and maintain evidence."
-                ]
-            },
-            {
-                "num": "26", "title": "Penalty Determination", "risk": "high",
-                "desc": "The Board determines penalties based on factors including gravity, repetitiveness, and nature of the breach. Maximum penalty is ₹250 crore.",
-                "steps": [
-                    "Understand the penalty framework and factors that influence quantum.",
-                    "Conduct risk assessment of potential penalty exposure based on current compliance gaps.",
-                    "Prioritise remediation of high-risk areas to minimise penalty exposure."
-                ]
-            }
-        ]
-    },
-    {
-        "id": "ch6",
-        "title": "Chapter VI — Powers & Procedures of the Board",
-        "sections": [
-            {
-                "num": "27", "title": "Powers of the Board", "risk": "medium",
-                "desc": "Detailed powers including directing compliance, ordering data erasure, and imposing interim measures during investigations.",
-                "steps": [
-                    "Ensure the organisation has documented procedures for responding to Board orders.",
-                    "Maintain legal counsel availability for urgent Board interactions."
-                ]
-            },
-            {
-                "num": "28", "title": "Procedure for Adjudication", "risk": "low",
-                "desc": "Prescribes the procedural framework for how the Board hears and decides complaints.",
-                "steps": ["Familiarise internal teams with the Board's adjudication procedure for preparedness."]
-            }
-        ]
-    },
-    {
-        "id": "ch7",
-        "title": "Chapter VII — Appeals & Alternate Dispute Resolution",
-        "sections": [
-            {
-                "num": "29", "title": "Appeals to High Court", "risk": "medium",
-                "desc": "Any person aggrieved by a Board order may appeal to the High Court within the prescribed timeframe.",
-                "steps": [
-                    "Confirm the organisation's legal team tracks all Board orders and assesses appeal viability.",
-                    "Document timelines for appeal filing."
-                ]
-            },
-            {
-                "num": "30", "title": "Alternate Dispute Resolution", "risk": "low",
-                "desc": "The Board may refer disputes to mediation or other ADR mechanisms before formal adjudication.",
-                "steps": [
-                    "Assess whether ADR might be a preferable resolution path for any pending disputes.",
-                    "Include ADR preparedness in the legal team's training."
-                ]
-            }
-        ]
-    },
-    {
-        "id": "ch8",
-        "title": "Chapter VIII — Penalties & Adjudication",
-        "sections": [
-            {
-                "num": "31", "title": "Penalties — Schedule", "risk": "high",
-                "desc": "Prescribes the penalty schedule: up to ₹250 crore for security failures, ₹200 crore for breach non-reporting or children's data violations, ₹50 crore for other non-compliance.",
-                "steps": [
-                    "Map all penalty categories to relevant organisational processes.",
-                    "Conduct a gap analysis to identify which penalty-triggering areas have the highest risk.",
-                    "Prioritise controls for security safeguards, breach reporting, and children's data."
-                ]
-            },
-            {
-                "num": "32", "title": "Adjudication of Penalties", "risk": "medium",
-                "desc": "The Board may impose penalties after giving the Data Fiduciary a reasonable opportunity to be heard.",
-                "steps": [
-                    "Ensure the organisation can present a well-documented defence if a penalty proceeding is initiated.",
-                    "Maintain records of all compliance actions taken as evidence."
-                ]
-            },
-            {
-                "num": "33", "title": "Recovery of Penalties", "risk": "medium",
-                "desc": "Penalties imposed by the Board are recoverable as arrears of land revenue through the prescribed authority.",
-                "steps": [
-                    "Include potential penalty costs in the organisation's financial risk assessment.",
-                    "Engage finance and treasury teams in understanding penalty implications."
-                ]
-            },
-            {
-                "num": "34", "title": "Compensation", "risk": "high",
-                "desc": "Data Principals may seek compensation for harm suffered due to breach of the Act. The Board determines the quantum based on harm, gravity, and circumstances.",
-                "steps": [
-                    "Assess liability exposure for potential compensation claims.",
-                    "Implement measures to minimise harm in case of any breach.",
-                    "Ensure insurance coverage is reviewed with awareness of DPDP compensation provisions."
-                ]
-            }
-        ]
-    },
-    {
-        "id": "ch9",
-        "title": "Chapter IX — Miscellaneous",
-        "sections": [
-            {
-                "num": "35", "title": "Cross-Border Transfer of Personal Data", "risk": "high",
-                "desc": "Data may be transferred abroad unless the Central Government blacklists a specific country. Higher-protection sectoral laws prevail where applicable.",
-                "steps": [
-                    "Map all cross-border data transfers and their destination countries.",
-                    "Monitor the Central Government's blacklisted-country notifications.",
-                    "Verify compliance with any stricter sectoral regulations applicable to specific data transfers."
-                ]
-            },
-            {
-                "num": "36", "title": "Obligations of Data Processor", "risk": "medium",
-                "desc": "Data Processors must process data only as directed by the Data Fiduciary and are bound by the same security and confidentiality obligations.",
-                "steps": [
-                    "Audit all third-party Data Processor contracts for DPDP compliance clauses.",
-                    "Verify Processors implement equivalent security safeguards.",
-                    "Conduct periodic due-diligence assessments of critical Processors."
-                ]
-            },
-            {
-                "num": "37", "title": "Consent Manager", "risk": "medium",
-                "desc": "A Consent Manager is a registered entity that acts as a single point of contact for a Data Principal to manage consent across multiple Data Fiduciaries.",
-                "steps": [
-                    "Assess whether the organisation should integrate with a registered Consent Manager.",
-                    "If applicable, verify the Consent Manager's registration and operational compliance."
-                ]
-            },
-            {
-                "num": "38", "title": "Deemed Consent / Legitimate Use Details", "risk": "medium",
-                "desc": "Provides further operational detail on how Legitimate Uses are documented and applied in practice.",
-                "steps": [
-                    "Ensure all Legitimate Use invocations are documented with specific references to the enumerated grounds.",
-                    "Audit documentation completeness for all non-consent-based processing."
-                ]
-            },
-            {
-                "num": "39", "title": "Liability of Data Fiduciary for Processor Actions", "risk": "high",
-                "desc": "The Data Fiduciary remains liable for the actions of its Data Processors unless the Processor has acted contrary to the Fiduciary's instructions.",
-                "steps": [
-                    "Review all Processor agreements to ensure clear instruction protocols.",
-                    "Implement monitoring mechanisms for Processor compliance.",
-                    "Maintain evidence of instructions given to Processors to establish due diligence."
-                ]
-            },
-            {
-                "num": "40", "title": "Power to Make Rules", "risk": "low",
-                "desc": "Empowers the Central Government to frame rules under the Act — these are the DPDP Rules 2025, which operationalise the Act's provisions.",
-                "steps": [
-                    "Monitor DPDP Rules 2025 notifications for new obligations.",
-                    "Update internal compliance frameworks as new rules come into force."
-                ]
-            },
-            {
-                "num": "41", "title": "Laying of Rules Before Parliament", "risk": "low",
-                "desc": "Rules framed under the Act are to be laid before Parliament for scrutiny.",
-                "steps": ["No direct organisational obligation — monitor parliamentary discussions for policy direction."]
-            },
-            {
-                "num": "42", "title": "Penalties for Obstruction", "risk": "low",
-                "desc": "Penalty for willfully obstructing any officer of the Board in the exercise of their powers or duties.",
-                "steps": [
-                    "Ensure all staff are trained on cooperating with Board officers during inspections.",
-                    "Maintain a clear internal protocol for handling Board visits."
-                ]
-            },
-            {
-                "num": "43", "title": "Amendment of Act", "risk": "low",
-                "desc": "Provides that the Act may be amended by Parliament as needed.",
-                "steps": ["Monitor legislative amendments and update compliance plans accordingly."]
-            },
-            {
-                "num": "44", "title": "Repeal and Savings", "risk": "low",
-                "desc": "Upon full enforcement, Section 43A of the IT Act 2000 and associated IT Rules 2011 are repealed. Ongoing proceedings under repealed provisions continue under the new Act.",
-                "steps": [
-                    "Verify that legacy IT Act 43A compliance processes are transitioned to DPDP Act frameworks.",
-                    "Confirm all pending proceedings under old rules are tracked and handled under the new Act."
-                ]
-            }
-        ]
-    }
-]
+# Parsed once per process from catalogue/*.json and shared by all sessions.
+CATALOGUE = load_catalogue()
+CHAPTERS = CATALOGUE.chapters
 
 # ─── SESSION STATE INIT ──────────────────────────────────────────
+@st.cache_resource
+def get_store():
+    # One backend per process, shared by every session. It follows commits
+    # from every replica on the same store, which keep the process-wide
+    # views current.
+    store = open_store(watch=True)
+    holder = portfolio_holder()
+    store.subscribe(lambda engagement, values: update_portfolio(engagement, values, holder))
+    return store
+
+
+@st.cache_resource
+def portfolio_holder() -> dict:
+    return {}
+
+
+@st.cache_resource
+def get_evidence_store():
+    # Blobs and their index are shared by every session, like the state store.
+    return open_evidence_store()
+
+
+@st.cache_resource
+def evidence_downloads():
+    # Streamlit holds a download_button's whole file in memory, so with a
+    # port configured downloads stream from disk instead. Returns the public
+    # base URL and the signing secret, or None.
+    port = os.environ.get("DPDP_EVIDENCE_PORT")
+    if not port:
+        return None
+    secret = os.environ.get("DPDP_EVIDENCE_SECRET", "").encode() or secrets.token_bytes(32)
+    serve_downloads(get_evidence_store(), int(port), secret)
+    return os.environ.get("DPDP_EVIDENCE_URL", f"http://localhost:{port}").rstrip("/"), secret
+
+
+@st.cache_resource
+def get_sessions():
+    # Process-wide, like the store: the memory ceiling covers every session here.
+    return open_session_manager()
+
+
+@st.cache_resource
+def get_analysis():
+    # One background pipeline per process; it also picks up evidence ingested from the CLI.
+    return AnalysisPipeline(get_evidence_store(), CATALOGUE).start()
+
+
+def get_portfolio():
+    # Built once per process from the whole store, then kept current by persist()
+    # and by the store's change feed for other replicas' writes.
+    # numpy is imported here rather than at startup: only the portfolio view needs it.
+    # Dropped again once no session has viewed it for the idle timeout (see idle_check).
+    holder = portfolio_holder()
+    holder["viewed_at"] = time.monotonic()
+    portfolio = holder.get("portfolio")
+    if portfolio is None:
+        from dpdp_portfolio import Portfolio
+        fresh = Portfolio(CHAPTERS)
+        with fresh.lock:
+            # Registered before the load, so a feed delivery from here on
+            # waits for it and applies on top rather than being lost.
+            portfolio = holder.setdefault("portfolio", fresh)
+            if portfolio is fresh:
+                fresh.load_rows(get_store().load_all())
+    return portfolio
+
+
+def get_planner(auditors: int):
+    # Shared like the portfolio and built from it, one per team size, so
+    # sessions planning with different teams don't rebuild each other's.
+    # The least recently used go once PLANNER_CACHE sizes are held.
+    planners = portfolio_holder().setdefault("planners", OrderedDict())
+    planner = planners.get(auditors)
+    if planner is None:
+        portfolio = get_portfolio()
+        fresh = RemediationPlan(CATALOGUE, auditors)
+        with fresh.lock:
+            # Registered before it loads, like the portfolio.
+            planner = planners.setdefault(auditors, fresh)
+            if planner is fresh:
+                fresh.load(portfolio.pending())
+    try:
+        planners.move_to_end(auditors)
+        while len(planners) > PLANNER_CACHE:
+            planners.popitem(last=False)
+    except KeyError:
+        pass   # another session evicted it meanwhile; this one still has it
+    return planner
+
+
+def update_portfolio(entity: str, changes: dict, holder: dict = None):
+    # Keep whichever process-wide views are loaded in step with a write. The
+    # store's feed repeats this process's writes after they commit; applying
+    # a value twice is a no-op.
+    holder = portfolio_holder() if holder is None else holder
+    for view in (holder.get("portfolio"), *list(holder.get("planners", {}).values())):
+        if view is not None:
+            view.set_many(entity, changes)
+
+
+def session_id() -> str:
+    return get_script_run_ctx().session_id
+
+
 def init_session():
-    if "checked" not in st.session_state:
-        st.session_state.checked = {}
-    for ch in CHAPTERS:
-        for sec in ch["sections"]:
-            key = f"{ch['id']}-{sec['num']}"
-            if key not in st.session_state.checked:
-                st.session_state.checked[key] = False
+    if "progress" in st.session_state:
+        return
+    spilled = get_sessions().restore(session_id())
+    if spilled is not None:
+        st.session_state.update(spilled)
+        return
+    engagement = st.query_params.get("engagement", DEFAULT_ENGAGEMENT)
+    store = get_store()
+    st.session_state.engagement = engagement
+    # Read the head before the state: anything written in between is
+    # picked up (idempotently) by the first sync.
+    st.session_state.sync_seq = store.head_seq(engagement)
+    token = st.query_params.get("s")
+    if token:
+        # A ?s= snapshot link opens a read-only view of the shared state.
+        try:
+            bits = from_token(bit_layout(CATALOGUE), token)
+        except ValueError as exc:
+            st.session_state.snapshot_error = str(exc)
+        else:
+            st.session_state.snapshot_view = True
+            st.session_state.progress = ProgressTracker(CATALOGUE, bits=bits)
+            # Links carry section state only; step controls are hidden in this view.
+            st.session_state.steps = StepTracker(CATALOGUE)
+            return
+    state = store.load(engagement)
+    st.session_state.progress = ProgressTracker(CATALOGUE, state)
+    st.session_state.steps = StepTracker(CATALOGUE, state)
+
+
+def resume_session():
+    # Every interaction passes through here: it restores a spilled session
+    # and marks it active.
+    init_session()
+    get_sessions().touch(session_id())
+
+
+def resumes(callback):
+    # Callbacks run before the script body, so each restores the session itself.
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        resume_session()
+        return callback(*args, **kwargs)
+    return wrapper
+
+
+def timer_rerun():
+    # Reruns the app from a timer fragment. The run this starts is not an
+    # interaction, so it neither restores nor touches the session.
+    st.session_state.timer_rerun = True
+    st.rerun()
+
+
+def partial_rerun() -> bool:
+    return bool(get_script_run_ctx().fragment_ids_this_run)
+
+
+# The run that draws the paused page must not restore it; a run started by a
+# timer is not an interaction.
+if st.session_state.pop("pausing", False):
+    pass
+elif st.session_state.pop("timer_rerun", False):
+    init_session()
+else:
+    resume_session()
+
+
+# ─── PROFILING ───────────────────────────────────────────────────
+def profiling_enabled() -> bool:
+    return os.environ.get("DPDP_PROFILE") == "1" or st.query_params.get("profile") == "1"
 
-init_session()
+
+def current_profile():
+    return st.session_state.get("profile", NULL_PROFILE)
+
+
+@st.cache_resource
+def metrics_endpoint():
+    port = os.environ.get("DPDP_METRICS_PORT")
+    return serve_metrics(int(port)) if port else None
+
+
+def timed_export(checked: dict, fmt: str) -> bytes:
+    start = time.perf_counter()
+    data = export_cache.get(CATALOGUE, checked, fmt)
+    metrics.observe("dpdp_export_build_seconds", time.perf_counter() - start,
+                    "Time to produce a download, cache hits included.", format=fmt)
+    return data
+
+
+def render_perf_panel(profile: RunProfile, total: float):
+    with st.expander("⏱ Performance (debug)", expanded=False):
+        col_t, col_e, col_b, col_s = st.columns(4)
+        col_t.metric("Run time", f"{total * 1000:.0f} ms")
+        col_e.metric("Elements", profile.elements)
+        col_b.metric("Payload", f"{profile.payload_bytes / 1024:.1f} KB")
+        col_s.metric("Session state", f"{profile.state_bytes / 1024:.1f} KB")
+        rows = sorted(profile.phases.items(), key=lambda item: -item[1])
+        st.markdown(summary_table_html([{"Phase": name, "ms": round(sec * 1000, 2)} for name, sec in rows]),
+                    unsafe_allow_html=True)
+        st.code(metrics.render(), language="text")
 
 
 # ─── HELPERS ─────────────────────────────────────────────────────
+LAZY_RENDER_THRESHOLD = 100   # sections; larger catalogues start in lazy mode
+DEFAULT_PAGE_SIZE = 25
+PLAN_ROWS = 2000   # schedule rows sent to the browser
+PLANNER_CACHE = 4  # team sizes whose remediation plans are kept
+SECTION_TABLE_ENTITIES = 20   # entity status columns in the portfolio sections table
+# Seconds between polls for other auditors' changes; 0 disables live sync.
+SYNC_INTERVAL = float(os.environ.get("DPDP_SYNC_INTERVAL", "2")) or None
+ANALYSIS_POLL = 2.0   # seconds between evidence-analysis progress checks
+IDLE_CHECK = 10.0     # seconds between session footprint samples and idle checks
+# Spilled with an idle session. Widget values outside this list go with the
+# page; the trackers reseed them on resume.
+SPILL_KEYS = ("progress", "steps", "snapshot_view", "import_preview",
+              "view", "search", "export_format", "lazy_render", "page_size",
+              "filter_pending", "filter_high", "filter_chapter")
+
+
 def risk_badge(risk: str) -> str:
     icons = {"high": "🔴", "medium": "🟡", "low": "🟢"}
     return f"{icons.get(risk,'')} {risk.capitalize()} Risk"
 
 
 def get_stats():
-    total = sum(len(ch["sections"]) for ch in CHAPTERS)
-    done = sum(1 for v in st.session_state.checked.values() if v)
-    return total, done, total - done
-
-
-# ─── LOGO SVG (inline) ───────────────────────────────────────────
-LOGO_SVG = """
-<svg width="56" height="56" viewBox="0 0 54 54" fill="none" xmlns="http://www.w3.org/2000/svg">
-  <defs>
-    <linearGradient id="sg" x1="0" y1="0" x2="54" y2="54">
-      <stop offset="0%" stop-color="#f59e0b"/>
-      <stop offset="100%" stop-color="#fcd34d"/>
-    </linearGradient>
-  </defs>
-  <path d="M27 3L6 13v18c0 11.5 9 22 21 25 12-3 21-13.5 21-25V13L27 3z" stroke="url(#sg)" stroke-width="2.5" stroke-linejoin="round" fill="none"/>
-  <rect x="20" y="27" width="14" height="11" rx="2.5" fill="#f59e0b"/>
-  <path d="M22 27v-4a5 5 0 0110 0v4" stroke="#f59e0b" stroke-width="2.5" stroke-linecap="round" fill="none"/>
-  <circle cx="27" cy="33" r="1.6" fill="#0f1b2d"/>
-  <circle cx="12" cy="17" r="2" fill="#3b82f6" opacity="0.7"/>
-  <circle cx="42" cy="17" r="2" fill="#10b981" opacity="0.7"/>
-  <circle cx="27" cy="8" r="1.5" fill="#fcd34d" opacity="0.9"/>
-</svg>
-"""
+    return st.session_state.progress.stats()
 
 
-# ─── RENDER APP ──────────────────────────────────────────────────
-def main():
-    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+def read_only() -> bool:
+    return st.session_state.get("snapshot_view", False)
 
-    # ── HEADER ──
+
+def session_paused() -> bool:
+    # Spilled to disk while idle; the next full run restores it.
+    return "progress" not in st.session_state
+
+
+# ─── CALLBACKS ───────────────────────────────────────────────────
+def seed_widget(widget_key: str, value: bool):
+    # Keyed widgets take their value from session state; seed it from the
+    # checked map so widgets created after a partial rerun start in sync.
+    if widget_key not in st.session_state:
+        st.session_state[widget_key] = value
+
+
+def persist(changes: dict, kind: str = "toggle"):
+    if not changes:
+        return
+    get_store().write(st.session_state.engagement, changes, actor=st.session_state.get("actor", "").strip(), kind=kind)
+    update_portfolio(st.session_state.engagement, changes)
+
+
+@resumes
+def on_section_toggle(ch: dict, key: str):
+    progress = st.session_state.progress
+    if progress.set(key, st.session_state[f"cb_{key}"]):
+        persist({key: progress.get(key)})
+    ch_done, ch_total = progress.chapter(ch["id"])
+    st.session_state[f"toggle_all_{ch['id']}"] = ch_done == ch_total
+    st.session_state.stats_dirty = True
+
+
+@resumes
+def on_step_change(ch: dict, key: str, skey: str):
+    # Steps roll up into the section at the edges: the last step resolved
+    # completes it, and a failed step reopens it. Anything else leaves a
+    # section ticked (or not) by hand alone.
+    steps, progress = st.session_state.steps, st.session_state.progress
+    value = st.session_state[f"step_{skey}"] or UNTOUCHED
+    was_complete = steps.section_complete(key)
+    if not steps.set(skey, value):
+        return
+    changes = {skey: value}
+    if steps.section_complete(key) and not was_complete:
+        section = True
+    elif value == FAIL:
+        section = False
+    else:
+        section = None
+    if section is not None and progress.set(key, section):
+        changes[key] = section
+        st.session_state[f"cb_{key}"] = section
+        ch_done, ch_total = progress.chapter(ch["id"])
+        st.session_state[f"toggle_all_{ch['id']}"] = ch_done == ch_total
+    persist(changes, kind="step")
+    st.session_state.stats_dirty = True
+
+
+@resumes
+def on_chapter_toggle(ch: dict):
+    value = st.session_state[f"toggle_all_{ch['id']}"]
+    changes = {f"{ch['id']}-{s['num']}": value for s in ch["sections"]}
+    for key in changes:
+        st.session_state[f"cb_{key}"] = value
+    persist(st.session_state.progress.set_many(changes), kind="bulk")
+    st.session_state.stats_dirty = True
+
+
+@resumes
+def on_reset_all():
+    progress = st.session_state.progress
+    for key in CATALOGUE.keys:
+        st.session_state[f"cb_{key}"] = False
+    for ch in CHAPTERS:
+        st.session_state[f"toggle_all_{ch['id']}"] = False
+    cleared = st.session_state.steps.reset()
+    for skey in cleared:
+        st.session_state[f"step_{skey}"] = None
+    persist({**progress.reset(), **cleared}, kind="reset")
+
+
+def pull_remote_changes() -> bool:
+    """Apply other auditors' changes to this session; True if any arrived."""
+    if st.session_state.get("snapshot_view") or session_paused():
+        return False
+    progress = st.session_state.progress
+    seq, changes = get_store().changes_since(st.session_state.engagement, st.session_state.sync_seq)
+    st.session_state.sync_seq = seq
+    applied = progress.set_many(changes)
+    for key, value in applied.items():
+        st.session_state[f"cb_{key}"] = value
+    for ch_id in {CATALOGUE.by_key[key]["chapter_id"] for key in applied}:
+        ch_done, ch_total = progress.chapter(ch_id)
+        st.session_state[f"toggle_all_{ch_id}"] = ch_done == ch_total
+    applied_steps = st.session_state.steps.set_many(changes)
+    for skey, value in applied_steps.items():
+        st.session_state[f"step_{skey}"] = value or None
+    return bool(applied or applied_steps)
+
+
+@st.fragment(run_every=SYNC_INTERVAL)
+def live_sync():
+    # Polls on its own timer; a full rerun is only triggered when another
+    # auditor actually changed something.
+    if pull_remote_changes():
+        timer_rerun()
+    if session_paused():
+        st.caption("💤 Paused while idle — live sync resumes with the session")
+    elif read_only():
+        st.caption("📌 Snapshot view — live sync paused")
+    elif SYNC_INTERVAL:
+        st.caption(f"🟢 Live — synced with other auditors every {SYNC_INTERVAL:g}s")
+
+
+@st.fragment(run_every=ANALYSIS_POLL)
+def analysis_status():
+    # Shows progress while evidence is analysed, then reruns the app once so
+    # open sections pick up the new suggestions.
+    pipeline = get_analysis()
+    if pipeline.busy:
+        progress = pipeline.progress()
+        st.progress(progress.done / max(progress.total, 1),
+                    text=f"🔎 Analysing evidence: {progress.done}/{progress.total} files")
+    elif session_paused():
+        # A rerun would restore the session; it catches up on resume.
+        return
+    elif st.session_state.setdefault("analysis_seen", pipeline.completed) != pipeline.completed:
+        st.session_state.analysis_seen = pipeline.completed
+        timer_rerun()
+
+
+@st.fragment(run_every=IDLE_CHECK)
+def idle_check():
+    # Reports this session's footprint to the process-wide manager, and
+    # spills the session once it has idled out or been picked for eviction.
+    manager = get_sessions()
+    if session_paused():
+        manager.measure(session_id())
+        return
+    # Sizes are cached per key, so a tick only pickles the values that changed.
+    sizes = st.session_state.setdefault("state_sizes", {})
+    footprint = state_size({key: st.session_state[key] for key in st.session_state if key != "state_sizes"}, sizes)
+    if manager.measure(session_id(), footprint):
+        spill_session()
+    holder = portfolio_holder()
+    if "viewed_at" in holder and manager.expired(holder["viewed_at"]):
+        # Nobody has opened the portfolio or plan lately; the next visit rebuilds them.
+        holder.clear()
+    stats = manager.stats()
+    metrics.set_gauge("dpdp_sessions", stats["sessions"] - stats["spilled"], "Open sessions.", state="resident")
+    metrics.set_gauge("dpdp_sessions", stats["spilled"], "Open sessions.", state="spilled")
+    metrics.set_gauge("dpdp_session_resident_bytes", stats["resident_bytes"], "Pickled state of resident sessions.")
+    metrics.set_gauge("dpdp_session_spilled_bytes", stats["spilled_bytes"], "Session state spilled to disk.")
+
+
+def spill_session():
+    # Writes the session's state out and reruns into the paused page, which
+    # builds none of the chapter widgets: Streamlit drops their state then.
+    get_sessions().spill(session_id(), {key: st.session_state[key] for key in SPILL_KEYS if key in st.session_state})
+    for key in [k for k in st.session_state if k in SPILL_KEYS or str(k).startswith(("cb_", "toggle_all_", "step_"))]:
+        del st.session_state[key]
+    st.session_state.pausing = True
+    st.rerun()
+
+
+def render_paused():
+    st.info("💤 **This session was paused while idle** to free server memory. The audit is saved; "
+            "your view comes back as you left it.")
+    st.button("Resume", type="primary")
+
+
+def reload_engagement():
+    # Drop the old state and its widget state so widgets reseed from the new map.
+    for key in [k for k in st.session_state if str(k).startswith(("cb_", "toggle_all_", "step_"))]:
+        del st.session_state[key]
+    for key in ("progress", "steps", "snapshot_view"):
+        st.session_state.pop(key, None)
+    init_session()
+
+
+@resumes
+def on_engagement_change():
+    engagement = st.session_state.engagement_input.strip() or DEFAULT_ENGAGEMENT
+    get_store().flush()
+    st.session_state.engagement = engagement
+    st.query_params["engagement"] = engagement
+    st.query_params.pop("s", None)
+    reload_engagement()
+
+
+@resumes
+def on_leave_snapshot():
+    st.query_params.pop("s", None)
+    reload_engagement()
+
+
+def snapshot_link() -> str:
+    token = to_token(bit_layout(CATALOGUE), st.session_state.progress.bits)
+    query = urlencode({"engagement": st.session_state.engagement, "s": token})
+    # Without a known page URL (e.g. headless runs) the link is relative.
+    return f"{st.context.url or ''}?{query}"
+
+
+# ─── RENDER APP ──────────────────────────────────────────────────
+def render_stats_strip(slot):
     total, done, pending = get_stats()
     pct = round((done / total) * 100, 1) if total else 0
 
-    st.markdown(f"""
-    <div class="dpdp-header">
-      <div class="logo-circle">{LOGO_SVG}</div>
-      <div>
-        <h1 style="margin:0; font-family:'Playfair Display',serif; color:#fff; font-size:1.6rem;">🛡️ DataShield Audit</h1>
-        <div class="sub">DPDP Act 2023 — Internal Compliance Audit Tool</div>
-      </div>
-      <div style="margin-left:auto; display:flex; gap:32px; text-align:center;">
-        <div><div style="color:#fff; font-size:1.4rem; font-weight:600;">{total}</div><div style="color:#94a3b8; font-size:0.62rem; text-transform:uppercase; letter-spacing:1.5px;">Sections</div></div>
-        <div><div style="color:#10b981; font-size:1.4rem; font-weight:600;">{done}</div><div style="color:#94a3b8; font-size:0.62rem; text-transform:uppercase; letter-spacing:1.5px;">Completed</div></div>
-        <div><div style="color:#f59e0b; font-size:1.4rem; font-weight:600;">{pending}</div><div style="color:#94a3b8; font-size:0.62rem; text-transform:uppercase; letter-spacing:1.5px;">Pending</div></div>
-      </div>
-    </div>
-    """, unsafe_allow_html=True)
+    with slot.container():
+        st.markdown(f"""
+        <div class="dpdp-header">
+          <div class="logo-circle">{logo_html()}</div>
+          <div>
+            <h1 style="margin:0; font-family:'Playfair Display',serif; color:#fff; font-size:1.6rem;">🛡️ DataShield Audit</h1>
+            <div class="sub">DPDP Act 2023 — Internal Compliance Audit Tool</div>
+          </div>
+          <div style="margin-left:auto; display:flex; gap:32px; text-align:center;">
+            <div><div style="color:#fff; font-size:1.4rem; font-weight:600;">{total}</div><div style="color:#94a3b8; font-size:0.62rem; text-transform:uppercase; letter-spacing:1.5px;">Sections</div></div>
+            <div><div style="color:#10b981; font-size:1.4rem; font-weight:600;">{done}</div><div style="color:#94a3b8; font-size:0.62rem; text-transform:uppercase; letter-spacing:1.5px;">Completed</div></div>
+            <div><div style="color:#f59e0b; font-size:1.4rem; font-weight:600;">{pending}</div><div style="color:#94a3b8; font-size:0.62rem; text-transform:uppercase; letter-spacing:1.5px;">Pending</div></div>
+          </div>
+        </div>
+        """, unsafe_allow_html=True)
 
-    # ── GLOBAL PROGRESS ──
-    col_prog, col_pct = st.columns([5, 1])
-    with col_prog:
-        st.progress(done / total if total else 0)
-    with col_pct:
-        st.markdown(f"<div style='text-align:right; font-weight:600; color:#1e293b; padding-top:4px;'>{pct}% Complete</div>", unsafe_allow_html=True)
+        # ── GLOBAL PROGRESS ──
+        col_prog, col_pct = st.columns([5, 1])
+        with col_prog:
+            st.progress(done / total if total else 0)
+        with col_pct:
+            st.markdown(f"<div style='text-align:right; font-weight:600; color:#1e293b; padding-top:4px;'>{pct}% Complete</div>", unsafe_allow_html=True)
 
-    # ── INFO BOX ──
-    st.info(
-        "**DPDP Act 2023 — Internal Audit Checklist**\n\n"
-        "This tool covers all 44 sections across 9 chapters. Expand each chapter, review the audit procedure, "
-        "and tick off completed items. Full compliance deadline: **13 May 2027**."
+
+def render_summary(slot):
+    progress, steps = st.session_state.progress, st.session_state.steps
+    columns = dict(progress.chapter_summary())
+    pct = columns.pop("Progress (%)")
+    # Step rollups are kept per chapter (see dpdp_steps), so these are lookups.
+    rollups = [steps.chapter(ch["id"]) for ch in CHAPTERS]
+    columns["Steps Resolved"] = [f"{resolved}/{total}" for resolved, total, _ in rollups]
+    columns["Failed Steps"] = [failed for _, _, failed in rollups]
+    columns["Progress (%)"] = pct
+    summary_data = [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    resolved, total, failed = steps.totals()
+    by_risk = {risk: steps.risk(risk) for risk in RISK_LEVELS}
+    by_risk = " · ".join(f"{risk.capitalize()} {r}/{t}" for risk, (r, t, _) in by_risk.items())
+    with slot.container():
+        # A static table keeps pandas off the default path for a 9-row summary.
+        st.markdown(summary_table_html(summary_data), unsafe_allow_html=True)
+        st.caption(f"Audit steps: {resolved}/{total} resolved, {failed} failed — {by_risk}")
+
+
+def on_portfolio_reload():
+    portfolio_holder().clear()
+
+
+def render_portfolio():
+    portfolio = get_portfolio()
+    with portfolio.lock:
+        # One consistent reading of the headline numbers.
+        total, done, pending = portfolio.totals()
+        n = len(portfolio.entities)
+        high_gaps = portfolio.high_gaps()
+
+    st.subheader("🏢 Portfolio Overview")
+    col_e, col_d, col_p, col_h, col_r = st.columns([1, 1, 1, 1, 1])
+    col_e.metric("Entities", n)
+    col_d.metric("Sections Completed", done)
+    col_p.metric("Sections Pending", pending)
+    col_h.metric("Open High-Risk Gaps", int(high_gaps.sum()))
+    with col_r:
+        st.button("↻ Reload", use_container_width=True, on_click=on_portfolio_reload)
+    st.progress(done / total if total else 0, text=f"{round(done / total * 100, 1) if total else 0}% across all entities")
+
+    tab_ch, tab_risk, tab_heat, tab_sec, tab_ent = st.tabs(
+        ["Chapter Rollup", "Risk by Chapter", "Entity Heatmap", "Sections", "Entities"])
+    with tab_ch:
+        st.dataframe(portfolio.chapter_summary(), use_container_width=True, hide_index=True)
+    with tab_risk:
+        pivot = portfolio.risk_pivot()
+        st.dataframe(pivot, use_container_width=True, hide_index=True,
+                     column_config={c: percent_column(c) for c in pivot if c != "Chapter"})
+    with tab_heat:
+        heatmap = portfolio.chapter_heatmap()
+        st.dataframe(heatmap, use_container_width=True, hide_index=True,
+                     column_config={c: percent_column(c) for c in heatmap if c != "Entity"})
+    with tab_sec:
+        picked = st.multiselect("Status columns for", portfolio.entities, key="portfolio_sections_for",
+                                max_selections=SECTION_TABLE_ENTITIES, placeholder="Choose entities")
+        sections = portfolio.sections_table(picked)
+        st.dataframe(sections, use_container_width=True, hide_index=True, column_config={
+            "Entities Done": st.column_config.ProgressColumn("Entities Done", min_value=0, max_value=max(n, 1),
+                                                             format="%d"),
+            **{name: st.column_config.CheckboxColumn(name) for name in picked},
+        })
+    with tab_ent:
+        st.dataframe(portfolio.entity_summary(), use_container_width=True, hide_index=True)
+
+
+def format_date(day) -> str:
+    return f"{day.day} {day:%B %Y}"
+
+
+def render_plan():
+    auditors = st.session_state.plan_auditors
+    planner = get_planner(auditors)
+    summary = planner.summary()
+
+    st.subheader("🗓️ Remediation Plan")
+    if not summary["tasks"]:
+        st.success("No open gaps in the portfolio — nothing to schedule.")
+        return
+    col_g, col_e, col_d, col_c = st.columns(4)
+    col_g.metric("Open Gaps", summary["tasks"])
+    col_e.metric("Entities", summary["entities"])
+    col_d.metric("Auditor-days", f"{summary['auditor_days']:g}")
+    slip = (summary["completion"] - planner.deadline).days
+    col_c.metric("Projected Completion", format_date(summary["completion"]),
+                 delta=f"{slip:+d} days vs deadline", delta_color="inverse")
+    if summary["on_track"]:
+        st.success(f"On track for the {format_date(planner.deadline)} deadline with {auditors} auditors.")
+    else:
+        st.warning(f"{summary['late']} gaps are scheduled after the {format_date(planner.deadline)} deadline "
+                   f"with {auditors} auditors.")
+    st.caption("High-risk gaps first, and the chapters they depend on before them. "
+               "Effort per section: high 3, medium 2, low 1 auditor-days.")
+
+    tab_sched, tab_ent = st.tabs(["Schedule", "By Entity"])
+    with tab_sched:
+        rows = planner.rows(PLAN_ROWS)
+        if summary["tasks"] > PLAN_ROWS:
+            st.caption(f"First {PLAN_ROWS} of {summary['tasks']} scheduled gaps.")
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+    with tab_ent:
+        st.dataframe(planner.entity_rows(), use_container_width=True, hide_index=True)
+
+
+def percent_column(label: str):
+    return st.column_config.ProgressColumn(label, min_value=0, max_value=100, format="%d%%")
+
+
+def render_history():
+    from dpdp_history import activity_rows, burndown, history_points
+
+    store = get_store()
+    engagement = st.session_state.engagement
+    points = history_points(store, engagement, st.session_state.progress.checked, time.time())
+    by_chapter, by_risk = burndown(CATALOGUE, points)
+
+    st.subheader(f"📈 Progress over Time — {engagement}")
+    if len(points) < 2:
+        st.caption("Snapshots are taken as the audit progresses; the burndown fills in from the first one.")
+    col_risk, col_ch = st.columns(2)
+    with col_risk:
+        st.markdown("#### Pending by Risk")
+        st.line_chart(by_risk, x="time", y_label="Pending sections")
+    with col_ch:
+        st.markdown("#### Pending by Chapter")
+        st.line_chart(by_chapter, x="time", y_label="Pending sections")
+
+    st.markdown("#### Recent Activity")
+    rows = activity_rows(store.recent_events(engagement))
+    if rows:
+        st.markdown(summary_table_html(rows), unsafe_allow_html=True)
+    else:
+        st.caption("No changes recorded for this engagement yet.")
+
+
+def import_mapping():
+    from dpdp_import import COLUMN_SYNONYMS, FUZZY_CUTOFF, ImportMapping
+
+    named = {role: st.session_state.get(f"import_col_{role}", "").strip() or None for role in COLUMN_SYNONYMS}
+    done_values = tuple(v.strip() for v in st.session_state.get("import_done_values", "").split(",") if v.strip())
+    return ImportMapping(**named, done_values=done_values,
+                         fuzzy_cutoff=st.session_state.get("import_cutoff", FUZZY_CUTOFF),
+                         sheet=st.session_state.get("import_sheet", "").strip() or None)
+
+
+@resumes
+def on_import_preview():
+    from dpdp_import import diff_import, read_tracker
+
+    st.session_state.pop("import_preview", None)
+    upload = st.session_state.import_file
+    if upload is None:
+        return
+    try:
+        result = read_tracker(upload, CATALOGUE, import_mapping(), st.session_state.engagement, name=upload.name)
+    except (ValueError, KeyError, ImportError, UnicodeDecodeError) as exc:
+        st.session_state.import_error = str(exc)
+        return
+    st.session_state.import_preview = (upload.name, result, diff_import(get_store(), result))
+
+
+@resumes
+def on_import_apply():
+    from dpdp_import import apply_import
+
+    name, result, diffs = st.session_state.pop("import_preview")
+    applied = apply_import(get_store(), result, diffs, actor=st.session_state.get("actor", "").strip() or "import")
+    for entity, changes in applied.items():
+        update_portfolio(entity, changes)
+    # This session's own engagement catches up through pull_remote_changes().
+    st.session_state.import_applied = (name, sum(len(c) for c in applied.values()), len(applied))
+
+
+def render_import():
+    from dpdp_import import COLUMN_SYNONYMS, FUZZY_CUTOFF, report_rows
+
+    st.subheader("📥 Import Tracker")
+    st.caption(
+        "Pre-fill status from an existing CSV or Excel tracker, one row per control (and per entity "
+        f"for a portfolio). Rows without an entity column go to **{st.session_state.engagement}**."
     )
+    if "import_applied" in st.session_state:
+        name, n_changes, n_entities = st.session_state.pop("import_applied")
+        st.success(f"Imported {name}: {n_changes} changes across {n_entities} "
+                   f"engagement{'s' if n_entities != 1 else ''}.")
+    if "import_error" in st.session_state:
+        st.error(f"Couldn't read the tracker: {st.session_state.pop('import_error')}")
 
-    # ── ACTION BUTTONS ──
-    col_a, col_b, _ = st.columns([1.2, 1.2, 4])
-    with col_a:
-        if st.button("↺ Reset All", type="secondary", use_container_width=True):
-            for key in st.session_state.checked:
-                st.session_state.checked[key] = False
-            st.rerun()
-    with col_b:
-        # Download a simple text report
-        lines = [f"DPDP Act 2023 — Audit Report | Generated: {datetime.now().strftime('%d %b %Y %H:%M')}", "=" * 70]
-        for ch in CHAPTERS:
-            lines.append(f"\n{ch['title']}")
-            lines.append("-" * 50)
-            for sec in ch["sections"]:
-                key = f"{ch['id']}-{sec['num']}"
-                status = "✅ DONE" if st.session_state.checked.get(key) else "⬜ PENDING"
-                lines.append(f"  [{status}] § {sec['num']} — {sec['title']}  ({sec['risk'].upper()} RISK)")
-        report_text = "\n".join(lines)
-        st.download_button("⬇ Export Report", data=report_text, file_name="DPDP_Audit_Report.txt", mime="text/plain", use_container_width=True)
+    st.file_uploader("Tracker", type=["csv", "xlsx", "xlsm"], key="import_file",
+                     on_change=resumes(lambda: st.session_state.pop("import_preview", None)))
+    with st.expander("Column mapping"):
+        st.caption("Leave a column blank to detect it from the header row.")
+        for col, role in zip(st.columns(len(COLUMN_SYNONYMS)), COLUMN_SYNONYMS):
+            col.text_input(role.title(), key=f"import_col_{role}")
+        col_done, col_sheet, col_cutoff = st.columns([2, 1, 1])
+        col_done.text_input("Extra done values", key="import_done_values", placeholder="green, compliant")
+        col_sheet.text_input("Sheet", key="import_sheet", placeholder="first sheet")
+        col_cutoff.slider("Fuzzy title match", min_value=0.5, max_value=1.0, value=FUZZY_CUTOFF, step=0.05,
+                          key="import_cutoff", help="Minimum similarity for a title to match a section.")
+    st.button("Dry run", type="primary", on_click=on_import_preview,
+              disabled=st.session_state.get("import_file") is None)
 
-    st.markdown("---")
+    if "import_preview" not in st.session_state:
+        return
+    name, result, diffs = st.session_state.import_preview
+    rows = report_rows(result, diffs)
+    to_done = sum(r["→ Done"] for r in rows)
+    to_pending = sum(r["→ Pending"] for r in rows)
 
-    # ── CHAPTERS & SECTIONS ──
-    for ch in CHAPTERS:
-        ch_sections = ch["sections"]
-        ch_done = sum(1 for s in ch_sections if st.session_state.checked.get(f"{ch['id']}-{s['num']}"))
-        ch_total = len(ch_sections)
-        ch_pct = round((ch_done / ch_total) * 100) if ch_total else 0
-        ch_all_done = ch_done == ch_total
-
-        # Chapter header label
-        badge_color = "#10b981" if ch_all_done else "#f59e0b"
-        header_label = (
-            f"<span style='color:{badge_color}; font-weight:700;'>[{ch_done}/{ch_total}]</span> "
-            f"<strong>{ch['title']}</strong> "
-            f"<span style='font-size:0.75rem; color:#94a3b8;'>— {ch_pct}% complete</span>"
-        )
+    col_r, col_m, col_e, col_d, col_p = st.columns(5)
+    col_r.metric("Rows", result.rows)
+    col_m.metric("Matched", result.matched)
+    col_e.metric("Entities", len(rows))
+    col_d.metric("→ Done", to_done)
+    col_p.metric("→ Pending", to_pending)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    if result.blank:
+        st.caption(f"{result.blank} matched rows have an empty status; their sections are left as they are.")
+    if result.fuzzy:
+        with st.expander(f"Fuzzy title matches ({len(result.fuzzy)})"):
+            st.dataframe([{"Title in file": title, "Section": key, "Similarity": round(score * 100)}
+                          for title, (key, score) in sorted(result.fuzzy.items())],
+                         use_container_width=True, hide_index=True,
+                         column_config={"Similarity": percent_column("Similarity")})
+    if result.unmatched:
+        with st.expander(f"Unmatched rows ({result.rows - result.matched})"):
+            st.dataframe([{"Value": label, "Rows": n} for label, n in result.unmatched.most_common()],
+                         use_container_width=True, hide_index=True)
+    st.button(f"Apply import ({to_done + to_pending} changes)", on_click=on_import_apply,
+              disabled=not (to_done or to_pending))
+
+
+@st.fragment
+def render_chapter(ch: dict, stats_slot, summary_slot, visible: tuple = None,
+                   expanded: bool = False, lazy: bool = False, page_size: int = DEFAULT_PAGE_SIZE):
+    # Its partial reruns are interactions too; full runs were counted (or not) on entry.
+    if partial_rerun():
+        get_sessions().touch(session_id())
+    with current_profile().phase(f"chapter:{ch['id']}"):
+        render_chapter_body(ch, stats_slot, summary_slot, visible, expanded, lazy, page_size)
+
+
+def render_chapter_body(ch: dict, stats_slot, summary_slot, visible: tuple,
+                        expanded: bool, lazy: bool, page_size: int):
+    # A toggle inside this fragment reruns only this chapter; the stats strip
+    # and summary live outside it and are redrawn into their placeholders.
+    if st.session_state.pop("stats_dirty", False):
+        render_stats_strip(stats_slot)
+        render_summary(summary_slot)
+
+    # ``visible`` narrows the chapter to search hits and filters, in display order.
+    ch_sections = ch["sections"] if visible is None else [CATALOGUE.by_key[k] for k in visible]
+    progress = st.session_state.progress
+    ch_done, ch_total = progress.chapter(ch["id"])
+    ch_pct = round((ch_done / ch_total) * 100) if ch_total else 0
+    ch_all_done = ch_done == ch_total
+
+    if lazy:
+        # Keyed expanders with on_change report .open; the body below is only
+        # built while the chapter is open.
+        chapter_box = st.expander(ch["title"], expanded=expanded, key=f"exp_{ch['id']}", on_change="rerun")
+        if not chapter_box.open:
+            return
+    else:
+        chapter_box = st.expander(ch["title"], expanded=expanded)
+
+    with chapter_box:
+        # Chapter-level "select all" toggle
+        col_sel, col_prog2 = st.columns([2, 3])
+        with col_sel:
+            seed_widget(f"toggle_all_{ch['id']}", ch_all_done)
+            st.checkbox(
+                f"**Mark all {ch_total} sections as complete**",
+                key=f"toggle_all_{ch['id']}",
+                on_change=on_chapter_toggle, args=(ch,), disabled=read_only(),
+            )
+        with col_prog2:
+            st.progress(ch_done / ch_total if ch_total else 0, text=f"{ch_pct}%")
+            st.caption(steps_caption(st.session_state.steps.chapter(ch["id"])))
 
-        with st.expander(ch["title"], expanded=False):
-            # Chapter-level "select all" toggle
-            col_sel, col_prog2 = st.columns([2, 3])
-            with col_sel:
-                toggle_val = st.checkbox(
-                    f"**Mark all {ch_total} sections as complete**",
-                    value=ch_all_done,
-                    key=f"toggle_all_{ch['id']}"
+        st.divider()
+
+        if lazy and len(ch_sections) > page_size:
+            pages = -(-len(ch_sections) // page_size)
+            page_key = f"page_{ch['id']}"
+            if st.session_state.get(page_key, 1) > pages:
+                st.session_state[page_key] = pages
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=page_key)
+            start = (page - 1) * page_size
+            st.caption(f"Sections {start + 1}–{min(start + page_size, len(ch_sections))} of {len(ch_sections)}")
+            ch_sections = ch_sections[start:start + page_size]
+
+        # ── Individual Sections ──
+        for sec in ch_sections:
+            key = f"{ch['id']}-{sec['num']}"
+            risk_label = risk_badge(sec["risk"])
+
+            # Row: checkbox + section expander
+            col_cb, col_sec = st.columns([0.35, 8])
+
+            with col_cb:
+                seed_widget(f"cb_{key}", progress.get(key))
+                st.checkbox(
+                    f"§ {sec['num']}", key=f"cb_{key}", label_visibility="collapsed",
+                    on_change=on_section_toggle, args=(ch, key), disabled=read_only(),
                 )
-                # If toggled, apply to all sections in chapter
-                if toggle_val != ch_all_done:
-                    for s in ch_sections:
-                        st.session_state.checked[f"{ch['id']}-{s['num']}"] = toggle_val
-                    st.rerun()
-            with col_prog2:
-                st.progress(ch_done / ch_total if ch_total else 0, text=f"{ch_pct}%")
-
-            st.divider()
-
-            # ── Individual Sections ──
-            for sec in ch_sections:
-                key = f"{ch['id']}-{sec['num']}"
-                is_checked = st.session_state.checked.get(key, False)
-                risk_label = risk_badge(sec["risk"])
-
-                # Row: checkbox + section expander
-                col_cb, col_sec = st.columns([0.35, 8])
-
-                with col_cb:
-                    new_val = st.checkbox("", value=is_checked, key=f"cb_{key}")
-                    if new_val != is_checked:
-                        st.session_state.checked[key] = new_val
-                        st.rerun()
-
-                with col_sec:
-                    sec_label = f"**§ {sec['num']} — {sec['title']}**  {risk_label}"
+
+            with col_sec:
+                sec_label = f"**§ {sec['num']} — {sec['title']}**  {risk_label}"
+                if lazy:
+                    sec_box = st.expander(sec_label, key=f"exp_{key}", on_change="rerun")
+                    if sec_box.open:
+                        with sec_box:
+                            if read_only():
+                                st.markdown(section_body_html(CATALOGUE, key), unsafe_allow_html=True)
+                            else:
+                                st.markdown(section_body_html(CATALOGUE, key, with_steps=False),
+                                            unsafe_allow_html=True)
+                                render_section_tools(ch, sec)
+                else:
                     with st.expander(sec_label, expanded=False):
-                        # Overview
-                        st.markdown(f"<div class='sec-detail-box'>"
-                                    f"<div class='det-label'>📄 Section Overview</div>"
-                                    f"<div class='det-text'>{sec['desc']}</div>"
-                                    f"<div class='det-label'>✅ Audit Procedure</div>",
-                                    unsafe_allow_html=True)
-
-                        for i, step in enumerate(sec["steps"], 1):
-                            st.markdown(
-                                f'<div class="audit-step-row">'
-                                f'<div class="step-circle">{i}</div>'
-                                f'<div class="step-text">{step}</div>'
-                                f'</div>',
-                                unsafe_allow_html=True
-                            )
-
-                        st.markdown("</div>", unsafe_allow_html=True)
+                        st.markdown(section_body_html(CATALOGUE, key), unsafe_allow_html=True)
+                        if not read_only():
+                            # Eager bodies are built for every section on every run;
+                            # steps and evidence wait until their popover is opened.
+                            record = st.popover("📝 Steps & evidence", key=f"steps_open_{key}",
+                                                on_change="rerun")
+                            if record.open:
+                                with record:
+                                    render_section_tools(ch, sec)
 
-    # ── SUMMARY TABLE ──
-    st.markdown("---")
-    st.subheader("📊 Compliance Summary by Chapter")
 
-    summary_data = []
-    for ch in CHAPTERS:
-        ch_done = sum(1 for s in ch["sections"] if st.session_state.checked.get(f"{ch['id']}-{s['num']}"))
-        ch_total = len(ch["sections"])
-        high_risk = sum(1 for s in ch["sections"] if s["risk"] == "high")
-        high_done = sum(1 for s in ch["sections"] if s["risk"] == "high" and st.session_state.checked.get(f"{ch['id']}-{s['num']}"))
-        summary_data.append({
-            "Chapter": ch["title"],
-            "Total Sections": ch_total,
-            "Completed": ch_done,
-            "Pending": ch_total - ch_done,
-            "High-Risk Sections": high_risk,
-            "High-Risk Done": high_done,
-            "Progress (%)": round((ch_done / ch_total) * 100) if ch_total else 0
-        })
+def render_section_tools(ch: dict, sec: dict):
+    links = get_evidence_store().links(st.session_state.engagement, sec["key"])
+    # Reads whatever analysis has finished; files still queued show as pending.
+    review = get_analysis().review(sec, links)
+    render_step_controls(ch, sec, review)
+    render_evidence(sec, links, review)
 
-    import pandas as pd
-    df = pd.DataFrame(summary_data)
-    st.dataframe(df, use_container_width=True, hide_index=True)
 
-    # ── FOOTER ──
+def render_step_controls(ch: dict, sec: dict, review=None):
+    key = sec["key"]
+    steps = st.session_state.steps
+    st.caption(steps_caption(steps.section(key)))
+    for n, text in enumerate(sec["steps"], 1):
+        skey = step_key(key, n)
+        seed_widget(f"step_{skey}", steps.get(skey) or None)
+        st.segmented_control(f"{n}. {text}", list(STATUS_LABELS), key=f"step_{skey}",
+                             format_func=STATUS_LABELS.get, on_change=on_step_change, args=(ch, key, skey))
+        hint = review.steps.get(skey) if review else None
+        if hint:
+            st.caption(suggestion_text(hint))
+
+
+def suggestion_text(hint) -> str:
+    if hint.flag == PASS:
+        return f"💡 Evidence suggests a pass — mentions {', '.join(hint.matched)}"
+    return f"⚠️ Possible gap — evidence doesn't mention {', '.join(hint.missing)}"
+
+
+def evidence_targets(sec: dict) -> dict:
+    targets = {sec["key"]: "Section"}
+    for n in range(1, len(sec["steps"]) + 1):
+        targets[step_key(sec["key"], n)] = f"Step {n}"
+    return targets
+
+
+def on_evidence_attach(key: str, uploader_key: str):
+    store = get_evidence_store()
+    target = st.session_state[f"ev_to_{key}"]
+    for upload in st.session_state.get(uploader_key) or ():
+        blob = store.put_stream(upload)
+        store.attach(st.session_state.engagement, target, blob, upload.name,
+                     actor=st.session_state.get("actor", "").strip())
+    get_analysis().wake()
+    # A new uploader key empties the widget once its files are stored.
+    st.session_state.evidence_nonce = st.session_state.get("evidence_nonce", 0) + 1
+
+
+def on_evidence_detach(target: str, digest: bytes):
+    get_evidence_store().detach(st.session_state.engagement, target, digest)
+
+
+def render_evidence(sec: dict, links: list, review):
+    key = sec["key"]
+    targets = evidence_targets(sec)
+    st.markdown(f"**📎 Evidence** ({len(links)})")
+    if review.pending:
+        st.caption(f"⏳ Analysing {review.pending} file(s); step suggestions appear when done.")
+    if review.relevance is not None:
+        st.caption(f"Evidence mentions {review.relevance:.0%} of this section's key terms.")
+    if review.unreadable:
+        st.caption(f"{review.unreadable} file(s) had no readable text (scans, images or unsupported formats).")
+    downloads = evidence_downloads()
+    for link in links:
+        ref = f"{link.target}_{link.digest.hex()[:16]}"
+        col_name, col_get, col_del = st.columns([8, 1, 1], vertical_alignment="center")
+        by = f" · {link.actor}" if link.actor else ""
+        col_name.caption(f"{targets.get(link.target, link.target)} · {link.name} · {format_size(link.size)}{by}")
+        if downloads:
+            base, secret = downloads
+            col_get.link_button("⬇", base + sign_download(secret, link.digest, link.name), help="Download")
+        else:
+            # The blob is read only when the download is clicked.
+            col_get.download_button("⬇", data=lambda d=link.digest: get_evidence_store().read(d),
+                                    file_name=link.name, key=f"ev_get_{ref}", help="Download")
+        col_del.button("✕", key=f"ev_del_{ref}", help="Remove from this section",
+                       on_click=on_evidence_detach, args=(link.target, link.digest))
+    uploader_key = f"ev_up_{key}_{st.session_state.get('evidence_nonce', 0)}"
+    col_up, col_to = st.columns([3, 1])
+    col_up.file_uploader("Attach evidence", accept_multiple_files=True, key=uploader_key)
+    col_to.selectbox("Attach to", list(targets), format_func=targets.get, key=f"ev_to_{key}")
+    st.button("Attach", key=f"ev_add_{key}", on_click=on_evidence_attach, args=(key, uploader_key),
+              disabled=not st.session_state.get(uploader_key))
+
+
+def steps_caption(rollup) -> str:
+    resolved, total, failed = rollup
+    return f"{resolved}/{total} audit steps resolved" + (f" · ⚠️ {failed} failed" if failed else "")
+
+
+def visible_chapters(hits: list = None):
+    """Return ``[(chapter, keys or None), …]`` after search hits and sidebar filters.
+
+    ``None`` means the whole chapter; an empty result means nothing to draw.
+    """
+    only_chapter = st.session_state.get("filter_chapter", "all")
+    pending_only = st.session_state.get("filter_pending", False)
+    high_only = st.session_state.get("filter_high", False)
+    progress = st.session_state.progress
+
+    if hits is None:
+        ordered = [(ch, [s["key"] for s in ch["sections"]]) for ch in CHAPTERS]
+        narrowed = False
+    else:
+        # Chapters ordered by their best hit; sections by rank within each chapter.
+        by_chapter = {}
+        for key, _ in hits:
+            by_chapter.setdefault(CATALOGUE.by_key[key]["chapter_id"], []).append(key)
+        chapters = {ch["id"]: ch for ch in CHAPTERS}
+        ordered = [(chapters[ch_id], keys) for ch_id, keys in by_chapter.items()]
+        narrowed = True
+
+    result = []
+    for ch, keys in ordered:
+        if only_chapter != "all" and ch["id"] != only_chapter:
+            continue
+        if pending_only or high_only:
+            keys = [k for k in keys
+                    if not (pending_only and progress.get(k)) and not (high_only and CATALOGUE.by_key[k]["risk"] != "high")]
+            narrowed = True
+        if keys:
+            result.append((ch, tuple(keys) if narrowed else None))
+    return result
+
+
+def render_footer():
     st.markdown(f"""
     <div class="dpdp-footer">
       <div class="f-left">
@@ -786,6 +1000,161 @@ def main():
     """, unsafe_allow_html=True)
 
 
+def main():
+    profile = RunProfile() if profiling_enabled() else NULL_PROFILE
+    st.session_state.profile = profile
+    if profile is not NULL_PROFILE:
+        instrument_context(get_script_run_ctx(), profile)
+        metrics_endpoint()
+
+    st.markdown(css_block(), unsafe_allow_html=True)
+    pull_remote_changes()
+
+    # ── ENGAGEMENT ──
+    with st.sidebar:
+        seed_widget("engagement_input", st.session_state.engagement)
+        st.text_input("Engagement", key="engagement_input", on_change=on_engagement_change,
+                      help="Audit progress is saved per engagement and restored on reload.")
+        st.text_input("Auditor", key="actor", help="Recorded against every change in the engagement's history.")
+        live_sync()
+        analysis_status()
+        idle_check()
+    if session_paused():
+        render_paused()
+        render_footer()
+        return
+
+    with st.sidebar:
+        view = st.radio("View", ["Engagement", "History", "Portfolio", "Plan", "Import"], key="view", horizontal=True)
+
+        if view == "Engagement":
+            # Like the lazy expanders, the link is only built while the popover is open.
+            share = st.popover("🔗 Share snapshot", use_container_width=True, key="share_open", on_change="rerun")
+            if share.open:
+                with share:
+                    st.code(snapshot_link(), language=None, wrap_lines=True)
+                    st.caption("Opens a read-only view of the audit exactly as it stands now.")
+            st.markdown("**Display**")
+            seed_widget("lazy_render", len(CATALOGUE.sections) > LAZY_RENDER_THRESHOLD)
+            lazy = st.toggle("Lazy rendering", key="lazy_render",
+                             help="Build chapter and section bodies only when they are opened, and paginate large chapters.")
+            seed_widget("page_size", DEFAULT_PAGE_SIZE)
+            page_size = st.number_input("Sections per page", min_value=5, max_value=500, step=5, key="page_size",
+                                        disabled=not lazy)
+            st.checkbox("Pending only", key="filter_pending")
+            st.checkbox("High risk only", key="filter_high")
+            chapter_titles = {ch["id"]: ch["title"] for ch in CHAPTERS}
+            st.selectbox("Chapter", ["all", *chapter_titles], key="filter_chapter",
+                         format_func=lambda c: "All chapters" if c == "all" else chapter_titles[c])
+        elif view == "Plan":
+            st.markdown("**Team**")
+            # Widget state is dropped while another view is shown; the team
+            # size is kept under its own key.
+            seed_widget("plan_auditors", st.session_state.get("plan_team", DEFAULT_AUDITORS))
+            st.number_input("Auditors", min_value=1, max_value=500, step=1, key="plan_auditors",
+                            help="Team members working remediation in parallel, five days a week.",
+                            on_change=lambda: st.session_state.update(plan_team=st.session_state.plan_auditors))
+
+    if view == "Portfolio":
+        render_portfolio()
+        render_footer()
+        return
+    if view == "History":
+        render_history()
+        render_footer()
+        return
+    if view == "Plan":
+        render_plan()
+        render_footer()
+        return
+    if view == "Import":
+        render_import()
+        render_footer()
+        return
+
+    # ── HEADER ──
+    st.session_state.pop("stats_dirty", None)
+    stats_slot = st.empty()
+    with profile.phase("header"):
+        render_stats_strip(stats_slot)
+
+    # ── SNAPSHOT ──
+    if "snapshot_error" in st.session_state:
+        st.error(f"Couldn't open the snapshot link: {st.session_state.pop('snapshot_error')}")
+    if read_only():
+        live = bit_layout(CATALOGUE).pack(get_store().load(st.session_state.engagement))
+        differ = (st.session_state.progress.bits ^ live).bit_count()
+        col_msg, col_live = st.columns([5, 1])
+        col_msg.warning(
+            f"📌 Viewing a shared snapshot of **{st.session_state.engagement}** (read-only). "
+            + (f"{differ} section{'s differ' if differ != 1 else ' differs'} from the live engagement." if differ
+               else "It matches the live engagement.")
+        )
+        col_live.button("Return to live", use_container_width=True, on_click=on_leave_snapshot)
+
+    # ── INFO BOX ──
+    st.info(
+        "**DPDP Act 2023 — Internal Audit Checklist**\n\n"
+        f"This tool covers all {len(CATALOGUE.sections)} sections across {len(CHAPTERS)} chapters. Expand each chapter, review the audit procedure, "
+        f"and tick off completed items. Full compliance deadline: **{format_date(DEADLINE)}**."
+    )
+
+    # ── SEARCH ──
+    query = st.text_input("🔍 Search sections", key="search", placeholder="Search titles, descriptions and audit steps…")
+    hits = get_index(CATALOGUE).search(query) if query.strip() else None
+
+    # ── ACTION BUTTONS ──
+    with profile.phase("export"):
+        col_a, col_b, col_fmt, _ = st.columns([1.2, 1.2, 1, 3])
+        with col_a:
+            st.button("↺ Reset All", type="secondary", use_container_width=True, on_click=on_reset_all,
+                      disabled=read_only())
+        with col_fmt:
+            fmt = st.selectbox("Format", list(EXPORT_FORMATS), key="export_format", label_visibility="collapsed",
+                               format_func=lambda f: EXPORT_FORMATS[f][0])
+        with col_b:
+            # Built only when clicked, from the live state, and cached by the
+            # state bitset so re-downloading an unchanged audit is free.
+            progress = st.session_state.progress
+            st.download_button("⬇ Export Report", data=lambda: timed_export(progress.checked, fmt),
+                               file_name=f"DPDP_Audit_Report.{fmt}", mime=EXPORT_FORMATS[fmt][1], use_container_width=True)
+
+    st.markdown("---")
+
+    # ── CHAPTERS & SECTIONS ──
+    chapters_area = st.container()
+
+    # ── SUMMARY TABLE ──
+    st.markdown("---")
+    st.subheader("📊 Compliance Summary by Chapter")
+    summary_slot = st.empty()
+
+    with chapters_area:
+        if hits is not None and not hits:
+            st.caption(f"No sections match “{query.strip()}”.")
+        else:
+            if hits is not None:
+                st.caption(f"{len(hits)} matching section{'s' if len(hits) != 1 else ''}")
+            shown = visible_chapters(hits)
+            if not shown:
+                st.caption("No sections match the current filters.")
+            for ch, keys in shown:
+                render_chapter(ch, stats_slot, summary_slot, keys, hits is not None, lazy, page_size)
+
+    with profile.phase("summary"):
+        render_summary(summary_slot)
+
+    # ── FOOTER ──
+    with profile.phase("footer"):
+        render_footer()
+
+    if profile is not NULL_PROFILE:
+        total = profile.finish({key: st.session_state[key] for key in st.session_state})
+        if os.environ.get("DPDP_METRICS_FILE"):
+            metrics.write_textfile(os.environ["DPDP_METRICS_FILE"])
+        render_perf_panel(profile, total)
+
+
 # ─── RUN ─────────────────────────────────────────────────────────
 if __name__ == "__main__":
     main()
@@ -0,0 +1,202 @@
+"""
+Headless batch audit for the DPDP audit tool.
+
+Reads a directory of per-entity status files, computes completion and
+high-risk gaps for each entity in a process pool, writes one report per
+entity and streams a consolidated CSV as results arrive.
+
+    python dpdp_batch.py STATUS_DIR -o REPORT_DIR [--format txt|csv|jsonl|pdf]
+                         [--zip ARCHIVE] [--workers N] [--catalogue FILE]
+
+With ``--zip`` the per-entity reports (e.g. board-ready PDFs) are written
+into one ZIP archive as each worker finishes, instead of loose files.
+
+Status files are named after the entity (``acme-retail.json``); a second
+file for the same entity (``acme-retail.csv`` beside it) is reported as an
+error rather than overwriting the first one's report:
+
+    JSON — {"ch2-4": true, …} or {"checked": {"ch2-4": true, …}}
+    CSV  — header with ``section_key`` and ``status`` (or ``checked``) columns;
+           status values true/yes/1/done/complete count as done
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from dpdp_catalogue import load_catalogue
+from dpdp_import import is_done
+from dpdp_report import EXPORT_FORMATS, build_export, iter_export, pdf_layout, summarize
+
+STATUS_SUFFIXES = (".json", ".csv")
+
+CONSOLIDATED_FIELDS = ["entity", "total", "done", "pending", "progress_pct", "high_risk_open", "high_risk_gaps", "error"]
+
+
+# ─── STATUS FILES ────────────────────────────────────────────────
+def read_status(path: str) -> dict:
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as fh:
+            doc = json.load(fh)
+        if isinstance(doc, dict) and isinstance(doc.get("checked"), dict):
+            doc = doc["checked"]
+        if not isinstance(doc, dict):
+            raise ValueError(f"expected a JSON object of section statuses, got {type(doc).__name__}")
+        return {key: is_done(value) for key, value in doc.items()}
+
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.DictReader(fh)
+        status_col = "status" if "status" in (reader.fieldnames or ()) else "checked"
+        return {row["section_key"]: is_done(row.get(status_col, "")) for row in reader}
+
+
+def iter_status_files(status_dir: str):
+    with os.scandir(status_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(STATUS_SUFFIXES):
+                yield entry.path
+
+
+def entity_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def unique_entities(paths, duplicates: list):
+    """Yield the first status file per entity; later ones go to ``duplicates`` as (path, first path).
+
+    Names are compared case-folded: reports named after them would collide
+    in a ZIP archive or on a case-insensitive file system.
+    """
+    first = {}
+    for path in paths:
+        seen = first.setdefault(entity_name(path).casefold(), path)
+        if seen is path:
+            yield path
+        else:
+            duplicates.append((path, seen))
+
+
+# ─── WORKER ──────────────────────────────────────────────────────
+_catalogue = None
+
+
+def _init_worker(catalogue_path: str, fmt: str):
+    global _catalogue
+    _catalogue = load_catalogue(catalogue_path)
+    if fmt == "pdf":
+        pdf_layout(_catalogue)
+
+
+def audit_entity(path: str, out_dir: str, fmt: str = "txt", inline: bool = False) -> dict:
+    entity = entity_name(path)
+    try:
+        checked = read_status(path)
+    except (OSError, ValueError, KeyError) as exc:
+        return {"entity": entity, "error": f"{type(exc).__name__}: {exc}"}
+
+    report = None
+    if inline:
+        report = build_export(_catalogue, checked, fmt, entity)
+    else:
+        with open(os.path.join(out_dir, f"{entity}.{fmt}"), "wb") as fh:
+            for chunk in iter_export(_catalogue, checked, fmt, entity):
+                fh.write(chunk)
+
+    summary = summarize(_catalogue, checked)
+    return {
+        "entity": entity,
+        "total": summary["total"],
+        "done": summary["done"],
+        "pending": summary["pending"],
+        "progress_pct": summary["progress_pct"],
+        "high_risk_open": len(summary["high_risk_gaps"]),
+        "high_risk_gaps": " ".join(summary["high_risk_gaps"]),
+        "error": "",
+        "report": report,
+    }
+
+
+def imap_bounded(executor, fn, items, *args, window: int):
+    """Like executor.map, but never holds more than ``window`` tasks in flight.
+
+    Results are yielded in completion order, so memory stays flat however
+    many status files the directory holds.
+    """
+    pending = set()
+    for item in items:
+        pending.add(executor.submit(fn, item, *args))
+        if len(pending) >= window:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    for future in pending:
+        yield future.result()
+
+
+# ─── CLI ─────────────────────────────────────────────────────────
+def run(status_dir: str, out_dir: str, workers: int = None, catalogue_path: str = None, fmt: str = "txt",
+        zip_path: str = None) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    totals = {"entities": 0, "errors": 0, "fully_complete": 0, "high_risk_open": 0}
+    # PDFs are already deflated internally; storing them avoids a second pass.
+    compression = zipfile.ZIP_STORED if fmt == "pdf" else zipfile.ZIP_DEFLATED
+    archive = zipfile.ZipFile(zip_path, "w", compression=compression) if zip_path else None
+
+    with open(os.path.join(out_dir, "consolidated.csv"), "w", newline="", encoding="utf-8") as fh, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(catalogue_path, fmt)) as pool:
+        writer = csv.DictWriter(fh, fieldnames=CONSOLIDATED_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        duplicates = []
+        rows = imap_bounded(pool, audit_entity, unique_entities(iter_status_files(status_dir), duplicates), out_dir,
+                            fmt, archive is not None, window=workers * 4)
+        # Duplicates are known once the directory has been read, by the end of the pool's rows.
+        rows = itertools.chain(rows, ({"entity": entity_name(path), "report": None,
+                                       "error": f"Duplicate entity: {os.path.basename(path)} names the same entity "
+                                                f"as {os.path.basename(seen)}, which was reported"}
+                                      for path, seen in duplicates))
+        for row in rows:
+            report = row.pop("report", None)
+            if report is not None:
+                archive.writestr(f"{row['entity']}.{fmt}", report)
+            writer.writerow(row)
+            totals["entities"] += 1
+            if row["error"]:
+                totals["errors"] += 1
+                print(f"  ! {row['entity']}: {row['error']}", file=sys.stderr)
+                continue
+            totals["fully_complete"] += row["pending"] == 0
+            totals["high_risk_open"] += row["high_risk_open"]
+            if totals["entities"] % 500 == 0:
+                print(f"  … {totals['entities']} entities", file=sys.stderr)
+    if archive is not None:
+        archive.close()
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch DPDP Act 2023 audit over per-entity status files.")
+    parser.add_argument("status_dir", help="directory of <entity>.json / <entity>.csv status files")
+    parser.add_argument("-o", "--out", default="reports", help="output directory (default: reports)")
+    parser.add_argument("-f", "--format", default="txt", choices=list(EXPORT_FORMATS), help="per-entity report format (default: txt)")
+    parser.add_argument("-z", "--zip", default=None, help="write per-entity reports into this ZIP archive")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--catalogue", default=None, help="catalogue JSON (default: bundled DPDP Act 2023)")
+    args = parser.parse_args(argv)
+
+    totals = run(args.status_dir, args.out, args.workers, args.catalogue, args.format, args.zip)
+    print(
+        f"{totals['entities']} entities audited — {totals['fully_complete']} fully complete, "
+        f"{totals['high_risk_open']} open high-risk sections, {totals['errors']} errors. "
+        f"Reports in {args.zip or args.out + '/'}"
+    )
+    return 1 if totals["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Versioned checklist catalogue for the DPDP audit tool.
+
+The chapter/section/step data lives in a JSON file under ``catalogue/``.
+It is parsed once per process into an immutable, indexed Catalogue that
+every session shares:
+
+    catalogue.chapters          — read-only chapter mappings, in order
+    catalogue.sections          — read-only section mappings, in order
+    catalogue.by_key[key]       — "ch{n}-{num}" → section
+    catalogue.chapter_slice[id] — chapter id → slice into ``sections``
+    catalogue.by_risk[risk]     — risk level → tuple of sections
+
+Audit steps are addressed as "{section key}/{n}", n counting from 1 as the
+steps are numbered on screen (see ``step_key``).
+
+Chapter and section mappings keep the original dict shape (``ch["id"]``,
+``sec["steps"]`` …) so existing callers treat them like the old literal.
+A chapter's optional ``requires`` lists earlier chapters whose sections
+should be remediated first (used by the remediation planner).
+
+Regenerate the static HTML build from the same source with:
+
+    python dpdp_catalogue.py build-html
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+from types import MappingProxyType
+
+CATALOGUE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalogue")
+DEFAULT_CATALOGUE = os.path.join(CATALOGUE_DIR, "dpdp_act_2023.json")
+HTML_BUILD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "DPDP_Audit_Tool.html")
+
+RISK_LEVELS = ("high", "medium", "low")
+STEP_SEP = "/"
+
+
+@dataclass(frozen=True, eq=False)
+class Catalogue:
+    name: str
+    version: str
+    digest: str
+    chapters: tuple
+    sections: tuple
+    by_key: MappingProxyType
+    chapter_slice: MappingProxyType
+    by_risk: MappingProxyType
+
+    @property
+    def keys(self) -> tuple:
+        return tuple(s["key"] for s in self.sections)
+
+
+def chapter_label(ch) -> str:
+    """Short chapter name for chart and table columns.
+
+    "Chapter II — Obligations of Data Fiduciary" -> "Chapter II"
+    """
+    return ch["title"].split(" — ")[0]
+
+
+def step_key(section_key: str, n: int) -> str:
+    """Key for audit step ``n`` (1-based) of a section: "ch2-4/1"."""
+    return f"{section_key}{STEP_SEP}{n}"
+
+
+def is_step_key(key: str) -> bool:
+    return STEP_SEP in key
+
+
+# ─── PARSING ─────────────────────────────────────────────────────
+def parse_catalogue(raw: bytes) -> Catalogue:
+    doc = json.loads(raw)
+    chapters, sections, by_risk, chapter_slice = [], [], {}, {}
+    for ch in doc["chapters"]:
+        for req in ch.get("requires", ()):
+            # Only earlier chapters may be required, which keeps the graph acyclic.
+            if req not in chapter_slice:
+                raise ValueError(f"{ch['id']}: requires unknown or later chapter {req!r}")
+        start = len(sections)
+        ch_sections = []
+        for sec in ch["sections"]:
+            if sec["risk"] not in RISK_LEVELS:
+                raise ValueError(f"{ch['id']}-{sec['num']}: unknown risk level {sec['risk']!r}")
+            frozen = MappingProxyType({
+                "key": f"{ch['id']}-{sec['num']}",
+                "chapter_id": ch["id"],
+                "num": sec["num"],
+                "title": sec["title"],
+                "risk": sec["risk"],
+                "desc": sec["desc"],
+                "steps": tuple(sec["steps"]),
+            })
+            ch_sections.append(frozen)
+            by_risk.setdefault(sec["risk"], []).append(frozen)
+        sections.extend(ch_sections)
+        chapter_slice[ch["id"]] = slice(start, len(sections))
+        chapters.append(MappingProxyType({
+            "id": ch["id"],
+            "title": ch["title"],
+            "requires": tuple(ch.get("requires", ())),
+            "sections": tuple(ch_sections),
+        }))
+
+    by_key = {s["key"]: s for s in sections}
+    if len(by_key) != len(sections):
+        raise ValueError("Duplicate section keys in catalogue")
+
+    return Catalogue(
+        name=doc.get("name", ""),
+        version=str(doc.get("version", "")),
+        digest=hashlib.sha256(raw).hexdigest()[:16],
+        chapters=tuple(chapters),
+        sections=tuple(sections),
+        by_key=MappingProxyType(by_key),
+        chapter_slice=MappingProxyType(chapter_slice),
+        by_risk=MappingProxyType({risk: tuple(secs) for risk, secs in by_risk.items()}),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _load(path: str) -> Catalogue:
+    with open(path, "rb") as fh:
+        return parse_catalogue(fh.read())
+
+
+def load_catalogue(path: str = None) -> Catalogue:
+    """Return the process-wide Catalogue for ``path`` (default: $DPDP_CATALOGUE or the bundled Act)."""
+    path = path or os.environ.get("DPDP_CATALOGUE") or DEFAULT_CATALOGUE
+    return _load(os.path.abspath(path))
+
+
+# ─── HTML BUILD ──────────────────────────────────────────────────
+def render_js_chapters(catalogue: Catalogue) -> str:
+    """Emit the ``const CHAPTERS`` literal used by DPDP_Audit_Tool.html."""
+    q = lambda text: json.dumps(text, ensure_ascii=False)
+    out = ["const CHAPTERS = ["]
+    for ci, ch in enumerate(catalogue.chapters):
+        out += ["  {", f"    id: {q(ch['id'])},", f"    title: {q(ch['title'])},", "    sections: ["]
+        for si, sec in enumerate(ch["sections"]):
+            out += [
+                "      {",
+                f"        num: {q(sec['num'])}, title: {q(sec['title'])},",
+                f"        risk: {q(sec['risk'])},",
+                f"        desc: {q(sec['desc'])},",
+                "        auditSteps: [",
+                ",\n".join(f"          {q(step)}" for step in sec["steps"]),
+                "        ]",
+                "      }," if si < len(ch["sections"]) - 1 else "      }",
+            ]
+        out += ["    ]", "  }," if ci < len(catalogue.chapters) - 1 else "  }"]
+    out.append("];")
+    return "\n".join(out)
+
+
+def build_html(catalogue: Catalogue, html_path: str = HTML_BUILD) -> bool:
+    """Rewrite the CHAPTERS block of the HTML build; return True if it changed."""
+    with open(html_path, encoding="utf-8") as fh:
+        html = fh.read()
+    block = re.compile(r"const CHAPTERS = \[.*?\n\];", re.S)
+    if not block.search(html):
+        raise ValueError(f"No CHAPTERS block found in {html_path}")
+    updated = block.sub(lambda _: render_js_chapters(catalogue), html, count=1)
+    if updated == html:
+        return False
+    with open(html_path, "w", encoding="utf-8") as fh:
+        fh.write(updated)
+    return True
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["build-html"]:
+        sys.exit("usage: python dpdp_catalogue.py build-html [catalogue.json]")
+    cat = load_catalogue(sys.argv[2] if len(sys.argv) > 2 else None)
+    changed = build_html(cat)
+    print(f"{HTML_BUILD}: {'updated' if changed else 'up to date'} ({cat.name} v{cat.version}, {len(cat.sections)} sections)")
@@ -0,0 +1,200 @@
+"""
+Compact completion-state encoding for the DPDP audit tool.
+
+A completion state is a bitset in catalogue order: bit ``i`` of a Python
+int is set when ``catalogue.sections[i]`` is done. Sessions hold that int
+instead of a dict of string keys, equality is ``==``, and a diff is one XOR.
+
+BitLayout holds the per-catalogue data every session shares: the key → bit
+index and masks per chapter, risk level and chapter × risk level, so
+counts are ``(bits & mask).bit_count()``, plus the static columns of the
+chapter summary.
+
+The wire form, used for shareable ``?s=`` snapshot links, is
+
+    byte 0      format version (high nibble) | payload mode (low nibble)
+    bytes 1-4   first 4 bytes of the catalogue digest
+    bytes 5-    payload
+
+and the encoder keeps whichever payload is shortest:
+
+    RAW           the bitset, little-endian
+    ZLIB          the bitset, deflated
+    SPARSE_SET    varint gaps between set bits (few sections done)
+    SPARSE_CLEAR  varint gaps between clear bits (nearly all done)
+
+A state from another catalogue version is rejected rather than misread.
+"""
+
+import base64
+import binascii
+import functools
+import zlib
+
+from dpdp_catalogue import RISK_LEVELS, Catalogue
+
+FORMAT_VERSION = 1
+RAW, ZLIB, SPARSE_SET, SPARSE_CLEAR = range(4)
+HEADER_SIZE = 5
+
+_layouts = {}   # catalogue digest -> BitLayout, for unpickling sessions
+
+
+# ─── LAYOUT ──────────────────────────────────────────────────────
+class BitLayout:
+    def __init__(self, catalogue: Catalogue):
+        self.digest = catalogue.digest
+        self.keys = catalogue.keys
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.size = len(self.keys)
+        self.nbytes = (self.size + 7) // 8
+        self.full = (1 << self.size) - 1
+
+        self.chapter_mask = {}
+        for ch_id, span in catalogue.chapter_slice.items():
+            self.chapter_mask[ch_id] = ((1 << span.stop) - 1) ^ ((1 << span.start) - 1)
+        self.risk_mask = {
+            risk: self.pack({sec["key"]: True for sec in catalogue.by_risk.get(risk, ())}) for risk in RISK_LEVELS
+        }
+        self.chapter_risk_mask = {
+            (ch_id, risk): ch_mask & risk_mask
+            for ch_id, ch_mask in self.chapter_mask.items()
+            for risk, risk_mask in self.risk_mask.items()
+        }
+
+        # Static columns of the engagement chapter summary, and the masks its counts come from.
+        self.chapter_titles = tuple(ch["title"] for ch in catalogue.chapters)
+        self.chapter_masks = tuple(self.chapter_mask[ch["id"]] for ch in catalogue.chapters)
+        self.chapter_high_masks = tuple(self.chapter_risk_mask[(ch["id"], "high")] for ch in catalogue.chapters)
+        self.chapter_sizes = tuple(mask.bit_count() for mask in self.chapter_masks)
+        self.chapter_high = tuple(mask.bit_count() for mask in self.chapter_high_masks)
+
+    def pack(self, checked: dict) -> int:
+        """{key: bool} -> bitset; unknown keys are ignored."""
+        raw = bytearray(self.nbytes)
+        for key, value in checked.items():
+            i = self.index.get(key)
+            if value and i is not None:
+                raw[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(raw, "little")
+
+    def positions(self, bits: int) -> list:
+        """Indices of the set bits, ascending."""
+        out = []
+        for b, byte in enumerate(bits.to_bytes(self.nbytes, "little")):
+            if byte:
+                base = b << 3
+                out.extend(base + j for j in range(8) if byte >> j & 1)
+        return out
+
+    def unpack(self, bits: int) -> dict:
+        checked = dict.fromkeys(self.keys, False)
+        for i in self.positions(bits):
+            checked[self.keys[i]] = True
+        return checked
+
+    def diff(self, old: int, new: int) -> dict:
+        """{key: value in ``new``} for every section that differs."""
+        return {self.keys[i]: bool(new >> i & 1) for i in self.positions(old ^ new)}
+
+
+@functools.lru_cache(maxsize=None)
+def bit_layout(catalogue: Catalogue) -> BitLayout:
+    layout = BitLayout(catalogue)
+    _layouts[layout.digest] = layout
+    return layout
+
+
+def layout_for_digest(digest: str) -> BitLayout:
+    try:
+        return _layouts[digest]
+    except KeyError:
+        raise ValueError(f"No catalogue loaded with digest {digest}") from None
+
+
+# ─── WIRE FORMAT ─────────────────────────────────────────────────
+def _varints(values) -> bytes:
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append(value & 0x7F | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def _read_varints(data: bytes) -> list:
+    values, value, shift = [], 0, 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value, shift = 0, 0
+    if shift:
+        raise ValueError("Truncated state payload")
+    return values
+
+
+def _gaps(positions: list) -> list:
+    return [pos - prev - 1 for prev, pos in zip([-1, *positions], positions)]
+
+
+def encode(layout: BitLayout, bits: int) -> bytes:
+    raw = bits.to_bytes(layout.nbytes, "little")
+    candidates = [
+        (RAW, raw),
+        (ZLIB, zlib.compress(raw, 9)),
+        (SPARSE_SET, _varints(_gaps(layout.positions(bits)))),
+        (SPARSE_CLEAR, _varints(_gaps(layout.positions(bits ^ layout.full)))),
+    ]
+    mode, payload = min(candidates, key=lambda c: len(c[1]))
+    return bytes([FORMAT_VERSION << 4 | mode]) + bytes.fromhex(layout.digest[:8]) + payload
+
+
+def decode(layout: BitLayout, data: bytes) -> int:
+    if len(data) < HEADER_SIZE:
+        raise ValueError("State is too short")
+    version, mode = data[0] >> 4, data[0] & 0x0F
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported state format version {version}")
+    if data[1:HEADER_SIZE] != bytes.fromhex(layout.digest[:8]):
+        raise ValueError("State was saved against a different catalogue version")
+    payload = data[HEADER_SIZE:]
+
+    if mode in (RAW, ZLIB):
+        if mode == ZLIB:
+            try:
+                # Never inflate past one byte more than a valid bitset needs.
+                payload = zlib.decompressobj().decompress(payload, layout.nbytes + 1)
+            except zlib.error as exc:
+                raise ValueError(f"Corrupt state payload: {exc}") from None
+        bits = int.from_bytes(payload, "little")
+    elif mode in (SPARSE_SET, SPARSE_CLEAR):
+        bits, pos = 0, -1
+        for gap in _read_varints(payload):
+            pos += gap + 1
+            if pos >= layout.size:
+                raise ValueError("State has more sections than the catalogue")
+            bits |= 1 << pos
+        if mode == SPARSE_CLEAR:
+            bits ^= layout.full
+    else:
+        raise ValueError(f"Unknown state payload mode {mode}")
+    if bits >> layout.size:
+        raise ValueError("State has more sections than the catalogue")
+    return bits
+
+
+def to_token(layout: BitLayout, bits: int) -> str:
+    """URL-safe text form of ``encode`` (base64url, no padding)."""
+    return base64.urlsafe_b64encode(encode(layout, bits)).rstrip(b"=").decode("ascii")
+
+
+def from_token(layout: BitLayout, token: str) -> int:
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        raise ValueError("Snapshot link is not valid base64") from None
+    return decode(layout, data)
@@ -0,0 +1,473 @@
+"""
+Content-addressed evidence store for the DPDP audit tool.
+
+Documentary evidence (consent records, processing registers, breach logs)
+is attached to a section or to one of its audit steps, per engagement.
+Files are stored once by content:
+
+    {root}/blobs/ab/cdef…    the file, named by its SHA-256
+    {root}/index.db          SQLite index linking blobs to section keys
+
+Text analysis results (see dpdp_analysis) are kept per blob too.
+
+Identical files attached anywhere — a group-wide policy uploaded for every
+entity — share one blob. Hashing streams in CHUNK_SIZE pieces; files on
+disk at or above MMAP_THRESHOLD are hashed through a memory map, so memory
+stays flat however large the file. A file is hashed before anything is
+written, and a blob the store already holds is never copied again.
+
+The index keeps digests as 32-byte blobs in WITHOUT ROWID tables: one row
+per distinct blob and one per (engagement, target, blob) link.
+
+    python dpdp_evidence.py add ENGAGEMENT TARGET FILE… [--actor NAME]
+    python dpdp_evidence.py ingest DIR [--actor NAME]   (DIR/engagement/section/[step-N/]files)
+    python dpdp_evidence.py stats | gc | verify
+
+``add`` and ``ingest`` only attach to sections and audit steps of the
+catalogue (``--catalogue``, default the bundled Act).
+
+Downloads can be streamed from disk CHUNK_SIZE at a time by a small HTTP
+endpoint (``serve_downloads``) rather than read whole into the web
+server's memory. Its links are signed with a secret and expire, so one
+only works for a blob someone was shown; every replica serving the same
+store needs the same secret.
+"""
+
+import argparse
+import hashlib
+import hmac
+import mmap
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlencode, urlsplit
+
+from dpdp_catalogue import STEP_SEP, Catalogue, load_catalogue, step_key
+from dpdp_steps import step_layout
+
+DEFAULT_EVIDENCE_DIR = "dpdp_evidence"
+CHUNK_SIZE = 1 << 20          # 1 MiB
+MMAP_THRESHOLD = 16 << 20     # files at least this large are hashed via mmap
+_MADV_DONTNEED = getattr(mmap, "MADV_DONTNEED", None)   # not on Windows
+STEP_DIR_RE = re.compile(r"step-\d+")
+DOWNLOAD_PATH_RE = re.compile(r"/evidence/([0-9a-f]{64})")
+LINK_TTL = 3600   # seconds; a signed download link stays valid for one to two of these
+
+# ``target`` is a section key ("ch2-4") or step key ("ch2-4/1").
+Link = namedtuple("Link", "engagement target digest name size actor added_at")
+Blob = namedtuple("Blob", "digest size stored")   # ``stored``: False when it was already held
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evidence_blobs (
+    digest      BLOB    PRIMARY KEY,   -- 32-byte SHA-256
+    size        INTEGER NOT NULL,
+    stored_at   REAL    NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS evidence_links (
+    engagement  TEXT    NOT NULL,
+    target      TEXT    NOT NULL,
+    digest      BLOB    NOT NULL REFERENCES evidence_blobs (digest),
+    name        TEXT    NOT NULL,
+    actor       TEXT    NOT NULL DEFAULT '',
+    added_at    REAL    NOT NULL,
+    PRIMARY KEY (engagement, target, digest)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS evidence_links_by_digest ON evidence_links (digest);
+
+CREATE TABLE IF NOT EXISTS evidence_terms (
+    digest      BLOB    NOT NULL REFERENCES evidence_blobs (digest),
+    version     TEXT    NOT NULL,      -- analyser and catalogue it was matched against
+    status      TEXT    NOT NULL,      -- ok | empty | unsupported | error
+    terms       TEXT    NOT NULL,      -- space-separated catalogue terms found
+    analysed_at REAL    NOT NULL,
+    PRIMARY KEY (digest, version)
+) WITHOUT ROWID;
+"""
+
+
+# ─── HASHING ─────────────────────────────────────────────────────
+def _chunks(view: memoryview):
+    for start in range(0, len(view), CHUNK_SIZE):
+        yield view[start:start + CHUNK_SIZE]
+
+
+def hash_file(path: str) -> tuple:
+    """Return (sha256 digest bytes, size) for a file on disk."""
+    h = hashlib.sha256()
+    size = os.path.getsize(path)
+    with open(path, "rb") as fh:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if _MADV_DONTNEED is not None:
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                with memoryview(mm) as view:
+                    for start in range(0, size, CHUNK_SIZE):
+                        with view[start:start + CHUNK_SIZE] as chunk:
+                            h.update(chunk)
+                        if _MADV_DONTNEED is not None:
+                            # Hand hashed pages back so residency stays at about one chunk.
+                            mm.madvise(_MADV_DONTNEED, start, min(CHUNK_SIZE, size - start))
+        else:
+            for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+                h.update(chunk)
+    return h.digest(), size
+
+
+# ─── STORE ───────────────────────────────────────────────────────
+class EvidenceStore:
+    def __init__(self, root: str = DEFAULT_EVIDENCE_DIR):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+
+    def blob_path(self, digest: bytes) -> str:
+        hexdigest = digest.hex()
+        return os.path.join(self.blob_dir, hexdigest[:2], hexdigest[2:])
+
+    def has_blob(self, digest: bytes) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM evidence_blobs WHERE digest = ?", (digest,)).fetchone() is not None
+
+    # ── Writing blobs ──
+    def put_file(self, path: str) -> Blob:
+        """Store a file from disk; a file already held is hashed but not copied."""
+        digest, size = hash_file(path)
+        if self.has_blob(digest):
+            return Blob(digest, size, False)
+        fd, tmp = tempfile.mkstemp(dir=self.tmp_dir)
+        os.close(fd)
+        shutil.copyfile(path, tmp)
+        return self._commit(tmp, digest, size)
+
+    def put_stream(self, source) -> Blob:
+        """Store a binary file object, hashing and spooling it in CHUNK_SIZE pieces.
+
+        Objects that expose their buffer (BytesIO, Streamlit uploads) are
+        hashed in place and only written out when the blob is new.
+        """
+        if hasattr(source, "getbuffer"):
+            view = source.getbuffer()
+            h = hashlib.sha256()
+            for chunk in _chunks(view):
+                h.update(chunk)
+            digest, size = h.digest(), len(view)
+            if self.has_blob(digest):
+                return Blob(digest, size, False)
+            fd, tmp = tempfile.mkstemp(dir=self.tmp_dir)
+            with os.fdopen(fd, "wb") as out:
+                for chunk in _chunks(view):
+                    out.write(chunk)
+            return self._commit(tmp, digest, size)
+
+        h, size = hashlib.sha256(), 0
+        fd, tmp = tempfile.mkstemp(dir=self.tmp_dir)
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        digest = h.digest()
+        if self.has_blob(digest):
+            os.remove(tmp)
+            return Blob(digest, size, False)
+        return self._commit(tmp, digest, size)
+
+    def _commit(self, tmp: str, digest: bytes, size: int) -> Blob:
+        path = self.blob_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The rename is atomic: a blob path either holds the whole file or nothing.
+        os.replace(tmp, path)
+        with self._lock:
+            cur = self._conn.execute("INSERT OR IGNORE INTO evidence_blobs (digest, size, stored_at) VALUES (?, ?, ?)",
+                                     (digest, size, time.time()))
+        return Blob(digest, size, cur.rowcount == 1)
+
+    # ── Links ──
+    def attach(self, engagement: str, target: str, blob: Blob, name: str, actor: str = "") -> bool:
+        """Link a stored blob to a section or step; False if it was already linked there."""
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO evidence_links (engagement, target, digest, name, actor, added_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (engagement, target, blob.digest, os.path.basename(name), actor, time.time()),
+            )
+        return cur.rowcount == 1
+
+    def detach(self, engagement: str, target: str, digest: bytes):
+        """Unlink; the blob stays until ``gc`` finds it unreferenced."""
+        with self._lock:
+            self._conn.execute("DELETE FROM evidence_links WHERE engagement = ? AND target = ? AND digest = ?",
+                               (engagement, target, digest))
+
+    def links(self, engagement: str, section_key: str = None) -> list:
+        """Links for an engagement, or for one section and its steps."""
+        query = ("SELECT l.engagement, l.target, l.digest, l.name, b.size, l.actor, l.added_at "
+                 "FROM evidence_links l JOIN evidence_blobs b USING (digest) WHERE l.engagement = ?")
+        args = [engagement]
+        if section_key:
+            # The primary key is ordered by target, so this is a range scan.
+            query += " AND (l.target = ? OR (l.target >= ? AND l.target < ?))"
+            args += [section_key, section_key + STEP_SEP, section_key + chr(ord(STEP_SEP) + 1)]
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY l.target, l.added_at", args).fetchall()
+        return [Link(*row) for row in rows]
+
+    def read(self, digest: bytes) -> bytes:
+        with open(self.blob_path(digest), "rb") as fh:
+            return fh.read()
+
+    # ── Analysis results ──
+    def unanalysed(self, version: str) -> list:
+        """[(digest, a file name it is linked under)] for linked blobs not yet analysed at ``version``."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT l.digest, MIN(l.name) FROM evidence_links l WHERE NOT EXISTS "
+                "(SELECT 1 FROM evidence_terms t WHERE t.digest = l.digest AND t.version = ?) "
+                "GROUP BY l.digest ORDER BY MIN(l.added_at)", (version,)
+            ).fetchall()
+
+    def record_analysis(self, digest: bytes, version: str, status: str, terms):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO evidence_terms (digest, version, status, terms, analysed_at) "
+                "VALUES (?, ?, ?, ?, ?)", (digest, version, status, " ".join(sorted(terms)), time.time()))
+
+    def analyses(self, digests, version: str) -> dict:
+        """{digest: (status, frozenset of terms)} for those of ``digests`` analysed at ``version``."""
+        digests = list(set(digests))
+        if not digests:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT digest, status, terms FROM evidence_terms WHERE version = ? "
+                f"AND digest IN ({', '.join('?' * len(digests))})", [version, *digests]).fetchall()
+        return {digest: (status, frozenset(terms.split())) for digest, status, terms in rows}
+
+    # ── Maintenance ──
+    def stats(self) -> dict:
+        """Stored bytes against the bytes attached, i.e. what deduplication saves."""
+        with self._lock:
+            blobs, stored = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM evidence_blobs").fetchone()
+            links, logical = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM evidence_links l JOIN evidence_blobs b USING (digest)"
+            ).fetchone()
+        return {"blobs": blobs, "stored_bytes": stored, "links": links, "linked_bytes": logical,
+                "dedup_ratio": round(logical / stored, 2) if stored else None}
+
+    def gc(self) -> int:
+        """Delete blobs no link refers to; return how many."""
+        with self._lock:
+            orphans = [r[0] for r in self._conn.execute(
+                "SELECT digest FROM evidence_blobs WHERE digest NOT IN (SELECT digest FROM evidence_links)"
+            )]
+            self._conn.executemany("DELETE FROM evidence_terms WHERE digest = ?", [(d,) for d in orphans])
+            self._conn.executemany("DELETE FROM evidence_blobs WHERE digest = ?", [(d,) for d in orphans])
+        for digest in orphans:
+            try:
+                os.remove(self.blob_path(digest))
+            except FileNotFoundError:
+                pass
+        return len(orphans)
+
+    def verify(self) -> list:
+        """Re-hash every blob; return the digests that are missing or corrupt."""
+        with self._lock:
+            digests = [r[0] for r in self._conn.execute("SELECT digest FROM evidence_blobs")]
+        bad = []
+        for digest in digests:
+            path = self.blob_path(digest)
+            if not os.path.exists(path) or hash_file(path)[0] != digest:
+                bad.append(digest)
+        return bad
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def open_evidence_store(path: str = None) -> EvidenceStore:
+    """The store at ``path`` or ``$DPDP_EVIDENCE_DIR``."""
+    return EvidenceStore(path or os.environ.get("DPDP_EVIDENCE_DIR", DEFAULT_EVIDENCE_DIR))
+
+
+# ─── DOWNLOADS ───────────────────────────────────────────────────
+def _signature(secret: bytes, digest: bytes, name: str, expires: int) -> str:
+    message = b"\0".join((digest, name.encode(), str(expires).encode()))
+    return hmac.new(secret, message, hashlib.sha256).hexdigest()
+
+
+def sign_download(secret: bytes, digest: bytes, name: str) -> str:
+    """Signed path and query downloading blob ``digest`` as ``name``.
+
+    The expiry is rounded to a LINK_TTL boundary, so a page redrawn within
+    the hour carries the same link.
+    """
+    expires = (int(time.time()) // LINK_TTL + 2) * LINK_TTL
+    query = urlencode({"name": name, "exp": expires, "sig": _signature(secret, digest, name, expires)})
+    return f"/evidence/{digest.hex()}?{query}"
+
+
+class _DownloadHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        match = DOWNLOAD_PATH_RE.fullmatch(url.path)
+        query = parse_qs(url.query)
+        try:
+            digest = bytes.fromhex(match.group(1))
+            name, expires, sig = query["name"][0], int(query["exp"][0]), query["sig"][0]
+        except (AttributeError, KeyError, ValueError):
+            self.send_error(404)
+            return
+        if expires < time.time() or not hmac.compare_digest(sig, _signature(self.server.secret, digest, name, expires)):
+            self.send_error(403)
+            return
+        try:
+            fh = open(self.server.store.blob_path(digest), "rb")
+        except FileNotFoundError:
+            self.send_error(404)
+            return
+        with fh:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(os.fstat(fh.fileno()).st_size))
+            self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(name)}")
+            self.send_header("X-Content-Type-Options", "nosniff")
+            self.end_headers()
+            try:
+                shutil.copyfileobj(fh, self.wfile, CHUNK_SIZE)
+            except (BrokenPipeError, ConnectionResetError):
+                pass   # the browser cancelled the download
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_downloads(store: EvidenceStore, port: int, secret: bytes, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Stream signed blob downloads (see ``sign_download``) from a daemon thread on a local port."""
+    server = ThreadingHTTPServer((host, port), _DownloadHandler)
+    server.store, server.secret = store, secret
+    threading.Thread(target=server.serve_forever, daemon=True, name="dpdp-evidence").start()
+    return server
+
+
+# ─── CLI ─────────────────────────────────────────────────────────
+def format_size(n: int) -> str:
+    if n < 1024:
+        return f"{n} B"
+    for unit in ("KB", "MB", "GB", "TB"):
+        n /= 1024
+        if n < 1024 or unit == "TB":
+            return f"{n:.1f} {unit}"
+
+
+def is_target(catalogue: Catalogue, target: str) -> bool:
+    """Whether ``target`` is a section key or audit step key of ``catalogue``."""
+    return target in catalogue.by_key or target in step_layout(catalogue).groups
+
+
+def ingest(store: EvidenceStore, root: str, catalogue: Catalogue, actor: str = "") -> dict:
+    """Attach every file under ``root/engagement/section key/``; return counts.
+
+    Files in a ``step-N`` folder under the section go to that audit step.
+    The whole tree is checked first: a folder that is not a section or step
+    of ``catalogue`` raises ValueError before anything is attached.
+    """
+    files = []   # (engagement, target, path)
+    for engagement in sorted(os.listdir(root)):
+        eng_dir = os.path.join(root, engagement)
+        if not os.path.isdir(eng_dir):
+            continue
+        for section in sorted(os.listdir(eng_dir)):
+            section_dir = os.path.join(eng_dir, section)
+            for dirpath, _, names in os.walk(section_dir):
+                top = os.path.relpath(dirpath, section_dir).split(os.sep)[0]
+                target = step_key(section, int(top[5:])) if STEP_DIR_RE.fullmatch(top) else section
+                files.extend((engagement, target, os.path.join(dirpath, name)) for name in sorted(names))
+    unknown = sorted({target for _, target, _ in files if not is_target(catalogue, target)})
+    if unknown:
+        raise ValueError(f"Not sections or audit steps of the catalogue: {', '.join(unknown)}")
+
+    totals = {"files": 0, "new_blobs": 0, "bytes": 0, "new_bytes": 0}
+    for engagement, target, path in files:
+        blob = store.put_file(path)
+        store.attach(engagement, target, blob, path, actor)
+        totals["files"] += 1
+        totals["bytes"] += blob.size
+        if blob.stored:
+            totals["new_blobs"] += 1
+            totals["new_bytes"] += blob.size
+    return totals
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the DPDP audit evidence store.")
+    parser.add_argument("--root", default=None, help="store directory (default: $DPDP_EVIDENCE_DIR or dpdp_evidence)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="attach files to a section or step")
+    add.add_argument("engagement")
+    add.add_argument("target", help='section key ("ch2-4") or step key ("ch2-4/1")')
+    add.add_argument("files", nargs="+")
+    add.add_argument("--actor", default="")
+    ing = sub.add_parser("ingest", help="attach a tree laid out as DIR/engagement/section/[step-N/]files")
+    ing.add_argument("dir")
+    ing.add_argument("--actor", default="")
+    sub.add_parser("stats", help="blob and link counts, and the space deduplication saves")
+    sub.add_parser("gc", help="delete blobs nothing links to")
+    sub.add_parser("verify", help="re-hash every blob")
+    parser.add_argument("--catalogue", default=None, help="catalogue JSON (default: bundled DPDP Act 2023)")
+    args = parser.parse_args(argv)
+
+    catalogue = load_catalogue(args.catalogue)
+    if args.command == "add" and not is_target(catalogue, args.target):
+        parser.error(f"{args.target!r} is not a section or audit step of the catalogue")
+    store = open_evidence_store(args.root)
+    try:
+        if args.command == "add":
+            for path in args.files:
+                blob = store.put_file(path)
+                store.attach(args.engagement, args.target, blob, path, args.actor)
+                print(f"{blob.digest.hex()[:12]}  {format_size(blob.size):>10}  {'stored' if blob.stored else 'dedup '}  {path}")
+        elif args.command == "ingest":
+            start = time.perf_counter()
+            try:
+                totals = ingest(store, args.dir, catalogue, args.actor)
+            except ValueError as exc:
+                parser.error(str(exc))
+            print(f"{totals['files']} files, {format_size(totals['bytes'])} attached; {totals['new_blobs']} new blobs, "
+                  f"{format_size(totals['new_bytes'])} written in {time.perf_counter() - start:.1f}s")
+        elif args.command == "stats":
+            stats = store.stats()
+            print(f"{stats['blobs']} blobs, {format_size(stats['stored_bytes'])} stored; {stats['links']} links, "
+                  f"{format_size(stats['linked_bytes'])} attached (dedup ×{stats['dedup_ratio'] or 1})")
+        elif args.command == "gc":
+            print(f"Removed {store.gc()} unreferenced blobs")
+        elif args.command == "verify":
+            bad = store.verify()
+            for digest in bad:
+                print(f"missing or corrupt: {digest.hex()}")
+            return 1 if bad else 0
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
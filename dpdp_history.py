@@ -0,0 +1,64 @@
+"""
+Progress-over-time views for the DPDP audit tool.
+
+Burndowns are computed from the store's snapshots (plus the live state as
+the final point), never by replaying the event log, so a chart over months
+of activity costs one pass over a few hundred snapshots. Each point counts
+the sections still pending, by chapter and by risk level.
+"""
+
+from datetime import datetime
+
+from dpdp_catalogue import RISK_LEVELS, Catalogue, chapter_label, is_step_key
+
+
+def burndown(catalogue: Catalogue, points: list) -> tuple:
+    """Return (by_chapter, by_risk) row lists for ``points`` of (ts, checked keys).
+
+    Rows are dicts keyed by ``time`` and one column per chapter or risk
+    level, ready for a line chart.
+    """
+    chapter_totals = {ch["id"]: len(ch["sections"]) for ch in catalogue.chapters}
+    risk_totals = {risk: len(catalogue.by_risk.get(risk, ())) for risk in RISK_LEVELS}
+    labels = {ch["id"]: chapter_label(ch) for ch in catalogue.chapters}
+
+    by_chapter, by_risk = [], []
+    for ts, checked in points:
+        ch_done = dict.fromkeys(chapter_totals, 0)
+        risk_done = dict.fromkeys(risk_totals, 0)
+        for key in checked:
+            sec = catalogue.by_key.get(key)
+            if sec is None:
+                continue
+            ch_done[sec["chapter_id"]] += 1
+            if sec["risk"] in risk_done:
+                risk_done[sec["risk"]] += 1
+        when = datetime.fromtimestamp(ts)
+        by_chapter.append({"time": when, **{labels[c]: chapter_totals[c] - ch_done[c] for c in chapter_totals}})
+        by_risk.append({"time": when, **{r.capitalize(): risk_totals[r] - risk_done[r] for r in risk_totals}})
+    return by_chapter, by_risk
+
+
+def history_points(store, engagement: str, checked: dict, now: float) -> list:
+    """Snapshot points for ``engagement`` followed by its live state at ``now``."""
+    points = [(snap.ts, snap.checked) for snap in store.snapshots(engagement)]
+    points.append((now, [key for key, value in checked.items() if value]))
+    return points
+
+
+def activity_rows(events: list) -> list:
+    """Summarise events for a table, most recent first."""
+    rows = []
+    for event in reversed(events):
+        sections = [value for key, value in event.changes.items() if not is_step_key(key)]
+        done = sum(1 for value in sections if value)
+        rows.append({
+            "When": datetime.fromtimestamp(event.ts).strftime("%Y-%m-%d %H:%M:%S"),
+            "Auditor": event.actor or "—",
+            "Action": event.kind,
+            "Sections": len(sections),
+            "Steps": len(event.changes) - len(sections),
+            "Marked done": done,
+            "Marked pending": len(sections) - done,
+        })
+    return rows
@@ -0,0 +1,371 @@
+"""
+Bulk import of existing compliance trackers for the DPDP audit tool.
+
+Reads CSV or Excel workbooks with one row per control (and, for a
+portfolio, per entity) and pre-fills section status from them:
+
+    python dpdp_import.py TRACKER.csv|.xlsx [--mapping MAPPING.json]
+                          [--engagement NAME] [--apply] [--actor NAME]
+
+Without ``--apply`` this is a dry run that prints what would change.
+
+Rows are streamed (csv.reader, or openpyxl in read-only mode) and folded
+into two bitsets per entity — sections seen and sections done — so memory
+is bounded by entities × sections, however many rows the file has. Later
+rows for the same entity and section win; a row with an empty status cell
+leaves its section as it is.
+
+Each row is matched to a section by, in order: a catalogue key column
+(``ch2-4``, in any case; a row whose key cell names no section is
+unmatched), a section number column (``4``, ``§ 4``, ``Section 4(1)``;
+a cell that is not a section reference, like ``DPDP-07``, is no number),
+or a title column, matched exactly after normalisation, then through the
+mapping's aliases, then fuzzily (difflib). Title lookups are cached, so a
+million rows that repeat a few hundred titles cost a few hundred matches.
+
+The mapping is a JSON object; every field is optional and columns it does
+not name are detected from the header row:
+
+    {"entity": "Business Unit", "key": "Control ID", "section": "Section",
+     "title": "Control", "status": "Status", "done_values": ["green"],
+     "aliases": {"consent mgmt": "ch2-6"}, "fuzzy_cutoff": 0.8,
+     "sheet": "Tracker", "header_row": 1}
+"""
+
+import argparse
+import csv
+import difflib
+import functools
+import io
+import json
+import os
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+
+from dpdp_catalogue import Catalogue, load_catalogue
+from dpdp_codec import BitLayout, bit_layout
+
+DONE_VALUES = {"1", "true", "yes", "y", "done", "complete", "completed", "x", "✅"}
+FUZZY_CUTOFF = 0.8
+UNMATCHED_SAMPLE = 1000   # distinct unmatched values kept for the report
+
+COLUMN_SYNONYMS = {
+    "entity": ("entity", "entity name", "company", "subsidiary", "business unit", "engagement"),
+    "key": ("section key", "section_key", "key", "control key"),
+    "section": ("section", "section no", "section number", "sec", "§", "clause"),
+    "title": ("title", "section title", "control", "control name", "requirement", "description"),
+    "status": ("status", "checked", "done", "complete", "compliance status", "state"),
+}
+
+# A whole cell that reads as a section reference: "4", "§ 4", "Sec. 4A", "Section 4(1)(a)".
+SECTION_NUM_RE = re.compile(r"\s*(?:(?:section|sec|clause|s)\.?\s*|§\s*)?(\d+[A-Za-z]?)(?:\s*\(\w+\))*\s*", re.I)
+NORMALISE_RE = re.compile(r"[^a-z0-9]+")
+
+
+def is_done(value, done_values=DONE_VALUES) -> bool:
+    # Spreadsheet cells arrive as bools or numbers as well as text.
+    if isinstance(value, (bool, int, float)):
+        return value == 1
+    return value is not None and str(value).strip().lower() in done_values
+
+
+def normalise(text: str) -> str:
+    return NORMALISE_RE.sub(" ", str(text).lower()).strip()
+
+
+# ─── MAPPING ─────────────────────────────────────────────────────
+@dataclass
+class ImportMapping:
+    entity: str = None
+    key: str = None
+    section: str = None
+    title: str = None
+    status: str = None
+    done_values: tuple = ()
+    aliases: dict = field(default_factory=dict)
+    fuzzy_cutoff: float = FUZZY_CUTOFF
+    sheet: str = None
+    header_row: int = 1
+
+    @classmethod
+    def from_dict(cls, doc: dict) -> "ImportMapping":
+        unknown = set(doc) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown mapping fields: {', '.join(sorted(unknown))}")
+        return cls(**doc)
+
+    def columns(self, header: list) -> dict:
+        """Resolve each role to a column index, from the mapping or the header's names."""
+        lookup = {normalise(name): i for i, name in enumerate(header) if name is not None}
+        resolved = {}
+        for role, synonyms in COLUMN_SYNONYMS.items():
+            named = getattr(self, role)
+            if named:
+                if normalise(named) not in lookup:
+                    raise ValueError(f"Mapped {role} column {named!r} is not in the header")
+                resolved[role] = lookup[normalise(named)]
+                continue
+            for name in synonyms:
+                if normalise(name) in lookup and lookup[normalise(name)] not in resolved.values():
+                    resolved[role] = lookup[normalise(name)]
+                    break
+        if "status" not in resolved:
+            raise ValueError("No status column found; name it in the mapping")
+        if not {"key", "section", "title"} & set(resolved):
+            raise ValueError("No key, section or title column found; name one in the mapping")
+        return resolved
+
+
+def load_mapping(path: str = None) -> ImportMapping:
+    if not path:
+        return ImportMapping()
+    with open(path, encoding="utf-8") as fh:
+        return ImportMapping.from_dict(json.load(fh))
+
+
+# ─── MATCHING ────────────────────────────────────────────────────
+class SectionMatcher:
+    """Resolves a row's key / section / title cells to a catalogue key."""
+
+    def __init__(self, catalogue: Catalogue, aliases: dict = None, cutoff: float = FUZZY_CUTOFF):
+        self.keys = set(catalogue.keys)
+        self.by_key = {key.lower(): key for key in catalogue.keys}
+        nums = Counter(sec["num"] for sec in catalogue.sections)
+        # Section numbers only identify a section when they are unique in the catalogue.
+        self.by_num = {sec["num"].lower(): sec["key"] for sec in catalogue.sections if nums[sec["num"]] == 1}
+        self.by_title = {normalise(sec["title"]): sec["key"] for sec in catalogue.sections}
+        for alias, key in (aliases or {}).items():
+            if key not in self.keys:
+                raise ValueError(f"Alias {alias!r} maps to unknown section {key!r}")
+            self.by_title[normalise(alias)] = key
+        self.titles = list(self.by_title)
+        self.cutoff = cutoff
+        self.fuzzy = {}   # source title -> (key, score), for review
+        self.title = functools.lru_cache(maxsize=65536)(self._title)
+        self.section = functools.lru_cache(maxsize=65536)(self._section)
+
+    def key(self, value: str):
+        key = self.by_key.get(value.strip().lower())
+        return (key, "key") if key else (None, None)
+
+    def _section(self, value: str):
+        m = SECTION_NUM_RE.fullmatch(value)
+        key = self.by_num.get(m.group(1).lstrip("0").lower()) if m else None
+        return (key, "section") if key else (None, None)
+
+    def _title(self, value: str):
+        norm = normalise(value)
+        if not norm:
+            return None, None
+        if norm in self.by_title:
+            return self.by_title[norm], "title"
+        close = difflib.get_close_matches(norm, self.titles, n=1, cutoff=self.cutoff)
+        if not close:
+            return None, None
+        key = self.by_title[close[0]]
+        self.fuzzy[value] = (key, round(difflib.SequenceMatcher(None, norm, close[0]).ratio(), 3))
+        return key, "fuzzy"
+
+    def resolve(self, key_cell, section_cell, title_cell):
+        # A key cell is matched as a key or not at all: "CH2-6" is no section number.
+        if key_cell not in (None, ""):
+            return self.key(str(key_cell))
+        for cell, lookup in ((section_cell, self.section), (title_cell, self.title)):
+            if cell not in (None, ""):
+                # Excel hands whole numbers back as floats: 4.0 is section 4.
+                if isinstance(cell, float) and cell.is_integer():
+                    cell = int(cell)
+                key, method = lookup(str(cell))
+                if key:
+                    return key, method
+        return None, None
+
+
+# ─── READING ─────────────────────────────────────────────────────
+def iter_rows(source, name: str, sheet: str = None):
+    """Yield each row of a CSV or XLSX file (path or binary file object) as a list of cells.
+
+    A file object is read from the start and left open, so the same upload
+    can be read again (a second dry run with another mapping).
+    """
+    if not isinstance(source, (str, os.PathLike)) and source.seekable():
+        source.seek(0)
+    if name.lower().endswith((".xlsx", ".xlsm")):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportError("Reading Excel trackers needs openpyxl (pip install openpyxl)") from None
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            ws = workbook[sheet] if sheet else workbook.active
+            yield from (list(row) for row in ws.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+        return
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8-sig") as fh:
+            yield from csv.reader(fh)
+    else:
+        wrapper = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+        try:
+            yield from csv.reader(wrapper)
+        finally:
+            # A collected wrapper closes the buffer under it; hand it back instead.
+            wrapper.detach()
+
+
+@dataclass
+class ImportResult:
+    layout: BitLayout
+    states: dict = field(default_factory=dict)    # entity -> [seen bits, done bits]
+    rows: int = 0
+    matched: int = 0
+    methods: Counter = field(default_factory=Counter)
+    unmatched: Counter = field(default_factory=Counter)
+    blank: int = 0                                 # matched rows with no status, left as they are
+    fuzzy: dict = field(default_factory=dict)
+
+
+def read_tracker(source, catalogue: Catalogue, mapping: ImportMapping = None, engagement: str = None,
+                 name: str = None) -> ImportResult:
+    """Stream a tracker into per-entity bitsets.
+
+    Rows without an entity column (or with an empty entity cell) go to
+    ``engagement``. A row with an empty status cell changes nothing: its
+    section keeps whatever state it has.
+    """
+    mapping = mapping or ImportMapping()
+    name = name or str(source)
+    matcher = SectionMatcher(catalogue, mapping.aliases, mapping.fuzzy_cutoff)
+    done_values = DONE_VALUES | {str(v).strip().lower() for v in mapping.done_values}
+    result = ImportResult(bit_layout(catalogue))
+    index = result.layout.index
+
+    rows = iter_rows(source, name, mapping.sheet)
+    for _ in range(mapping.header_row - 1):
+        next(rows, None)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("The tracker is empty")
+    cols = mapping.columns(header)
+    get = lambda row, role: row[cols[role]] if role in cols and cols[role] < len(row) else None
+
+    for row in rows:
+        if not any(cell not in (None, "") for cell in row):
+            continue
+        result.rows += 1
+        key, method = matcher.resolve(get(row, "key"), get(row, "section"), get(row, "title"))
+        if key is None:
+            label = next((str(c) for c in (get(row, "key"), get(row, "section"), get(row, "title")) if c), "")
+            if label in result.unmatched or len(result.unmatched) < UNMATCHED_SAMPLE:
+                result.unmatched[label] += 1
+            continue
+        result.matched += 1
+        result.methods[method] += 1
+        status = get(row, "status")
+        if status is None or str(status).strip() == "":
+            result.blank += 1
+            continue
+        entity = str(get(row, "entity") or "").strip() or engagement
+        state = result.states.get(entity)
+        if state is None:
+            state = result.states[entity] = [0, 0]
+        bit = 1 << index[key]
+        state[0] |= bit
+        state[1] = state[1] | bit if is_done(status, done_values) else state[1] & ~bit
+    result.fuzzy = matcher.fuzzy
+    return result
+
+
+# ─── DIFF & APPLY ────────────────────────────────────────────────
+def diff_import(store, result: ImportResult) -> dict:
+    """entity -> (changed bits, done bits) against the store's current state."""
+    layout = result.layout
+    if len(result.states) == 1:
+        entity = next(iter(result.states))
+        current = {entity: store.load(entity)}
+    else:
+        current = {}
+        for entity, key, checked in store.load_all():
+            if entity in result.states:
+                current.setdefault(entity, {})[key] = checked
+    diffs = {}
+    for entity, (seen, done) in result.states.items():
+        changed = (done ^ layout.pack(current.get(entity, {}))) & seen
+        diffs[entity] = (changed, done)
+    return diffs
+
+
+def report_rows(result: ImportResult, diffs: dict) -> list:
+    """One row per entity for the dry-run report, entities with changes first."""
+    rows = []
+    for entity, (changed, done) in diffs.items():
+        seen = result.states[entity][0]
+        rows.append({
+            "Entity": entity,
+            "Sections in file": seen.bit_count(),
+            "→ Done": (changed & done).bit_count(),
+            "→ Pending": (changed & ~done).bit_count(),
+            "Unchanged": (seen & ~changed).bit_count(),
+        })
+    rows.sort(key=lambda r: (-(r["→ Done"] + r["→ Pending"]), r["Entity"]))
+    return rows
+
+
+def apply_import(store, result: ImportResult, diffs: dict, actor: str = "") -> dict:
+    """Write the changes, one event per entity; return entity -> applied changes."""
+    layout = result.layout
+    applied = {}
+    for entity, (changed, done) in diffs.items():
+        if changed:
+            changes = {layout.keys[i]: bool(done >> i & 1) for i in layout.positions(changed)}
+            store.write(entity, changes, actor=actor, kind="import")
+            applied[entity] = changes
+    store.flush()
+    return applied
+
+
+# ─── CLI ─────────────────────────────────────────────────────────
+def main(argv=None):
+    from dpdp_store import DEFAULT_ENGAGEMENT, open_store
+
+    parser = argparse.ArgumentParser(description="Import a compliance tracker into the DPDP audit tool.")
+    parser.add_argument("tracker", help="CSV or XLSX file, one row per control (per entity)")
+    parser.add_argument("-m", "--mapping", default=None, help="JSON column mapping (default: detect from header)")
+    parser.add_argument("-e", "--engagement", default=DEFAULT_ENGAGEMENT,
+                        help="engagement for rows without an entity column (default: %(default)s)")
+    parser.add_argument("--apply", action="store_true", help="write the changes (default: dry run)")
+    parser.add_argument("--actor", default="import", help="recorded against the import events")
+    parser.add_argument("--catalogue", default=None, help="catalogue JSON (default: bundled DPDP Act 2023)")
+    args = parser.parse_args(argv)
+
+    result = read_tracker(args.tracker, load_catalogue(args.catalogue), load_mapping(args.mapping), args.engagement)
+    store = open_store()
+    diffs = diff_import(store, result)
+    rows = report_rows(result, diffs)
+
+    print(f"{result.rows} rows, {result.matched} matched ({', '.join(f'{n} by {m}' for m, n in result.methods.most_common())}), "
+          f"{result.rows - result.matched} unmatched, {result.blank} without a status; {len(rows)} entities")
+    for row in rows[:50]:
+        print(f"  {row['Entity']:<30} +{row['→ Done']:<5} -{row['→ Pending']:<5} ={row['Unchanged']}")
+    if len(rows) > 50:
+        print(f"  … {len(rows) - 50} more entities")
+    for title, (key, score) in sorted(result.fuzzy.items()):
+        print(f"  ~ {title!r} → {key} ({score:.0%})")
+    for label, count in result.unmatched.most_common(20):
+        print(f"  ? {label!r} ×{count}")
+
+    if args.apply:
+        applied = apply_import(store, result, diffs, args.actor)
+        print(f"Applied {sum(len(c) for c in applied.values())} changes to {len(applied)} entities.")
+    else:
+        print("Dry run — nothing written. Re-run with --apply to import.")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Opt-in rerun profiling for the DPDP audit tool.
+
+A RunProfile times the phases of one script run (header, export, each
+chapter, summary, footer) and counts the elements and payload bytes the
+run sends to the browser. Observations also feed a process-wide Metrics
+registry, which renders the Prometheus text exposition format and can be
+written to a file for node_exporter's textfile collector or served on a
+local port.
+
+Enable with ``DPDP_PROFILE=1`` or the ``?profile=1`` query param.
+``DPDP_METRICS_FILE`` and ``DPDP_METRICS_PORT`` choose the outputs.
+"""
+
+import contextlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PHASE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+# ─── REGISTRY ────────────────────────────────────────────────────
+class Metrics:
+    """Process-wide histograms and gauges, keyed by (name, sorted labels)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._gauges = {}
+        self._help = {}
+
+    def observe(self, name: str, value: float, help: str = "", **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._help.setdefault(name, help)
+            hist = self._histograms.setdefault(key, {"buckets": [0] * len(PHASE_BUCKETS), "count": 0, "sum": 0.0})
+            for i, bound in enumerate(PHASE_BUCKETS):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["count"] += 1
+            hist["sum"] += value
+
+    def set_gauge(self, name: str, value: float, help: str = "", **labels):
+        with self._lock:
+            self._help.setdefault(name, help)
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def render(self) -> str:
+        """Return the registry in Prometheus text exposition format."""
+        fmt = lambda labels: "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+        lines, seen = [], set()
+        with self._lock:
+            for (name, labels), hist in sorted(self._histograms.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines += [f"# HELP {name} {self._help.get(name, '')}", f"# TYPE {name} histogram"]
+                for bound, count in zip(PHASE_BUCKETS, hist["buckets"]):
+                    lines.append(f"{name}_bucket{fmt(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_bucket{fmt(labels + (('le', '+Inf'),))} {hist['count']}")
+                lines.append(f"{name}_sum{fmt(labels)} {hist['sum']:.6f}")
+                lines.append(f"{name}_count{fmt(labels)} {hist['count']}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines += [f"# HELP {name} {self._help.get(name, '')}", f"# TYPE {name} gauge"]
+                lines.append(f"{name}{fmt(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Atomically replace ``path`` so a scraper never reads a partial file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".dpdp_metrics")
+        with os.fdopen(fd, "w") as fh:
+            fh.write(self.render())
+        os.replace(tmp, path)
+
+
+metrics = Metrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread on a local port."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="dpdp-metrics").start()
+    return server
+
+
+# ─── PER-RUN PROFILE ─────────────────────────────────────────────
+class RunProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.elements = 0
+        self.payload_bytes = 0
+        self.state_bytes = 0
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+            metrics.observe("dpdp_rerun_phase_seconds", elapsed, "Time spent per rerun phase.", phase=name)
+
+    def count(self, msg):
+        if msg.HasField("delta"):
+            self.elements += 1
+        self.payload_bytes += msg.ByteSize()
+
+    def finish(self, session_state: dict):
+        self.state_bytes = state_size(session_state)
+        total = time.perf_counter() - self.started
+        metrics.observe("dpdp_rerun_seconds", total, "Wall time of a full script run.")
+        metrics.set_gauge("dpdp_rerun_elements", self.elements, "Elements emitted by the last run.")
+        metrics.set_gauge("dpdp_rerun_payload_bytes", self.payload_bytes, "ForwardMsg bytes sent by the last run.")
+        metrics.set_gauge("dpdp_session_state_bytes", self.state_bytes, "Pickled size of the last profiled session's state.")
+        return total
+
+
+class NullProfile:
+    """Stand-in used when profiling is off; every hook is a no-op."""
+
+    def phase(self, name: str):
+        return contextlib.nullcontext()
+
+    def count(self, msg):
+        pass
+
+
+NULL_PROFILE = NullProfile()
+
+
+def state_size(session_state: dict, sizes: dict = None) -> int:
+    """Approximate session footprint as the pickled size of each value.
+
+    ``sizes`` caches each key's size against the value's identity and its
+    ``version`` (the trackers bump one on every change), so a session
+    sampled every few seconds only re-pickles what was replaced or changed.
+    """
+    sizes = {} if sizes is None else sizes
+    for key in [k for k in sizes if k not in session_state]:
+        del sizes[key]
+    total = 0
+    for key, value in session_state.items():
+        stamp = (id(value), getattr(value, "version", None))
+        cached = sizes.get(key)
+        if cached is None or cached[0] != stamp:
+            try:
+                size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            except Exception:
+                size = 0
+            sizes[key] = cached = (stamp, size)
+        total += cached[1]
+    return total
+
+
+def instrument_context(ctx, profile):
+    """Count each ForwardMsg a session's ScriptRunContext sends into ``profile``.
+
+    The enqueue hook is installed once per context and reads the profile
+    attached for the current run. This touches a Streamlit internal and is
+    only used when profiling is enabled.
+    """
+    if ctx is None:
+        return
+    if not getattr(ctx, "_dpdp_instrumented", False):
+        enqueue = ctx._enqueue
+
+        def counting_enqueue(msg):
+            ctx._dpdp_profile.count(msg)
+            enqueue(msg)
+
+        ctx._enqueue = counting_enqueue
+        ctx._dpdp_instrumented = True
+    ctx._dpdp_profile = profile
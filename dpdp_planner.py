@@ -0,0 +1,296 @@
+"""
+Remediation planner for the DPDP audit tool.
+
+Turns the pending sections of every entity in a portfolio into a dated
+schedule for the audit team, ahead of the full-compliance deadline.
+
+Every gap (entity, section) is a task, ordered by
+
+    weight   the section's risk weight, raised to the heaviest pending
+             section in the same entity that depends on its chapter — a
+             prerequisite is as urgent as the work waiting on it
+    depth    the chapter's depth in the ``requires`` graph, so that at
+             equal weight prerequisites come first
+    entity, catalogue order — for a stable plan
+
+and dispatched list-scheduling style: the next task goes to the auditor
+who frees up first (a min-heap of auditor availability), starting no
+earlier than the entity's prerequisite chapters finish. Raising weights
+along dependencies means a prerequisite always dispatches before the
+tasks that wait on it.
+
+Dispatch order depends only on those keys, never on dates, so a change
+leaves the plan ahead of the first task it moves untouched. Ticking a
+section removes one task (and may lower its entity's raised weights);
+unticking adds one. Only the tail of the plan from the earliest moved
+position is re-timed, resuming from the auditor heap checkpointed every
+CHECKPOINT_EVERY tasks.
+"""
+
+import bisect
+import heapq
+import math
+import threading
+from collections import namedtuple
+from datetime import date, timedelta
+
+from dpdp_catalogue import Catalogue, chapter_label
+
+DEADLINE = date(2027, 5, 13)
+RISK_WEIGHT = {"high": 3, "medium": 2, "low": 1}
+EFFORT_DAYS = {"high": 3.0, "medium": 2.0, "low": 1.0}   # auditor working days per section
+DEFAULT_AUDITORS = 4
+CHECKPOINT_EVERY = 256
+
+# ``start`` and ``finish`` are in working days from the plan's start date.
+Assignment = namedtuple("Assignment", "entity key auditor start finish")
+
+
+def add_workdays(start: date, days: float) -> date:
+    """The date ``days`` working days (Mon–Fri) after ``start``."""
+    whole = int(days)
+    while start.weekday() >= 5:
+        start += timedelta(days=1)
+    weeks, rest = divmod(whole, 5)
+    end = start + timedelta(weeks=weeks)
+    for _ in range(rest):
+        end += timedelta(days=3 if end.weekday() == 4 else 1)
+    return end
+
+
+class RemediationPlan:
+    def __init__(self, catalogue: Catalogue, auditors: int = DEFAULT_AUDITORS, start: date = None,
+                 deadline: date = DEADLINE, weights: dict = None, effort: dict = None):
+        if auditors < 1:
+            raise ValueError("A plan needs at least one auditor")
+        self.catalogue = catalogue
+        self.auditors = auditors
+        self.start = start or date.today()
+        self.rolling = start is None   # re-dated to today as days pass
+        self.deadline = deadline
+        weights = weights or RISK_WEIGHT
+        effort = effort or EFFORT_DAYS
+
+        # ── Static, per catalogue ──
+        self.keys = catalogue.keys
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        chapter_ids = [ch["id"] for ch in catalogue.chapters]
+        self.chapter_of = [chapter_ids.index(sec["chapter_id"]) for sec in catalogue.sections]
+        self.weight = [weights[sec["risk"]] for sec in catalogue.sections]
+        self.effort = [effort[sec["risk"]] for sec in catalogue.sections]
+        # ``requires`` only names earlier chapters, so one forward pass closes it.
+        prereqs, depth = [], []
+        for ch in catalogue.chapters:
+            direct = [chapter_ids.index(req) for req in ch["requires"]]
+            closure = set(direct)
+            for c in direct:
+                closure |= prereqs[c]
+            prereqs.append(closure)
+            depth.append(1 + max((depth[c] for c in direct), default=-1))
+        self.prereqs = [tuple(pre) for pre in prereqs]
+        self.dependents = [frozenset(d for d, pre in enumerate(prereqs) if c in pre) for c in range(len(prereqs))]
+        self.depth = depth
+
+        # ── Per plan ──
+        self.entities = set()
+        self.pending = {}       # entity -> {section index: its sort key}
+        self.lift = {}          # entity -> per-chapter weight raised by dependents
+        self.order = []         # sort keys of every task, in dispatch order
+        self.timing = []        # (auditor, start, finish) for order[:len(timing)]
+        self.finish_of = {}     # sort key -> finish, for the timed tasks
+        self.checkpoints = []   # auditor heap before order[i * CHECKPOINT_EVERY]
+        self._assignments = None   # built from order and timing, until either changes
+        self.lock = threading.RLock()   # also held by callers registering a plan before it loads
+
+    # ── Keys ──
+    def _lifts(self, tasks) -> list:
+        own = [0] * len(self.prereqs)
+        for i in tasks:
+            c = self.chapter_of[i]
+            own[c] = max(own[c], self.weight[i])
+        return [max((own[d] for d in deps), default=0) for deps in self.dependents]
+
+    def _key(self, entity: str, i: int, lift: list) -> tuple:
+        c = self.chapter_of[i]
+        return -max(self.weight[i], lift[c]), self.depth[c], entity, i
+
+    def _position(self, key: tuple) -> int:
+        return bisect.bisect_left(self.order, key)
+
+    # ── Mutation ──
+    def load(self, pending: dict):
+        """Replace the plan with ``{entity: iterable of pending section keys}``."""
+        with self.lock:
+            self.pending, self.lift, order = {}, {}, []
+            self.entities = set(pending)
+            for entity, keys in pending.items():
+                tasks = [self.index[k] for k in keys if k in self.index]
+                if not tasks:
+                    continue
+                lift = self.lift[entity] = self._lifts(tasks)
+                self.pending[entity] = {i: self._key(entity, i, lift) for i in tasks}
+                order.extend(self.pending[entity].values())
+            order.sort()
+            self.order = order
+            self.finish_of = {}
+            self._invalidate(0)
+
+    def set_many(self, entity: str, changes: dict):
+        """Apply ticks (True: done, drop the task) and unticks (False: pending again).
+
+        An entity the plan has not seen starts with every section pending.
+        """
+        with self.lock:
+            if entity not in self.entities:
+                self.entities.add(entity)
+                changes = {**dict.fromkeys(self.keys, False), **changes}
+            tasks = self.pending.get(entity, {})
+            done = {self.index[k] for k, v in changes.items() if v and k in self.index} & tasks.keys()
+            reopened = {self.index[k] for k, v in changes.items() if not v and k in self.index} - tasks.keys()
+            if not done and not reopened:
+                return
+            first = len(self.order)
+            for i in done:
+                key = tasks.pop(i)
+                self.finish_of.pop(key, None)
+                pos = self._position(key)
+                del self.order[pos]
+                first = min(first, pos)
+            remaining = set(tasks) | reopened
+            lift = self._lifts(remaining)
+            # Only tasks whose raised weight moved change place in the order.
+            for i in remaining:
+                key = self._key(entity, i, lift)
+                old = tasks.get(i)
+                if key == old:
+                    continue
+                if old is not None:
+                    self.finish_of.pop(old, None)
+                    pos = self._position(old)
+                    del self.order[pos]
+                    first = min(first, pos)
+                pos = self._position(key)
+                self.order.insert(pos, key)
+                first = min(first, pos)
+                tasks[i] = key
+            if tasks:
+                self.pending[entity], self.lift[entity] = tasks, lift
+            else:
+                self.pending.pop(entity, None)
+                self.lift.pop(entity, None)
+            self._invalidate(first)
+
+    def set(self, entity: str, key: str, done: bool):
+        self.set_many(entity, {key: done})
+
+    def _invalidate(self, pos: int):
+        self._assignments = None
+        del self.timing[pos:]
+        del self.checkpoints[pos // CHECKPOINT_EVERY + 1:]
+
+    # ── Scheduling ──
+    def schedule(self):
+        """Re-time the plan from the first stale task; return the number of tasks re-timed."""
+        with self.lock:
+            if self.rolling and self.start != date.today():
+                # Working days count from today; a new day shifts every date.
+                self.start = date.today()
+                self._invalidate(0)
+            if len(self.timing) == len(self.order):
+                return 0
+            resume = len(self.checkpoints) - 1 if self.checkpoints else 0
+            begin = resume * CHECKPOINT_EVERY
+            del self.timing[begin:]
+            auditors = list(self.checkpoints[resume]) if self.checkpoints else [(0.0, a) for a in range(self.auditors)]
+            del self.checkpoints[resume:]
+
+            order, timing, finish_of = self.order, self.timing, self.finish_of
+            chapter_of, prereqs, effort = self.chapter_of, self.prereqs, self.effort
+            boundary = order[begin] if begin < len(order) else None
+            # Per entity, the latest finish in each chapter so far; seeded from
+            # the kept prefix the first time the tail reaches the entity.
+            finished = {}
+            for pos in range(begin, len(order)):
+                if pos % CHECKPOINT_EVERY == 0:
+                    self.checkpoints.append(tuple(auditors))
+                key = order[pos]
+                entity, i = key[2], key[3]
+                fin = finished.get(entity)
+                if fin is None:
+                    fin = finished[entity] = [0.0] * len(prereqs)
+                    for other in self.pending[entity].values():
+                        if other < boundary:
+                            c = chapter_of[other[3]]
+                            fin[c] = max(fin[c], finish_of[other])
+                c = chapter_of[i]
+                ready = max([fin[p] for p in prereqs[c]], default=0.0)
+                free, auditor = auditors[0]
+                start = free if free > ready else ready
+                end = start + effort[i]
+                heapq.heapreplace(auditors, (end, auditor))
+                if end > fin[c]:
+                    fin[c] = end
+                timing.append((auditor, start, end))
+                finish_of[key] = end
+            return len(order) - begin
+
+    # ── Views ──
+    def assignments(self) -> list:
+        """Every task with its auditor and timing, in dispatch order; shared, don't mutate.
+
+        Built once after each re-timing, so the summary and tables reuse it.
+        """
+        with self.lock:
+            self.schedule()
+            if self._assignments is None:
+                self._assignments = [Assignment(key[2], self.keys[key[3]], *timing)
+                                     for key, timing in zip(self.order, self.timing)]
+            return self._assignments
+
+    def finish_date(self, days: float) -> date:
+        # Days count from 0, so work ending at day 2.5 ends on day 2.
+        return add_workdays(self.start, max(math.ceil(days) - 1, 0))
+
+    def summary(self) -> dict:
+        plan = self.assignments()
+        end = max((a.finish for a in plan), default=0.0)
+        completion = self.finish_date(end) if plan else None
+        return {
+            "tasks": len(plan),
+            "entities": len(self.pending),
+            "auditor_days": sum(self.effort[self.index[a.key]] for a in plan),
+            "completion": completion,
+            "late": sum(1 for a in plan if self.finish_date(a.finish) > self.deadline),
+            "on_track": completion is None or completion <= self.deadline,
+        }
+
+    def rows(self, limit: int = None) -> list:
+        """The schedule as table rows, in dispatch order."""
+        by_key = self.catalogue.by_key
+        chapters = {ch["id"]: chapter_label(ch) for ch in self.catalogue.chapters}
+        rows = []
+        for a in self.assignments()[:limit]:
+            sec = by_key[a.key]
+            due = self.finish_date(a.finish)
+            rows.append({
+                "Entity": a.entity,
+                "Section": f"§ {sec['num']} — {sec['title']}",
+                "Chapter": chapters[sec["chapter_id"]],
+                "Risk": sec["risk"].capitalize(),
+                "Auditor": f"Auditor {a.auditor + 1}",
+                "Start": add_workdays(self.start, a.start),
+                "Due": due,
+                "Late": due > self.deadline,
+            })
+        return rows
+
+    def entity_rows(self) -> list:
+        """Projected completion per entity, latest first."""
+        ends, late = {}, {}
+        for a in self.assignments():
+            ends[a.entity] = max(ends.get(a.entity, 0.0), a.finish)
+            late[a.entity] = late.get(a.entity, 0) + (self.finish_date(a.finish) > self.deadline)
+        rows = [{"Entity": entity, "Open gaps": len(self.pending[entity]), "Projected completion": self.finish_date(end),
+                 "Late gaps": late[entity]} for entity, end in ends.items()]
+        rows.sort(key=lambda r: (r["Projected completion"], r["Entity"]), reverse=True)
+        return rows
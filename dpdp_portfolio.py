@@ -0,0 +1,261 @@
+"""
+Portfolio mode for the DPDP audit tool.
+
+Completion for many entities (subsidiaries, business units) is held as an
+entities × sections boolean matrix, with columns in CHAPTERS order. All
+rollups are numpy reductions over that matrix, so refresh cost does not
+depend on Python loops over per-entity dicts.
+
+The static catalogue columns of the flat sections table (chapter, number,
+risk, and the chapter × risk group each section falls in) are computed once
+per catalogue. Summaries are group-bys over that table: one matrix product
+of the status matrix with the group one-hot gives completed counts per
+entity, chapter and risk level. The product is cached until the next
+change, and the chapter summary, risk-by-chapter pivot and entity ×
+chapter heatmap are all slices of it. The sections table itself is the
+static columns, completions per section (cached the same way) and a
+status column for each entity asked for.
+
+A portfolio is shared by every session in the process and kept current
+by the store's change feed on its own thread, so every method runs under
+``lock`` (re-entrant). Views return fresh arrays, or the cached group-by,
+which a change replaces rather than updates.
+"""
+
+import functools
+import threading
+
+import numpy as np
+
+from dpdp_catalogue import RISK_LEVELS, chapter_label
+
+GROUP_CHUNK = 4096   # entity rows per matrix product, bounds the float32 copy
+
+
+def locked(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class Portfolio:
+    def __init__(self, chapters: list, entities=()):
+        self.keys = [f"{ch['id']}-{s['num']}" for ch in chapters for s in ch["sections"]]
+        self.key_index = {key: i for i, key in enumerate(self.keys)}
+        self.chapter_ids = [ch["id"] for ch in chapters]
+        self.chapter_titles = [ch["title"] for ch in chapters]
+        self.chapter_labels = [chapter_label(ch) for ch in chapters]
+        self.chapter_sizes = np.array([len(ch["sections"]) for ch in chapters], dtype=np.int32)
+        # Column offset where each chapter starts, for np.add.reduceat.
+        self.chapter_starts = np.concatenate(([0], np.cumsum(self.chapter_sizes)[:-1])).astype(np.intp)
+        self.high_mask = np.array([s["risk"] == "high" for ch in chapters for s in ch["sections"]])
+        self.chapter_high = np.add.reduceat(self.high_mask, self.chapter_starts, dtype=np.int32)
+
+        # ── Static sections table ──
+        self.section_num = [s["num"] for ch in chapters for s in ch["sections"]]
+        self.section_chapter = np.repeat(np.arange(len(chapters)), self.chapter_sizes)
+        self.section_risk = np.array([RISK_LEVELS.index(s["risk"]) for ch in chapters for s in ch["sections"]],
+                                     dtype=np.intp)
+        # Display columns of the sections table, built once.
+        self.section_columns = {
+            "Section": tuple(self.keys),
+            "Chapter": tuple(self.chapter_labels[c] for c in self.section_chapter),
+            "§": tuple(self.section_num),
+            "Risk": tuple(RISK_LEVELS[r].capitalize() for r in self.section_risk),
+        }
+        n_groups = len(chapters) * len(RISK_LEVELS)
+        section_group = self.section_chapter * len(RISK_LEVELS) + self.section_risk
+        # sections × (chapter, risk) one-hot; status @ onehot is the group-by.
+        self.group_onehot = np.zeros((len(self.keys), n_groups), dtype=np.float32)
+        self.group_onehot[np.arange(len(self.keys)), section_group] = 1
+        self.group_total = np.bincount(section_group, minlength=n_groups).reshape(len(chapters), len(RISK_LEVELS))
+
+        self.entities = []
+        self.entity_index = {}
+        self.matrix = np.zeros((0, len(self.keys)), dtype=bool)
+        self._group_done = self._section_done = None
+        self.lock = threading.RLock()
+        for name in entities:
+            self.add_entity(name)
+
+    # ── Mutation ──
+    @locked
+    def add_entity(self, name: str, checked: dict = None) -> int:
+        self._changed()
+        if name in self.entity_index:
+            row = self.entity_index[name]
+        else:
+            row = len(self.entities)
+            if row >= self.matrix.shape[0]:
+                # Grow geometrically so bulk loads are amortised O(1) per entity.
+                grown = np.zeros((max(16, row * 2), len(self.keys)), dtype=bool)
+                grown[: self.matrix.shape[0]] = self.matrix
+                self.matrix = grown
+            # The row exists before the entity is listed.
+            self.entities.append(name)
+            self.entity_index[name] = row
+        if checked:
+            self.set_many(name, checked)
+        return row
+
+    @locked
+    def set(self, entity: str, key: str, value: bool):
+        col = self.key_index.get(key)
+        if col is not None:
+            self.matrix[self.add_entity(entity), col] = value
+            self._changed()
+
+    @locked
+    def set_many(self, entity: str, changes: dict):
+        row = self.add_entity(entity)
+        for key, value in changes.items():
+            col = self.key_index.get(key)
+            if col is not None:
+                self.matrix[row, col] = value
+        self._changed()
+
+    @locked
+    def load_rows(self, rows):
+        """Bulk-load (entity, section_key, checked) triples."""
+        ent, cols, vals = [], [], []
+        for entity, key, checked in rows:
+            col = self.key_index.get(key)
+            if col is None:
+                continue
+            ent.append(self.add_entity(entity))
+            cols.append(col)
+            vals.append(bool(checked))
+        if ent:
+            self.matrix[np.array(ent), np.array(cols)] = np.array(vals)
+        self._changed()
+
+    def _changed(self):
+        self._group_done = self._section_done = None
+
+    # ── Views ──
+    @property
+    def active(self) -> np.ndarray:
+        return self.matrix[: len(self.entities)]
+
+    @locked
+    def pending(self) -> dict:
+        """entity -> its pending section keys, for the remediation planner."""
+        keys = np.array(self.keys, dtype=object)
+        return {entity: keys[~row].tolist() for entity, row in zip(self.entities, self.active)}
+
+    # ── Rollups ──
+    @locked
+    def totals(self):
+        """Return (total, done, pending) cells across the whole portfolio."""
+        total = self.active.size
+        done = int(np.count_nonzero(self.active))
+        return total, done, total - done
+
+    @locked
+    def entity_done(self) -> np.ndarray:
+        return np.count_nonzero(self.active, axis=1)
+
+    @locked
+    def section_done(self) -> np.ndarray:
+        """Entities that completed each section, cached until the next change."""
+        if self._section_done is None:
+            self._section_done = np.count_nonzero(self.active, axis=0)
+        return self._section_done
+
+    @locked
+    def group_done(self) -> np.ndarray:
+        """entities × chapters × risk levels completed counts, cached until the next change."""
+        if self._group_done is None:
+            active = self.active
+            out = np.empty((len(active), self.group_onehot.shape[1]), dtype=np.int32)
+            for start in range(0, len(active), GROUP_CHUNK):
+                chunk = active[start:start + GROUP_CHUNK].astype(np.float32)
+                out[start:start + GROUP_CHUNK] = chunk @ self.group_onehot
+            self._group_done = out.reshape(len(active), *self.group_total.shape)
+        return self._group_done
+
+    @locked
+    def chapter_done(self) -> np.ndarray:
+        """entities × chapters matrix of completed-section counts."""
+        return self.group_done().sum(axis=2)
+
+    @locked
+    def chapter_high_done(self) -> np.ndarray:
+        """entities × chapters matrix of completed high-risk sections."""
+        return self.group_done()[:, :, RISK_LEVELS.index("high")]
+
+    @locked
+    def high_gaps(self) -> np.ndarray:
+        """Open high-risk sections per entity."""
+        return int(self.high_mask.sum()) - np.count_nonzero(self.active & self.high_mask, axis=1)
+
+    @locked
+    def chapter_summary(self) -> list:
+        """Per-chapter portfolio rollup, shaped like the single-engagement summary."""
+        n = len(self.entities)
+        done = self.chapter_done()
+        high_done = self.chapter_high_done()
+        complete = np.count_nonzero(done == self.chapter_sizes, axis=0)
+        done_sum = done.sum(axis=0)
+        cells = self.chapter_sizes * n
+        pct = np.divide(done_sum * 100, cells, out=np.zeros(len(cells)), where=cells > 0).round()
+        return [
+            {
+                "Chapter": self.chapter_titles[i],
+                "Sections": int(self.chapter_sizes[i]),
+                "Entities Complete": int(complete[i]),
+                "Entities Pending": n - int(complete[i]),
+                "High-Risk Done": int(high_done[:, i].sum()),
+                "High-Risk Gaps": int(self.chapter_high[i]) * n - int(high_done[:, i].sum()),
+                "Progress (%)": int(pct[i]),
+            }
+            for i in range(len(self.chapter_titles))
+        ]
+
+    @locked
+    def risk_pivot(self) -> dict:
+        """Chapter × risk level completion (%) across the portfolio.
+
+        Cells for a risk level a chapter has no sections of are NaN.
+        """
+        done = self.group_done().sum(axis=0)
+        cells = self.group_total * len(self.entities)
+        pct = np.divide(done * 100, cells, out=np.full(cells.shape, np.nan), where=cells > 0).round()
+        pivot = {"Chapter": list(self.chapter_titles)}
+        for r, risk in enumerate(RISK_LEVELS):
+            pivot[f"{risk.capitalize()} Risk"] = pct[:, r]
+        return pivot
+
+    @locked
+    def chapter_heatmap(self) -> dict:
+        """Entity × chapter completion (%), one column per chapter."""
+        done = self.chapter_done()
+        pct = np.divide(done * 100, self.chapter_sizes, out=np.zeros(done.shape), where=self.chapter_sizes > 0).round()
+        heatmap = {"Entity": list(self.entities)}
+        for i, label in enumerate(self.chapter_labels):
+            heatmap[label] = pct[:, i]
+        return heatmap
+
+    @locked
+    def sections_table(self, entities: list = ()) -> dict:
+        """Flat sections table: static catalogue columns, portfolio completion,
+        and a status column for each of ``entities``."""
+        table = {**self.section_columns, "Entities Done": self.section_done()}
+        for name in entities:
+            table[name] = self.active[self.entity_index[name]].copy()
+        return table
+
+    @locked
+    def entity_summary(self) -> dict:
+        """Column arrays of per-entity completion, for tabular display."""
+        done = self.entity_done()
+        total = len(self.keys)
+        return {
+            "Entity": list(self.entities),
+            "Completed": done,
+            "Pending": total - done,
+            "High-Risk Gaps": self.high_gaps(),
+            "Progress (%)": (done * 100 / total).round() if total else np.zeros(len(done)),
+        }
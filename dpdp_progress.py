@@ -0,0 +1,106 @@
+"""
+Incremental progress accounting for the DPDP audit tool.
+
+ProgressTracker owns the completion state for one engagement as a bitset in
+catalogue order (see dpdp_codec). Everything derived from the catalogue —
+the key → bit index and the per-chapter, per-risk and per-chapter-per-risk
+masks — lives in a BitLayout shared by every session, so a session holds
+one int. Counts are popcounts of the bitset under a mask, with no map to
+rescan and no counters to keep in step.
+
+The chapter summary is the layout's static columns plus two popcounts per
+chapter. A state's summary is cached process-wide, keyed by the bitset, so
+reruns that change nothing (and sessions in the same state) reuse it.
+"""
+
+import functools
+
+from dpdp_catalogue import Catalogue
+from dpdp_codec import BitLayout, bit_layout, decode, encode, layout_for_digest
+
+SUMMARY_CACHE = 1024   # distinct states whose chapter summary is kept
+
+
+class ProgressTracker:
+    __slots__ = ("layout", "bits", "version")
+
+    def __init__(self, catalogue: Catalogue, checked: dict = None, bits: int = 0):
+        self.layout = bit_layout(catalogue)
+        self.bits = bits | self.layout.pack(checked) if checked else bits
+        self.version = 0   # bumped by every change, so callers can tell the state moved
+
+    # ── Pickling: the encoded bitset, not the shared layout ──
+    def __getstate__(self):
+        return self.layout.digest, encode(self.layout, self.bits)
+
+    def __setstate__(self, state):
+        digest, data = state
+        self.layout = layout_for_digest(digest)
+        self.bits = decode(self.layout, data)
+        self.version = 0
+
+    # ── Mutation ──
+    def set(self, key: str, value: bool) -> bool:
+        """Apply one toggle; return True if it changed the state."""
+        i = self.layout.index.get(key)
+        if i is None or bool(self.bits >> i & 1) == bool(value):
+            return False
+        self.bits ^= 1 << i
+        self.version += 1
+        return True
+
+    def set_many(self, changes: dict) -> dict:
+        """Apply a bulk toggle; return only the entries that actually changed."""
+        return {key: value for key, value in changes.items() if self.set(key, value)}
+
+    def reset(self) -> dict:
+        changed = self.layout.diff(self.bits, 0)
+        self.bits = 0
+        self.version += 1
+        return changed
+
+    # ── Reads ──
+    @property
+    def checked(self) -> dict:
+        """The state as {key: bool}, built on demand (exports, history)."""
+        return self.layout.unpack(self.bits)
+
+    @property
+    def total(self) -> int:
+        return self.layout.size
+
+    @property
+    def done(self) -> int:
+        return self.bits.bit_count()
+
+    def get(self, key: str) -> bool:
+        i = self.layout.index.get(key)
+        return i is not None and bool(self.bits >> i & 1)
+
+    def stats(self):
+        """Return (total, done, pending) for the engagement."""
+        done = self.done
+        return self.total, done, self.total - done
+
+    def chapter(self, ch_id: str):
+        """Return (done, total) for one chapter."""
+        mask = self.layout.chapter_mask[ch_id]
+        return (self.bits & mask).bit_count(), mask.bit_count()
+
+    def chapter_summary(self) -> dict:
+        """Section columns of the chapter summary, one entry per chapter; shared, don't mutate."""
+        return chapter_summary(self.layout, self.bits)
+
+
+@functools.lru_cache(maxsize=SUMMARY_CACHE)
+def chapter_summary(layout: BitLayout, bits: int) -> dict:
+    done = [(bits & mask).bit_count() for mask in layout.chapter_masks]
+    return {
+        "Chapter": layout.chapter_titles,
+        "Total Sections": layout.chapter_sizes,
+        "Completed": done,
+        "Pending": [total - d for total, d in zip(layout.chapter_sizes, done)],
+        "High-Risk Sections": layout.chapter_high,
+        "High-Risk Done": [(bits & mask).bit_count() for mask in layout.chapter_high_masks],
+        "Progress (%)": [round(d / total * 100) if total else 0 for total, d in zip(layout.chapter_sizes, done)],
+    }
@@ -0,0 +1,244 @@
+"""
+Audit report generation for the DPDP audit tool.
+
+Shared by the Streamlit app and the headless batch CLI; nothing here
+imports Streamlit.
+
+Text and PDF reports carry a "Generated" time. Exports take it as
+``generated`` (default now; False leaves it out), which lets the export
+cache keep bodies that don't go stale: see ExportCache.
+"""
+
+import csv
+import functools
+import io
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from dpdp_catalogue import Catalogue
+from dpdp_codec import bit_layout
+
+
+def generated_label(when: datetime) -> str:
+    return f"Generated: {when.strftime('%d %b %Y %H:%M')}"
+
+
+def iter_report_lines(catalogue: Catalogue, checked: dict, entity: str = None, generated=None):
+    """Yield the plain-text report line by line."""
+    heading = "DPDP Act 2023 — Audit Report"
+    if entity:
+        heading += f" | Entity: {entity}"
+    if generated is not False:
+        heading += f" | {generated_label(generated or datetime.now())}"
+    yield heading
+    yield "=" * 70
+    for ch in catalogue.chapters:
+        yield f"\n{ch['title']}"
+        yield "-" * 50
+        for sec in ch["sections"]:
+            status = "✅ DONE" if checked.get(sec["key"]) else "⬜ PENDING"
+            yield f"  [{status}] § {sec['num']} — {sec['title']}  ({sec['risk'].upper()} RISK)"
+
+
+def build_report_text(catalogue: Catalogue, checked: dict, entity: str = None, generated=None) -> str:
+    return "\n".join(iter_report_lines(catalogue, checked, entity, generated))
+
+
+def summarize(catalogue: Catalogue, checked: dict) -> dict:
+    """Completion and open high-risk sections for one entity."""
+    done = sum(1 for key in catalogue.by_key if checked.get(key))
+    total = len(catalogue.sections)
+    high_gaps = [s["key"] for s in catalogue.by_risk.get("high", ()) if not checked.get(s["key"])]
+    return {
+        "total": total,
+        "done": done,
+        "pending": total - done,
+        "progress_pct": round(done / total * 100, 1) if total else 0,
+        "high_risk_gaps": high_gaps,
+    }
+
+
+# ─── EXPORT ──────────────────────────────────────────────────────
+EXPORT_FIELDS = ["chapter", "section", "title", "risk", "status"]
+
+# fpdf2's core fonts are Latin-1 only; fold the punctuation the catalogue uses.
+PDF_TEXT_MAP = str.maketrans({"—": "-", "–": "-", "‘": "'", "’": "'", "“": '"', "”": '"', "…": "...", "→": "->"})
+
+RISK_COLORS = {"high": (239, 68, 68), "medium": (180, 83, 9), "low": (4, 120, 87)}
+
+
+def iter_rows(catalogue: Catalogue, checked: dict):
+    """Yield one flat record per section, in catalogue order."""
+    for ch in catalogue.chapters:
+        for sec in ch["sections"]:
+            yield {
+                "chapter": ch["title"],
+                "section": sec["num"],
+                "title": sec["title"],
+                "risk": sec["risk"],
+                "status": "done" if checked.get(sec["key"]) else "pending",
+            }
+
+
+def iter_csv(catalogue: Catalogue, checked: dict):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in iter_rows(catalogue, checked):
+        writer.writerow(row)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+
+def iter_jsonl(catalogue: Catalogue, checked: dict):
+    for row in iter_rows(catalogue, checked):
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def pdf_text(text: str) -> str:
+    return text.translate(PDF_TEXT_MAP).encode("latin-1", "replace").decode("latin-1")
+
+
+class PDFLayout:
+    """The catalogue-dependent part of the PDF report, prepared once.
+
+    Sanitised chapter/section text, risk labels and colours are computed
+    when the layout is built; rendering an entity only adds its statuses.
+    Bulk runs reuse one layout per worker for every document.
+    """
+
+    def __init__(self, catalogue: Catalogue):
+        self.catalogue = catalogue
+        self.title = pdf_text("DPDP Act 2023 — Audit Report")
+        self.chapters = [
+            (
+                pdf_text(ch["title"]),
+                [(sec["key"], pdf_text(f"§ {sec['num']} - {sec['title']}"), f"{sec['risk'].upper()} RISK", RISK_COLORS[sec["risk"]])
+                 for sec in ch["sections"]],
+            )
+            for ch in catalogue.chapters
+        ]
+
+    def render(self, checked: dict, entity: str = None, generated=None) -> bytes:
+        from fpdf import FPDF
+
+        summary = summarize(self.catalogue, checked)
+        pdf = FPDF(format="A4")
+        if generated:
+            pdf.set_creation_date(generated)
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.add_page()
+
+        pdf.set_font("helvetica", "B", 16)
+        pdf.set_text_color(15, 27, 45)
+        pdf.cell(0, 10, self.title, new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font("helvetica", size=9)
+        pdf.set_text_color(100, 116, 139)
+        subtitle = [f"Entity: {entity}"] if entity else []
+        if generated is not False:
+            subtitle.append(generated_label(generated or datetime.now()))
+        pdf.cell(0, 6, pdf_text("  |  ".join(subtitle)), new_x="LMARGIN", new_y="NEXT")
+        pdf.cell(0, 6, f"{summary['done']} of {summary['total']} sections complete ({summary['progress_pct']}%)  |  "
+                       f"{len(summary['high_risk_gaps'])} high-risk sections open", new_x="LMARGIN", new_y="NEXT")
+
+        for ch_title, rows in self.chapters:
+            pdf.ln(3)
+            pdf.set_font("helvetica", "B", 11)
+            pdf.set_text_color(15, 27, 45)
+            pdf.cell(0, 8, ch_title, new_x="LMARGIN", new_y="NEXT")
+            pdf.set_font("helvetica", size=9)
+            for key, label, risk_label, risk_color in rows:
+                done = checked.get(key)
+                pdf.set_text_color(*((16, 185, 129) if done else (148, 163, 184)))
+                pdf.cell(22, 6, "DONE" if done else "PENDING")
+                pdf.set_text_color(30, 41, 59)
+                pdf.cell(140, 6, label)
+                pdf.set_text_color(*risk_color)
+                pdf.cell(0, 6, risk_label, new_x="LMARGIN", new_y="NEXT")
+        return bytes(pdf.output())
+
+
+@functools.lru_cache(maxsize=4)
+def pdf_layout(catalogue: Catalogue) -> PDFLayout:
+    return PDFLayout(catalogue)
+
+
+def render_pdf(catalogue: Catalogue, checked: dict, entity: str = None, generated=None) -> bytes:
+    return pdf_layout(catalogue).render(checked, entity, generated)
+
+
+EXPORT_FORMATS = {
+    "txt": ("Plain text", "text/plain"),
+    "csv": ("CSV", "text/csv"),
+    "jsonl": ("JSON Lines", "application/x-ndjson"),
+    "pdf": ("PDF", "application/pdf"),
+}
+
+
+def state_key(catalogue: Catalogue, checked: dict) -> int:
+    """The completion state as a bitset in catalogue order; equal audits are equal ints."""
+    return bit_layout(catalogue).pack(checked)
+
+
+def iter_export(catalogue: Catalogue, checked: dict, fmt: str, entity: str = None, generated=None):
+    """Yield the export as UTF-8 byte chunks (a PDF comes out as one chunk)."""
+    if fmt == "pdf":
+        yield render_pdf(catalogue, checked, entity, generated)
+        return
+    if fmt == "txt":
+        chunks = (line + "\n" for line in iter_report_lines(catalogue, checked, entity, generated))
+    elif fmt == "csv":
+        chunks = iter_csv(catalogue, checked)
+    elif fmt == "jsonl":
+        chunks = iter_jsonl(catalogue, checked)
+    else:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    for chunk in chunks:
+        yield chunk.encode("utf-8")
+
+
+def build_export(catalogue: Catalogue, checked: dict, fmt: str, entity: str = None, generated=None) -> bytes:
+    out = io.BytesIO()
+    for chunk in iter_export(catalogue, checked, fmt, entity, generated):
+        out.write(chunk)
+    return out.getvalue()
+
+
+class ExportCache:
+    """Process-wide LRU of built exports keyed by (catalogue, format, state bitset).
+
+    A cached text report has no "Generated" time; each lookup adds the
+    current one to its heading. A PDF can't be patched like that, so its
+    key also holds the minute it shows, and it is rebuilt once that passes.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, catalogue: Catalogue, checked: dict, fmt: str, entity: str = None) -> bytes:
+        now = datetime.now().replace(second=0, microsecond=0)
+        generated = now if fmt == "pdf" else False
+        key = (catalogue.digest, fmt, entity, state_key(catalogue, checked), generated)
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+        if data is None:
+            data = build_export(catalogue, checked, fmt, entity, generated)
+            with self._lock:
+                self._items[key] = data
+                while len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+        if fmt == "txt":
+            heading, _, body = data.partition(b"\n")
+            data = b"%s | %s\n%s" % (heading, generated_label(now).encode(), body)
+        return data
+
+
+export_cache = ExportCache()
@@ -0,0 +1,100 @@
+"""
+Full-text search over the DPDP audit catalogue.
+
+An inverted index over section title, description, audit steps and chapter
+title is built once per Catalogue. Queries are tokenised the same way; the
+last query term (and any term ending in ``*``) matches as a prefix against
+a sorted vocabulary, so results update while the auditor is still typing.
+Sections are ranked by field-weighted tf-idf, with an exact section number
+("§ 8", "8") ranked first.
+"""
+
+import bisect
+import functools
+import math
+import re
+
+from dpdp_catalogue import Catalogue
+
+TOKEN_RE = re.compile(r"\w+")
+QUERY_RE = re.compile(r"(\w+)(\*?)")
+
+FIELD_WEIGHTS = {"title": 3.0, "desc": 1.5, "steps": 1.0, "chapter": 0.5}
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    def __init__(self, catalogue: Catalogue):
+        self.keys = catalogue.keys
+        self._num = {}
+        chapter_titles = {ch["id"]: ch["title"] for ch in catalogue.chapters}
+        postings = {}
+        for i, sec in enumerate(catalogue.sections):
+            self._num.setdefault(sec["num"].lower(), []).append(i)
+            fields = {
+                "title": sec["title"],
+                "desc": sec["desc"],
+                "steps": " ".join(sec["steps"]),
+                "chapter": chapter_titles[sec["chapter_id"]],
+            }
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    doc = postings.setdefault(token, {})
+                    doc[i] = doc.get(i, 0.0) + weight
+
+        n = len(self.keys)
+        # Fold idf into the postings once so a query is just dictionary sums.
+        self._postings = {
+            token: {i: tf * math.log(1 + n / len(docs)) for i, tf in docs.items()}
+            for token, docs in postings.items()
+        }
+        self._vocab = sorted(self._postings)
+
+    def _expand(self, term: str, prefix: bool) -> list:
+        if not prefix:
+            return [term] if term in self._postings else []
+        lo = bisect.bisect_left(self._vocab, term)
+        hi = bisect.bisect_left(self._vocab, term + "\uffff")
+        return self._vocab[lo:hi]
+
+    def search(self, query: str, limit: int = None) -> list:
+        """Return ``[(section_key, score), …]`` best first; every term must match."""
+        raw = query.strip().lower().lstrip("§").strip()
+        terms = QUERY_RE.findall(raw)
+        if not terms:
+            return []
+
+        scores = None
+        for pos, (term, star) in enumerate(terms):
+            prefix = pos == len(terms) - 1 or bool(star)
+            term_scores = {}
+            for token in self._expand(term, prefix):
+                for i, score in self._postings[token].items():
+                    # A prefix hit on a longer word counts for a little less.
+                    weight = 1.0 if token == term else 0.8
+                    term_scores[i] = max(term_scores.get(i, 0.0), score * weight)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {i: s + term_scores[i] for i, s in scores.items() if i in term_scores}
+            if not scores:
+                break
+
+        scores = scores or {}
+        for i in self._num.get(raw, ()):
+            scores[i] = scores.get(i, 0.0) + 1000.0
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(self.keys[i], round(score, 3)) for i, score in ranked]
+
+
+@functools.lru_cache(maxsize=4)
+def get_index(catalogue: Catalogue) -> SearchIndex:
+    """Build (once per catalogue) and return the shared search index."""
+    return SearchIndex(catalogue)
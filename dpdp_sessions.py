@@ -0,0 +1,195 @@
+"""
+Session memory manager for the DPDP audit tool.
+
+Every open tab is a Streamlit session with its own state in server memory:
+the progress and step trackers, a widget value for every section checkbox,
+step selector and chapter toggle on the page, and whatever it has loaded
+(an import preview holds the whole parsed tracker). Tabs are left open all
+day, so that state piles up.
+
+The manager keeps one entry per session, least recently active first:
+
+    last_active   the last interaction — a full run the user started, a
+                  chapter rerun or a widget callback; timer ticks, and the
+                  reruns they start, don't count
+    last_seen     the last run of any kind; a tab that stops ticking has closed
+    footprint     the pickled size of its state, sampled every tick
+
+A session idle for ``idle_timeout`` seconds spills: the app pickles its
+state to a file under ``spill_dir`` and drops it from memory. When the
+resident sessions together exceed ``ceiling`` bytes, the least recently
+active ones are picked for eviction and spill at their next tick, however
+recently they were used. The next interaction restores the state.
+
+Streamlit session state is only safe to touch from the session's own
+script thread, so eviction is cooperative: the manager decides, and each
+session spills itself on its next tick and restores itself on its next
+run. Nothing here is needed for durability — every change is already in
+the state store — so a lost spill file only costs a session its extras
+(an import preview, view settings); its audit reloads from the store.
+
+Spill files live in a directory of this process's own, removed when the
+process exits (a killed one leaves it behind), so replicas can share
+``spill_dir``.
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+DEFAULT_SPILL_DIR = "dpdp_sessions"
+IDLE_TIMEOUT = 15 * 60.0      # seconds without interaction before a session spills
+MEMORY_CEILING = 256 << 20    # bytes of resident session state per process
+STALE_AFTER = 30 * 60.0       # a session unseen this long has closed; its entry and spill go
+SWEEP_EVERY = 60.0
+
+
+class _Session:
+    __slots__ = ("last_active", "last_seen", "footprint", "spilled", "evict")
+
+    def __init__(self, now: float):
+        self.last_active = self.last_seen = now
+        self.footprint = 0
+        self.spilled = None   # bytes on disk while spilled
+        self.evict = False
+
+
+class SessionManager:
+    def __init__(self, spill_dir: str = DEFAULT_SPILL_DIR, idle_timeout: float = IDLE_TIMEOUT,
+                 ceiling: int = MEMORY_CEILING, clock=time.monotonic):
+        os.makedirs(spill_dir, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix=f"{os.getpid()}-", dir=spill_dir)
+        self.idle_timeout = idle_timeout
+        self.ceiling = ceiling
+        self._clock = clock
+        self._sessions = OrderedDict()   # session id -> _Session, least recently active first
+        self._lock = threading.Lock()
+        self._swept = clock()
+        self.spills = self.restores = 0
+        weakref.finalize(self, shutil.rmtree, self.path, True)
+
+    def _entry(self, sid: str) -> _Session:
+        entry = self._sessions.get(sid)
+        if entry is None:
+            entry = self._sessions[sid] = _Session(self._clock())
+        return entry
+
+    def _file(self, sid: str) -> str:
+        return os.path.join(self.path, f"{sid}.pkl")
+
+    # ── Activity ──
+    def touch(self, sid: str):
+        """Record an interaction; it also cancels a pending eviction."""
+        with self._lock:
+            entry = self._entry(sid)
+            entry.last_active = entry.last_seen = self._clock()
+            entry.evict = False
+            self._sessions.move_to_end(sid)
+
+    def measure(self, sid: str, footprint: int = None) -> bool:
+        """Record a tick and the session's footprint; True if it should spill now.
+
+        A spilled session passes no footprint; its tick only shows it is still open.
+        """
+        with self._lock:
+            now = self._clock()
+            entry = self._entry(sid)
+            entry.last_seen = now
+            if now - self._swept >= SWEEP_EVERY:
+                self._sweep(now)
+            if entry.spilled is not None:
+                return False
+            if footprint is not None:
+                entry.footprint = footprint
+            self._enforce()
+            return entry.evict or now - entry.last_active >= self.idle_timeout
+
+    def expired(self, last_used: float) -> bool:
+        """Whether something last used at ``last_used`` (this manager's clock) has idled out."""
+        return self._clock() - last_used >= self.idle_timeout
+
+    def _enforce(self):
+        # Pick least recently active sessions until the rest fit. The most
+        # recent one is never picked: it would only be restored straight away.
+        resident = sum(e.footprint for e in self._sessions.values() if e.spilled is None and not e.evict)
+        for sid in list(self._sessions)[:-1]:
+            if resident <= self.ceiling:
+                break
+            entry = self._sessions[sid]
+            if entry.spilled is None and not entry.evict:
+                entry.evict = True
+                resident -= entry.footprint
+
+    def _sweep(self, now: float):
+        self._swept = now
+        for sid in [sid for sid, e in self._sessions.items() if now - e.last_seen >= STALE_AFTER]:
+            if self._sessions.pop(sid).spilled is not None:
+                self._remove(sid)
+
+    def _remove(self, sid: str):
+        try:
+            os.remove(self._file(sid))
+        except FileNotFoundError:
+            pass
+
+    # ── Spill ──
+    def spill(self, sid: str, state: dict) -> int:
+        """Write a session's state to disk; the caller then drops it from memory."""
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        path = self._file(sid)
+        with open(path + ".tmp", "wb") as fh:
+            fh.write(data)
+        os.replace(path + ".tmp", path)
+        with self._lock:
+            entry = self._entry(sid)
+            entry.spilled, entry.footprint, entry.evict = len(data), 0, False
+            self.spills += 1
+        return len(data)
+
+    def restore(self, sid: str):
+        """The state a session spilled, or None if it isn't spilled (or the file is gone)."""
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is None or entry.spilled is None:
+                return None
+            entry.spilled = None
+            self.restores += 1
+        try:
+            with open(self._file(sid), "rb") as fh:
+                state = pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        finally:
+            self._remove(sid)
+        return state
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = list(self._sessions.values())
+        spilled = [e for e in entries if e.spilled is not None]
+        return {
+            "sessions": len(entries),
+            "spilled": len(spilled),
+            "resident_bytes": sum(e.footprint for e in entries if e.spilled is None),
+            "spilled_bytes": sum(e.spilled for e in spilled),
+            "spills": self.spills,
+            "restores": self.restores,
+        }
+
+
+def open_session_manager(path: str = None) -> SessionManager:
+    """A manager spilling under ``path`` or ``$DPDP_SESSION_DIR``.
+
+    ``$DPDP_SESSION_IDLE`` (seconds) and ``$DPDP_SESSION_MEMORY_MB`` override
+    the idle timeout and the memory ceiling.
+    """
+    return SessionManager(
+        path or os.environ.get("DPDP_SESSION_DIR", DEFAULT_SPILL_DIR),
+        idle_timeout=float(os.environ.get("DPDP_SESSION_IDLE", IDLE_TIMEOUT)),
+        ceiling=int(float(os.environ.get("DPDP_SESSION_MEMORY_MB", MEMORY_CEILING >> 20)) * (1 << 20)),
+    )
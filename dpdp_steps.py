@@ -0,0 +1,153 @@
+"""
+Step-level audit tracking for the DPDP audit tool.
+
+A section's ``steps`` are the audit procedures behind it, and an auditor
+can mark each one pass, fail or not applicable. Steps are addressed as
+"{section key}/{n}" (see dpdp_catalogue.step_key) and stored next to the
+section state as int status codes. A step nobody has touched has no entry:
+a StepTracker's map holds only the steps in play, however large the
+catalogue.
+
+Status rolls up to the step's section, chapter and risk level. The tracker
+keeps resolved (pass or N/A) and failed counts per group and moves them by
+the delta of each change, so a change updates four counters and a rollup
+is a lookup; no read ever walks the steps. The per-catalogue part — each
+step's groups and each group's step total — is a StepLayout shared by
+every session.
+"""
+
+import functools
+import zlib
+from collections import Counter
+
+from dpdp_catalogue import Catalogue, step_key
+
+UNTOUCHED, PASS, FAIL, NA = range(4)
+STATUS_LABELS = {PASS: "Pass", FAIL: "Fail", NA: "N/A"}
+RESOLVED = (PASS, NA)
+ALL = "*"   # rollup group covering every step
+
+_layouts = {}   # catalogue digest -> StepLayout, for unpickling sessions
+
+
+# ─── LAYOUT ──────────────────────────────────────────────────────
+class StepLayout:
+    def __init__(self, catalogue: Catalogue):
+        self.digest = catalogue.digest
+        self.keys = []         # every step key, in catalogue order
+        self.by_section = {}   # section key -> its step keys, in order
+        self.groups = {}       # step key -> rollup groups it counts towards
+        self.total = Counter()
+        for sec in catalogue.sections:
+            keys = tuple(step_key(sec["key"], n) for n in range(1, len(sec["steps"]) + 1))
+            groups = (sec["key"], ("chapter", sec["chapter_id"]), ("risk", sec["risk"]), ALL)
+            self.by_section[sec["key"]] = keys
+            self.keys.extend(keys)
+            for key in keys:
+                self.groups[key] = groups
+            for group in groups:
+                self.total[group] += len(keys)
+        self.keys = tuple(self.keys)
+
+
+@functools.lru_cache(maxsize=None)
+def step_layout(catalogue: Catalogue) -> StepLayout:
+    layout = StepLayout(catalogue)
+    _layouts[layout.digest] = layout
+    return layout
+
+
+# ─── TRACKER ─────────────────────────────────────────────────────
+class StepTracker:
+    __slots__ = ("layout", "status", "resolved", "failed", "version")
+
+    def __init__(self, catalogue: Catalogue, statuses: dict = None):
+        self.layout = step_layout(catalogue)
+        self.status = {}
+        self.resolved = Counter()
+        self.failed = Counter()
+        self.version = 0   # bumped by every change, so callers can tell the state moved
+        if statuses:
+            self.set_many(statuses)
+
+    # ── Pickling: one status byte per step, deflated; counters are rebuilt ──
+    def __getstate__(self):
+        codes = bytes(self.status.get(key, UNTOUCHED) for key in self.layout.keys)
+        return self.layout.digest, zlib.compress(codes)
+
+    def __setstate__(self, state):
+        digest, data = state
+        try:
+            self.layout = _layouts[digest]
+        except KeyError:
+            raise ValueError(f"No catalogue loaded with digest {digest}") from None
+        self.status, self.resolved, self.failed = {}, Counter(), Counter()
+        self.version = 0
+        self.set_many({key: code for key, code in zip(self.layout.keys, zlib.decompress(data)) if code})
+
+    # ── Mutation ──
+    def set(self, key: str, value: int) -> bool:
+        """Apply one status change; return True if it changed the state.
+
+        Keys that are not steps of this catalogue (section keys included)
+        are ignored, so a store's whole state map can be passed in.
+        """
+        groups = self.layout.groups.get(key)
+        if groups is None:
+            return False
+        value = int(value or UNTOUCHED)
+        if value not in (UNTOUCHED, *STATUS_LABELS):
+            raise ValueError(f"Unknown step status {value!r} for {key}")
+        old = self.status.get(key, UNTOUCHED)
+        if value == old:
+            return False
+        if value == UNTOUCHED:
+            del self.status[key]
+        else:
+            self.status[key] = value
+        d_resolved = (value in RESOLVED) - (old in RESOLVED)
+        d_failed = (value == FAIL) - (old == FAIL)
+        for group in groups:
+            if d_resolved:
+                self.resolved[group] += d_resolved
+            if d_failed:
+                self.failed[group] += d_failed
+        self.version += 1
+        return True
+
+    def set_many(self, changes: dict) -> dict:
+        """Apply several changes; return only the step entries that changed."""
+        return {key: value for key, value in changes.items() if self.set(key, value)}
+
+    def reset(self) -> dict:
+        changed = dict.fromkeys(self.status, UNTOUCHED)
+        self.status.clear()
+        self.resolved.clear()
+        self.failed.clear()
+        self.version += 1
+        return changed
+
+    # ── Reads ──
+    def get(self, key: str) -> int:
+        return self.status.get(key, UNTOUCHED)
+
+    def rollup(self, group):
+        """Return (resolved, total, failed) for a section key, ("chapter", id), ("risk", level) or ALL."""
+        return self.resolved[group], self.layout.total[group], self.failed[group]
+
+    def section(self, key: str):
+        return self.rollup(key)
+
+    def chapter(self, ch_id: str):
+        return self.rollup(("chapter", ch_id))
+
+    def risk(self, risk: str):
+        return self.rollup(("risk", risk))
+
+    def totals(self):
+        return self.rollup(ALL)
+
+    def section_complete(self, key: str) -> bool:
+        """True when every step of the section is resolved (a section without steps never is)."""
+        total = self.layout.total[key]
+        return bool(total) and self.resolved[key] == total
@@ -0,0 +1,624 @@
+"""
+Audit state backends for the DPDP audit tool.
+
+The checked map ({"ch{n}-{num}": bool}) is persisted per engagement so that
+progress survives browser refreshes, server restarts and pod reschedules.
+Audit step statuses share it: a step key ("ch{n}-{num}/{step}") maps to an
+int status code (see dpdp_steps), and only steps someone has touched have
+a row.
+
+Every write is also appended to an event log (one event per toggle, bulk
+toggle or reset, with a timestamp and actor). The log is never rewritten.
+The current state is kept materialized next to it, and a snapshot of that
+state is taken every ``snapshot_every`` events or ``snapshot_interval``
+seconds. Loading the current state is a single read, and the progress-
+over-time views read the snapshots rather than replaying the log.
+
+Several auditors can edit one engagement at once. Each section key is a
+last-writer-wins register stamped with (timestamp, actor). Timestamps come
+from a hybrid clock: wall time, strictly increasing within the process,
+and advanced past every remote change the process has observed, so an
+edit made after seeing someone else's change always wins over it. Sessions
+pick up other writers' changes with ``changes_since``, which reads only the
+events after the session's last seen sequence number and returns the
+merged values of the keys they touched.
+
+Any number of processes can share one SQLite file: server replicas run
+as identical processes behind a proxy, and none holds state the others
+need. A watching store (``watch=True``) follows every commit to the file
+through a ChangeFeed. The feed polls ``PRAGMA data_version``, which
+changes only when another connection commits, so an idle check reads no
+table. Sessions' live-sync polls are answered from the feed's per-
+engagement head sequence without a query, ``load`` is read through a
+per-process cache that the feed keeps current, and ``subscribe`` hands
+every committed change — from this process or another — to process-wide
+views such as the portfolio.
+
+    MemoryStore   — process-local, nothing persisted (tests, demos)
+    SQLiteStore   — single SQLite file in WAL mode, writes coalesced and
+                    flushed in one transaction per batch
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from dpdp_catalogue import STEP_SEP
+
+DEFAULT_ENGAGEMENT = "default"
+DEFAULT_DB_PATH = "dpdp_audit_state.db"
+SNAPSHOT_EVERY = 100          # events
+SNAPSHOT_INTERVAL = 86400.0   # seconds
+WATCH_INTERVAL = 0.1          # seconds between data_version checks
+STATE_CACHE_SIZE = 256        # engagements whose state a watching store keeps in memory
+
+# ``changes`` maps section or step key -> new value; ``kind`` is toggle, bulk,
+# reset, import or step.
+Event = namedtuple("Event", "seq ts engagement actor kind changes")
+# ``checked`` is the frozenset of section keys done as of event ``seq``.
+Snapshot = namedtuple("Snapshot", "seq ts checked")
+
+
+def coerce(key: str, value):
+    """Section values are bools, step values int status codes."""
+    return int(value) if STEP_SEP in key else bool(value)
+
+
+# ─── BASE ────────────────────────────────────────────────────────
+class StateStore:
+    """Interface every backend implements.
+
+    ``write`` may buffer; ``flush`` makes buffered writes durable. ``load``
+    always reflects earlier writes from the same process.
+    """
+
+    snapshot_every = SNAPSHOT_EVERY
+    snapshot_interval = SNAPSHOT_INTERVAL
+    _clock = 0.0
+    _clock_lock = threading.Lock()   # the change feed observes from its own thread
+
+    def load(self, engagement: str) -> dict:
+        raise NotImplementedError
+
+    def head_seq(self, engagement: str) -> int:
+        """Sequence number of the engagement's latest event (0 if none)."""
+        raise NotImplementedError
+
+    def changes_since(self, engagement: str, seq: int) -> tuple:
+        """Return (head_seq, {section_key: merged value}) for keys changed after ``seq``.
+
+        Values come from the merged state rather than the events, so a write
+        that lost the merge is never re-applied.
+        """
+        raise NotImplementedError
+
+    def write(self, engagement: str, changes: dict, actor: str = "", kind: str = "toggle"):
+        raise NotImplementedError
+
+    def subscribe(self, callback):
+        """Call ``callback(engagement, {key: merged value})`` for every committed change.
+
+        Changes from other processes sharing the store are included. Callbacks
+        run on a store thread and must not call back into the store.
+        """
+        raise NotImplementedError
+
+    def load_all(self):
+        """Return (engagement, section_key, checked) for every stored row."""
+        raise NotImplementedError
+
+    def events(self, engagement: str, after_seq: int = 0) -> list:
+        """Return the engagement's events after ``after_seq``, oldest first."""
+        raise NotImplementedError
+
+    def recent_events(self, engagement: str, limit: int = 50) -> list:
+        """Return the engagement's last ``limit`` events, oldest first."""
+        return self.events(engagement)[-limit:]
+
+    def snapshots(self, engagement: str) -> list:
+        """Return every snapshot of the engagement, oldest first."""
+        raise NotImplementedError
+
+    def _tick(self) -> float:
+        with self._clock_lock:
+            self._clock = max(time.time(), self._clock + 1e-6)
+            return self._clock
+
+    def _observe(self, ts: float):
+        with self._clock_lock:
+            self._clock = max(self._clock, ts)
+
+    def _snapshot_due(self, last: Snapshot, pending_events: int, now: float) -> bool:
+        if pending_events <= 0:
+            return False
+        if last is None:
+            return True
+        return pending_events >= self.snapshot_every or now - last.ts >= self.snapshot_interval
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+# ─── MEMORY ──────────────────────────────────────────────────────
+class MemoryStore(StateStore):
+    def __init__(self):
+        self._data = {}
+        self._events = {}
+        self._snapshots = {}
+        self._tail = {}           # events since each engagement's last snapshot
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def load(self, engagement: str) -> dict:
+        with self._lock:
+            return dict(self._data.get(engagement, {}))
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def write(self, engagement: str, changes: dict, actor: str = "", kind: str = "toggle"):
+        if not changes:
+            return
+        changes = {key: coerce(key, value) for key, value in changes.items()}
+        with self._lock:
+            # One process, one clock: every write here is the newest, so the
+            # merge always takes it.
+            now = self._tick()
+            data = self._data.setdefault(engagement, {})
+            data.update(changes)
+            self._seq += 1
+            self._events.setdefault(engagement, []).append(Event(self._seq, now, engagement, actor, kind, changes))
+            self._tail[engagement] = self._tail.get(engagement, 0) + 1
+            snaps = self._snapshots.setdefault(engagement, [])
+            if self._snapshot_due(snaps[-1] if snaps else None, self._tail[engagement], now):
+                snaps.append(Snapshot(self._seq, now, frozenset(k for k, v in data.items() if v is True)))
+                self._tail[engagement] = 0
+        for callback in self._listeners:
+            callback(engagement, changes)
+
+    def head_seq(self, engagement: str) -> int:
+        with self._lock:
+            events = self._events.get(engagement)
+            return events[-1].seq if events else 0
+
+    def changes_since(self, engagement: str, seq: int) -> tuple:
+        with self._lock:
+            events = self._events.get(engagement, ())
+            if not events or events[-1].seq <= seq:
+                return seq, {}
+            keys = set()
+            for event in reversed(events):
+                if event.seq <= seq:
+                    break
+                keys.update(event.changes)
+            data = self._data[engagement]
+            return events[-1].seq, {key: data[key] for key in keys}
+
+    def events(self, engagement: str, after_seq: int = 0) -> list:
+        with self._lock:
+            return [e for e in self._events.get(engagement, ()) if e.seq > after_seq]
+
+    def snapshots(self, engagement: str) -> list:
+        with self._lock:
+            return list(self._snapshots.get(engagement, ()))
+
+    def load_all(self):
+        with self._lock:
+            rows = [(eng, key, val) for eng, data in self._data.items() for key, val in data.items()]
+        return rows
+
+
+# ─── SQLITE ──────────────────────────────────────────────────────
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_state (
+    engagement  TEXT    NOT NULL,
+    section_key TEXT    NOT NULL,
+    checked     INTEGER NOT NULL,
+    updated_at  REAL    NOT NULL,
+    actor       TEXT    NOT NULL DEFAULT '',
+    PRIMARY KEY (engagement, section_key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS audit_events (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    engagement  TEXT    NOT NULL,
+    ts          REAL    NOT NULL,
+    actor       TEXT    NOT NULL DEFAULT '',
+    kind        TEXT    NOT NULL,
+    changes     TEXT    NOT NULL  -- JSON {section_key: bool | step_key: status code}
+);
+CREATE INDEX IF NOT EXISTS audit_events_by_engagement ON audit_events (engagement, seq);
+
+CREATE TABLE IF NOT EXISTS audit_snapshots (
+    engagement  TEXT    NOT NULL,
+    seq         INTEGER NOT NULL,  -- last event folded in
+    ts          REAL    NOT NULL,
+    checked     TEXT    NOT NULL,  -- JSON list of checked section keys
+    PRIMARY KEY (engagement, seq)
+) WITHOUT ROWID;
+"""
+
+# Last writer wins: an older (updated_at, actor) stamp never overwrites a newer one.
+UPSERT = """
+INSERT INTO audit_state (engagement, section_key, checked, updated_at, actor)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (engagement, section_key)
+DO UPDATE SET checked = excluded.checked, updated_at = excluded.updated_at, actor = excluded.actor
+WHERE (excluded.updated_at, excluded.actor) > (audit_state.updated_at, audit_state.actor)
+"""
+
+# Above this many changed keys, changes_since reads the whole engagement
+# instead of binding an IN list.
+CHANGES_IN_LIMIT = 500
+
+
+def merged_values(conn: sqlite3.Connection, engagement: str, keys: set) -> tuple:
+    """Return ({key: merged value}, newest stamp among them) for ``keys`` of an engagement."""
+    if len(keys) > CHANGES_IN_LIMIT:
+        state = conn.execute(
+            "SELECT section_key, checked, updated_at FROM audit_state WHERE engagement = ?", (engagement,)
+        ).fetchall()
+    else:
+        marks = ",".join("?" * len(keys))
+        state = conn.execute(
+            f"SELECT section_key, checked, updated_at FROM audit_state "
+            f"WHERE engagement = ? AND section_key IN ({marks})",
+            (engagement, *keys),
+        ).fetchall()
+    values, newest = {}, 0.0
+    for key, checked, updated_at in state:
+        if key in keys:
+            values[key] = coerce(key, checked)
+            newest = max(newest, updated_at)
+    return values, newest
+
+
+class SQLiteStore(StateStore):
+    """SQLite-backed store with debounced, batched writes.
+
+    Toggles are coalesced per (engagement, section_key) in memory and written
+    ``flush_interval`` seconds after the first pending change, so a burst of
+    clicks or a "mark all" toggle costs one transaction. ``flush_interval=0``
+    writes through synchronously. Events are buffered alongside and appended
+    in the same transaction, followed by any snapshot that falls due.
+
+    With ``watch=True`` (or after ``watch()``/``subscribe()``) the store
+    follows commits from every process through a ChangeFeed and keeps a
+    read-through cache of up to STATE_CACHE_SIZE engagements' state.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, flush_interval: float = 0.5, watch: bool = False):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._pending = {}
+        self._pending_events = []
+        self._timer = None
+        self._feed = None
+        self._states = OrderedDict()        # engagement -> state, while watching
+        self._states_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(audit_state)")}
+        if "actor" not in columns:
+            self._conn.execute("ALTER TABLE audit_state ADD COLUMN actor TEXT NOT NULL DEFAULT ''")
+        atexit.register(self.close)
+        if watch:
+            self.watch()
+
+    # ── Change feed and state cache ──
+    def watch(self, interval: float = WATCH_INTERVAL) -> "ChangeFeed":
+        """Follow commits from every process sharing the file; idempotent."""
+        with self._lock:
+            if self._feed is None:
+                self._feed = ChangeFeed(self.path, interval)
+                self._feed.subscribe(self._on_change)
+            return self._feed
+
+    def subscribe(self, callback):
+        self.watch().subscribe(lambda engagement, values, stamp: callback(engagement, values))
+
+    def _on_change(self, engagement: str, values: dict, stamp: float):
+        # Feed thread. Never takes self._lock: a flush holding it may be
+        # waiting on the feed.
+        self._observe(stamp)
+        with self._states_lock:
+            state = self._states.get(engagement)
+            if state is not None:
+                state.update(values)
+
+    def _read_state(self, engagement: str) -> dict:
+        rows = self._conn.execute(
+            "SELECT section_key, checked FROM audit_state WHERE engagement = ?",
+            (engagement,),
+        ).fetchall()
+        return {key: coerce(key, checked) for key, checked in rows}
+
+    def load(self, engagement: str) -> dict:
+        with self._lock:
+            self._flush_locked()
+            if self._feed is None:
+                return self._read_state(engagement)
+            with self._states_lock:
+                state = self._states.get(engagement)
+                if state is not None:
+                    self._states.move_to_end(engagement)
+                    return dict(state)
+            seen = self._feed.seq
+            state = self._read_state(engagement)
+            with self._states_lock:
+                # A change the feed delivered during the read found nothing
+                # cached to update; cache only a read nothing overtook.
+                if self._feed.seq == seen:
+                    self._states[engagement] = dict(state)
+                    if len(self._states) > STATE_CACHE_SIZE:
+                        self._states.popitem(last=False)
+            return state
+
+    def load_all(self):
+        with self._lock:
+            self._flush_locked()
+            return self._conn.execute(
+                "SELECT engagement, section_key, checked FROM audit_state"
+            ).fetchall()
+
+    def write(self, engagement: str, changes: dict, actor: str = "", kind: str = "toggle"):
+        if not changes:
+            return
+        changes = {key: coerce(key, value) for key, value in changes.items()}
+        with self._lock:
+            ts = self._tick()
+            for key, value in changes.items():
+                self._pending[(engagement, key)] = (value, ts, actor)
+            self._pending_events.append((engagement, ts, actor, kind, json.dumps(changes)))
+            if self.flush_interval <= 0:
+                self._flush_locked()
+            else:
+                self._arm_timer()
+
+    def _arm_timer(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        now = time.time()
+        rows = [(eng, key, int(val), ts, actor) for (eng, key), (val, ts, actor) in self._pending.items()]
+        events = self._pending_events
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(UPSERT, rows)
+                self._conn.executemany(
+                    "INSERT INTO audit_events (engagement, ts, actor, kind, changes) VALUES (?, ?, ?, ?, ?)", events
+                )
+                for engagement in {e[0] for e in events}:
+                    self._maybe_snapshot(engagement, now)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            # Locked out past busy_timeout (another replica holds the write
+            # lock) or rolled back: the batch stays buffered and is retried.
+            if self.flush_interval > 0:
+                self._arm_timer()
+            raise
+        # Only now is the batch safe to let go; writes wait on self._lock meanwhile.
+        self._pending.clear()
+        self._pending_events = []
+        if self._feed is not None:
+            # load() must see this process's writes at once; the feed
+            # confirms the merged values (a newer remote stamp may win) on
+            # the poll this triggers.
+            with self._states_lock:
+                for eng, key, value, _, _ in rows:
+                    if eng in self._states:
+                        self._states[eng][key] = coerce(key, value)
+            self._feed.nudge()
+
+    def _maybe_snapshot(self, engagement: str, now: float):
+        # Runs inside the flush transaction, so audit_state already holds
+        # every event up to MAX(seq): the snapshot is a copy, not a replay.
+        last = self._last_snapshot(engagement)
+        tail, head_seq = self._conn.execute(
+            "SELECT COUNT(*), MAX(seq) FROM audit_events WHERE engagement = ? AND seq > ?",
+            (engagement, last.seq if last else 0),
+        ).fetchone()
+        if not self._snapshot_due(last, tail, now):
+            return
+        keys = [r[0] for r in self._conn.execute(
+            "SELECT section_key FROM audit_state WHERE engagement = ? AND checked = 1 AND instr(section_key, ?) = 0 "
+            "ORDER BY section_key",
+            (engagement, STEP_SEP),
+        )]
+        self._conn.execute("INSERT INTO audit_snapshots (engagement, seq, ts, checked) VALUES (?, ?, ?, ?)",
+                           (engagement, head_seq, now, json.dumps(keys)))
+
+    def _last_snapshot(self, engagement: str):
+        row = self._conn.execute(
+            "SELECT seq, ts, checked FROM audit_snapshots WHERE engagement = ? ORDER BY seq DESC LIMIT 1",
+            (engagement,),
+        ).fetchone()
+        return Snapshot(row[0], row[1], frozenset(json.loads(row[2]))) if row else None
+
+    def head_seq(self, engagement: str) -> int:
+        with self._lock:
+            self._flush_locked()
+            if self._feed is not None:
+                return self._feed.head(engagement)
+            return self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM audit_events WHERE engagement = ?", (engagement,)
+            ).fetchone()[0]
+
+    def changes_since(self, engagement: str, seq: int) -> tuple:
+        with self._lock:
+            self._flush_locked()
+            # The common case — nothing new — is a dict lookup while watching,
+            # one index probe otherwise.
+            if self._feed is not None and self._feed.head(engagement) <= seq:
+                return seq, {}
+            rows = self._conn.execute(
+                "SELECT seq, changes FROM audit_events WHERE engagement = ? AND seq > ? ORDER BY seq",
+                (engagement, seq),
+            ).fetchall()
+            if not rows:
+                return seq, {}
+            keys = set()
+            for _, changes in rows:
+                keys.update(json.loads(changes))
+            values, newest = merged_values(self._conn, engagement, keys)
+            self._observe(newest)
+        return rows[-1][0], values
+
+    def events(self, engagement: str, after_seq: int = 0) -> list:
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT seq, ts, engagement, actor, kind, changes FROM audit_events "
+                "WHERE engagement = ? AND seq > ? ORDER BY seq",
+                (engagement, after_seq),
+            ).fetchall()
+        return [Event(*row[:5], json.loads(row[5])) for row in rows]
+
+    def recent_events(self, engagement: str, limit: int = 50) -> list:
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT seq, ts, engagement, actor, kind, changes FROM audit_events "
+                "WHERE engagement = ? ORDER BY seq DESC LIMIT ?",
+                (engagement, limit),
+            ).fetchall()
+        return [Event(*row[:5], json.loads(row[5])) for row in reversed(rows)]
+
+    def snapshots(self, engagement: str) -> list:
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT seq, ts, checked FROM audit_snapshots WHERE engagement = ? ORDER BY seq", (engagement,)
+            ).fetchall()
+        return [Snapshot(seq, ts, frozenset(json.loads(checked))) for seq, ts, checked in rows]
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_locked()
+            if self._feed is not None:
+                self._feed.close()
+            self._conn.close()
+            self._conn = None
+
+
+# ─── CHANGE FEED ─────────────────────────────────────────────────
+class ChangeFeed:
+    """Follows every commit to a SQLite store file, whichever process made it.
+
+    A daemon thread checks ``PRAGMA data_version`` on the feed's own
+    connection every ``interval`` seconds (or at once when nudged). When it
+    moved, the feed reads the events past the last sequence number it saw —
+    seq is global and commits are serialized, so nothing is ever skipped —
+    and hands listeners each touched engagement's merged values.
+    """
+
+    def __init__(self, path: str, interval: float = WATCH_INTERVAL):
+        self.interval = interval
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._version = self._data_version()
+        self.seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM audit_events").fetchone()[0]
+        self.heads = dict(self._conn.execute("SELECT engagement, MAX(seq) FROM audit_events GROUP BY engagement"))
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="dpdp-change-feed")
+        self._thread.start()
+
+    def subscribe(self, callback):
+        """``callback(engagement, {key: merged value}, newest stamp)``, on the feed thread."""
+        self._listeners.append(callback)
+
+    def head(self, engagement: str) -> int:
+        return self.heads.get(engagement, 0)
+
+    def nudge(self):
+        self._wake.set()
+
+    def _data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def poll(self) -> int:
+        """Deliver the events committed since the last poll; return how many."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, engagement, changes FROM audit_events WHERE seq > ? ORDER BY seq", (self.seq,)
+            ).fetchall()
+            if not rows:
+                return 0
+            touched = {}
+            for seq, engagement, changes in rows:
+                touched.setdefault(engagement, set()).update(json.loads(changes))
+                self.heads[engagement] = seq
+            # Moved before delivery, so a reader that saw the old value knows it raced this poll.
+            self.seq = rows[-1][0]
+            for engagement, keys in touched.items():
+                values, newest = merged_values(self._conn, engagement, keys)
+                for callback in self._listeners:
+                    callback(engagement, values, newest)
+            return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                version = self._data_version()
+                if version != self._version:
+                    self.poll()
+                    self._version = version
+            except sqlite3.Error:
+                continue   # busy or locked: the version is unchanged, so the next tick retries
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        with self._lock:
+            self._conn.close()
+
+
+# ─── FACTORY ─────────────────────────────────────────────────────
+def open_store(backend: str = None, path: str = None, watch: bool = False) -> StateStore:
+    """Build the backend named by ``backend`` or ``$DPDP_STATE_BACKEND``.
+
+    ``watch`` makes a SQLite store follow other processes' commits (see ChangeFeed).
+    """
+    backend = (backend or os.environ.get("DPDP_STATE_BACKEND", "sqlite")).lower()
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "sqlite":
+        return SQLiteStore(path or os.environ.get("DPDP_STATE_DB", DEFAULT_DB_PATH), watch=watch)
+    raise ValueError(f"Unknown state backend: {backend!r}")
@@ -0,0 +1,78 @@
+"""
+Static assets and prebuilt HTML fragments for the DPDP audit tool.
+
+Streamlit clears any element a full rerun does not re-emit, so the styles
+have to be re-sent on every rerun. The stylesheet and logo in static/ are
+inlined, read from disk and wrapped once per process. They are not left to
+Streamlit's static file serving: its handler sends .css and .svg files as
+text/plain with ``nosniff``, and browsers refuse them.
+
+Section detail bodies (overview plus numbered audit steps) are built once
+per catalogue and section and sent as a single markdown element, rather
+than one element per step.
+
+Small tables go out as static HTML too (``summary_table_html``). Their
+cells can hold user text, such as the actor names in the activity log, so
+every header and cell is escaped.
+"""
+
+import functools
+import html
+import os
+
+from dpdp_catalogue import Catalogue
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+@functools.lru_cache(maxsize=None)
+def read_static(name: str) -> str:
+    with open(os.path.join(STATIC_DIR, name), encoding="utf-8") as fh:
+        return fh.read()
+
+
+@functools.lru_cache(maxsize=None)
+def css_block() -> str:
+    return f"<style>\n{read_static('dpdp.css')}</style>"
+
+
+def logo_html() -> str:
+    return read_static("logo.svg")
+
+
+@functools.lru_cache(maxsize=None)
+def section_body_html(catalogue: Catalogue, key: str, with_steps: bool = True) -> str:
+    """Overview plus numbered audit steps; ``with_steps=False`` leaves the steps to the caller's widgets."""
+    sec = catalogue.by_key[key]
+    steps = "" if not with_steps else "".join(
+        f'<div class="audit-step-row">'
+        f'<div class="step-circle">{i}</div>'
+        f'<div class="step-text">{html.escape(step, quote=False)}</div>'
+        f'</div>'
+        for i, step in enumerate(sec["steps"], 1)
+    )
+    return (
+        f"<div class='sec-detail-box'>"
+        f"<div class='det-label'>📄 Section Overview</div>"
+        f"<div class='det-text'>{html.escape(sec['desc'], quote=False)}</div>"
+        f"<div class='det-label'>✅ Audit Procedure</div>"
+        f"{steps}"
+        f"</div>"
+    )
+
+
+def summary_table_html(rows: list) -> str:
+    """A static table of ``rows`` (dicts sharing their keys); numbers are right-aligned."""
+    if not rows:
+        return ""
+    columns = list(rows[0])
+    head = "".join(f"<th>{html.escape(str(c))}</th>" for c in columns)
+    body = "".join(
+        "<tr>" + "".join(
+            f"<td class='num'>{html.escape(str(v))}</td>" if isinstance(v, (int, float))
+            else f"<td>{html.escape(str(v))}</td>"
+            for v in row.values()
+        ) + "</tr>"
+        for row in rows
+    )
+    return f"<table class='summary-table'><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
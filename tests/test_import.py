@@ -0,0 +1,38 @@
+import io
+
+from dpdp_catalogue import load_catalogue
+from dpdp_import import read_tracker
+
+
+def test_an_upload_can_be_read_twice():
+    catalogue = load_catalogue()
+    upload = io.BytesIO(f"Section Key,Status\n{catalogue.keys[0]},done\n".encode())
+    for _ in range(2):
+        result = read_tracker(upload, catalogue, engagement="acme", name="tracker.csv")
+        assert (result.rows, result.matched) == (1, 1)
+    assert not upload.closed
+
+
+def test_control_ids_are_not_section_numbers():
+    catalogue = load_catalogue()
+    upload = io.BytesIO("Control ID,Status\nDPDP-07,done\n".encode())
+    try:
+        read_tracker(upload, catalogue, engagement="acme", name="tracker.csv")
+    except ValueError as exc:
+        assert "No key, section or title column" in str(exc)
+    else:
+        raise AssertionError("a control id column was read as section numbers")
+
+    upload = io.BytesIO("Section,Status\nDPDP-07,done\nSection 7(1),done\n".encode())
+    result = read_tracker(upload, catalogue, engagement="acme", name="tracker.csv")
+    assert result.matched == 1 and "DPDP-07" in result.unmatched
+
+
+def test_a_blank_status_leaves_the_section_alone():
+    catalogue = load_catalogue()
+    key = catalogue.keys[0]
+    upload = io.BytesIO(f"Section Key,Status\n{key},done\n{key},\n".encode())
+    result = read_tracker(upload, catalogue, engagement="acme", name="tracker.csv")
+    seen, done = result.states["acme"]
+    assert seen == done == 1 << result.layout.index[key]
+    assert result.blank == 1
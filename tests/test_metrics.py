@@ -0,0 +1,23 @@
+import pickle
+from unittest import mock
+
+from dpdp_catalogue import load_catalogue
+from dpdp_metrics import state_size
+from dpdp_progress import ProgressTracker
+
+
+def test_state_size_only_repickles_changed_values():
+    catalogue = load_catalogue()
+    progress = ProgressTracker(catalogue)
+    state = {"progress": progress, "view": "Single"}
+    sizes = {}
+    first = state_size(state, sizes)
+    with mock.patch("dpdp_metrics.pickle.dumps", wraps=pickle.dumps) as dumps:
+        assert state_size(state, sizes) == first
+        assert dumps.call_count == 0
+        progress.set(catalogue.sections[0]["key"], True)
+        state_size(state, sizes)
+        assert dumps.call_count == 1
+        del state["view"]
+        state_size(state, sizes)
+        assert set(sizes) == {"progress"}
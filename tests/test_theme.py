@@ -0,0 +1,18 @@
+from types import SimpleNamespace
+
+from dpdp_history import activity_rows
+from dpdp_theme import summary_table_html
+
+
+def test_activity_table_escapes_actor_names():
+    event = SimpleNamespace(seq=1, ts=0.0, engagement="default", kind="toggle",
+                            actor="<b>Asha</b><img src=x onerror=alert(1)>", changes={"ch2-4": True})
+    out = summary_table_html(activity_rows([event]))
+    assert "<b>" not in out and "<img" not in out
+    assert "&lt;b&gt;Asha&lt;/b&gt;&lt;img src=x onerror=alert(1)&gt;" in out
+
+
+def test_headers_are_escaped():
+    out = summary_table_html([{"<th>": 1}])
+    assert "<th>&lt;th&gt;</th>" in out
+    assert "<td class='num'>1</td>" in out